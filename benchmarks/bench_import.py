@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Startup benchmark: cost of "import top.api" with lazily loaded request classes
+compared to loading all generated classes, as the package did before.
+
+Each variant runs in a fresh interpreter, several times; the median wall time
+and the peak RSS of the child process are reported.
+
+    python benchmarks/bench_import.py [--repeat 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import json, sys, time
+try:
+    import resource
+except ImportError:
+    resource = None
+start = time.perf_counter()
+import top.api
+%s
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+if rss is not None and sys.platform == "darwin":
+    rss //= 1024
+print(json.dumps({"seconds": elapsed, "rss_kb": rss,
+                  "modules": sum(1 for name in sys.modules if name.startswith("top.api.rest."))}))
+'''
+
+VARIANTS = (
+    ('python (no import)', None),
+    ('import top.api (lazy)', ''),
+    ('import top.api + 4 classes', '\n'.join(
+        'top.api.%s' % name for name in ('AliexpressSolutionProductListGetRequest',
+                                         'AliexpressSolutionProductInfoGetRequest',
+                                         'AliexpressSolutionBatchProductPriceUpdateRequest',
+                                         'AliexpressSolutionBatchProductInventoryUpdateRequest'))),
+    ('import top.api + all classes (eager)', 'for name in top.api.rest.__all__: getattr(top.api.rest, name)'),
+)
+
+
+def run_child(code):
+    if code is None:
+        code = CHILD.replace('import top.api\n%s\n', '')
+    else:
+        code = CHILD % code
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT)
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=15)
+    args = parser.parse_args()
+
+    print('%-40s %12s %12s %10s' % ('variant', 'median ms', 'max RSS KB', 'modules'))
+    for title, code in VARIANTS:
+        runs = [run_child(code) for _ in range(args.repeat)]
+        seconds = statistics.median(run['seconds'] for run in runs)
+        rss = statistics.median(run['rss_kb'] for run in runs) if runs[0]['rss_kb'] is not None else float('nan')
+        print('%-40s %12.2f %12.0f %10d' % (title, seconds * 1000, rss, runs[0]['modules']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark of RestApi.getApplicationParameters over all generated request classes.
+
+Every class is instantiated once with all of its fields filled in. The current
+implementation (cached per-class field table) is compared with the former one
+that walked self.__dict__ and called getMultipartParas() for every attribute.
+
+    python benchmarks/bench_params.py [--number 200]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import top.api  # noqa: E402
+
+
+def legacy_application_parameters(request):
+    application_parameter = {}
+    for key, value in request.__dict__.items():
+        if not key.startswith("__") and key not in request.getMultipartParas() and not key.startswith(
+                "_RestApi__") and value is not None:
+            if key.startswith("_"):
+                application_parameter[key[1:]] = value
+            else:
+                application_parameter[key] = value
+    translate_parameter = request.getTranslateParas()
+    for key in list(application_parameter):
+        if key in translate_parameter:
+            application_parameter[translate_parameter[key]] = application_parameter.pop(key)
+    return application_parameter
+
+
+def build_requests():
+    requests = []
+    for name in top.api.rest.__all__:
+        request = getattr(top.api.rest, name)()
+        for key in list(request.__dict__):
+            if not key.startswith('_RestApi__'):
+                setattr(request, key, 'value')
+        requests.append(request)
+    return requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=200, help='passes over all classes')
+    args = parser.parse_args()
+
+    requests = build_requests()
+    for request in requests:
+        assert request.getApplicationParameters() == legacy_application_parameters(request), request
+    calls = args.number * len(requests)
+
+    def run_legacy():
+        for request in requests:
+            legacy_application_parameters(request)
+
+    def run_current():
+        for request in requests:
+            request.getApplicationParameters()
+
+    legacy = min(timeit.repeat(run_legacy, number=args.number, repeat=5))
+    current = min(timeit.repeat(run_current, number=args.number, repeat=5))
+    print('%d classes, %d calls per run' % (len(requests), calls))
+    print('%-28s %10.3f us/call' % ('legacy __dict__ walk', legacy / calls * 1e6))
+    print('%-28s %10.3f us/call' % ('cached field table', current / calls * 1e6))
+    print('speedup %.2fx' % (legacy / current))
+
+
+if __name__ == '__main__':
+    main()
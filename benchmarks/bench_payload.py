@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Payload benchmark for structured application parameters.
+
+Builds the mutiple_product_update_list of a 200-SKU batch price update and
+compares the former encoding (Python repr passed to urlencode, formatted
+again for the signature) with compact JSON encoded once and shared by the
+signature and the body. Reports body size and the per-call cost of
+urlencode + sign.
+
+    python benchmarks/bench_payload.py [--products 20] [--skus 10] [--number 2000]
+"""
+import argparse
+import os
+import sys
+import timeit
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from top.api import base  # noqa: E402
+from top.api.codec import encode_json  # noqa: E402
+
+SECRET = '0123456789abcdef0123456789abcdef'
+SYS_PARAMETERS = {
+    base.P_FORMAT: 'json',
+    base.P_APPKEY: '12345678',
+    base.P_SIGN_METHOD: 'md5',
+    base.P_VERSION: '2.0',
+    base.P_TIMESTAMP: '1611100000000',
+    base.P_PARTNER_ID: base.SYSTEM_GENERATE_VERSION,
+    base.P_API: 'aliexpress.solution.batch.product.price.update',
+}
+
+
+def build_update_list(products, skus):
+    return [
+        {'product_id': 1005000000000 + product,
+         'multiple_sku_update_list': [{'sku_code': 'SKU-%d-%d' % (product, sku), 'price': '%d.99' % sku}
+                                      for sku in range(skus)]}
+        for product in range(products)
+    ]
+
+
+def repr_call(update_list):
+    application_parameter = {'mutiple_product_update_list': update_list}
+    base.sign(SECRET, SYS_PARAMETERS, 'md5', application_parameter)
+    return urllib.parse.urlencode(application_parameter)
+
+
+def json_call(update_list):
+    application_parameter = {'mutiple_product_update_list': encode_json(update_list)}
+    base.sign(SECRET, SYS_PARAMETERS, 'md5', application_parameter)
+    return urllib.parse.urlencode(application_parameter)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=20)
+    parser.add_argument('--skus', type=int, default=10, help='SKUs per product')
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    update_list = build_update_list(args.products, args.skus)
+    print('%d products x %d SKUs' % (args.products, args.skus))
+    print('%-22s %12s %14s %14s' % ('encoding', 'raw bytes', 'body bytes', 'us/call'))
+    for title, raw, call in (('python repr (before)', repr(update_list).encode('utf-8'), repr_call),
+                             ('compact JSON', encode_json(update_list), json_call)):
+        body = call(update_list)
+        seconds = min(timeit.repeat(lambda: call(update_list), number=args.number, repeat=5)) / args.number
+        print('%-22s %12d %14d %14.1f' % (title, len(raw), len(body), seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main()
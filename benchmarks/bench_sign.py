@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Signing throughput benchmark for top.api.base.sign.
+
+Signs the parameters of a batch price update call: the system parameters plus
+mutiple_product_update_list holding a JSON-encoded list of products with
+several SKUs each. The former implementation (one big formatted string, then
+MD5) is compared with the incremental one for every sign_method.
+
+    python benchmarks/bench_sign.py [--products 20] [--skus 10] [--number 2000]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from top.api import base  # noqa: E402
+
+
+def legacy_sign(secret, parameters):
+    keys = list(parameters.keys())
+    keys.sort()
+    strparams = "%s%s%s" % (secret, str().join('%s%s' % (key, parameters[key]) for key in keys), secret)
+    return hashlib.md5(strparams.encode('utf-8')).hexdigest().upper()
+
+
+def build_parameters(products, skus):
+    update_list = [
+        {'product_id': 1005000000000 + product,
+         'multiple_sku_update_list': [{'sku_code': 'SKU-%d-%d' % (product, sku), 'price': '%d.99' % sku}
+                                      for sku in range(skus)]}
+        for product in range(products)
+    ]
+    sys_parameters = {
+        base.P_FORMAT: 'json',
+        base.P_APPKEY: '12345678',
+        base.P_SIGN_METHOD: 'md5',
+        base.P_VERSION: '2.0',
+        base.P_TIMESTAMP: str(int(time.time() * 1000)),
+        base.P_PARTNER_ID: base.SYSTEM_GENERATE_VERSION,
+        base.P_API: 'aliexpress.solution.batch.product.price.update',
+        base.P_SESSION: '50000000000000000000000000000000000000000000000000000000000000000000',
+    }
+    application_parameters = {'mutiple_product_update_list': json.dumps(update_list, separators=(',', ':'))}
+    return sys_parameters, application_parameters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=20)
+    parser.add_argument('--skus', type=int, default=10, help='SKUs per product')
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    secret = '0123456789abcdef0123456789abcdef'
+    sys_parameters, application_parameters = build_parameters(args.products, args.skus)
+    payload = len(application_parameters['mutiple_product_update_list'])
+
+    def run_legacy():
+        merged = sys_parameters.copy()
+        merged.update(application_parameters)
+        legacy_sign(secret, merged)
+
+    merged = dict(sys_parameters, **application_parameters)
+    assert legacy_sign(secret, merged) == base.sign(secret, sys_parameters, 'md5', application_parameters)
+
+    cases = [('legacy md5 (copy + join)', run_legacy)]
+    for sign_method in base.SIGN_METHODS:
+        cases.append(('incremental %s' % sign_method,
+                      lambda sign_method=sign_method: base.sign(secret, sys_parameters, sign_method,
+                                                                application_parameters)))
+
+    print('%d products x %d SKUs, JSON parameter %d bytes' % (args.products, args.skus, payload))
+    for title, func in cases:
+        seconds = min(timeit.repeat(func, number=args.number, repeat=5)) / args.number
+        print('%-28s %10.2f us/sign %10.0f signs/s %8.1f MB/s'
+              % (title, seconds * 1e6, 1 / seconds, payload / seconds / 1e6))
+
+
+if __name__ == '__main__':
+    main()
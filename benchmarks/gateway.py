@@ -0,0 +1,484 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the TOP REST gateway (/router/rest).
+
+Implements enough of the TOP contract to run the SDK and update_ali_data.py
+offline and to load-test them:
+- checks app_key, timestamp (10 minute window) and the md5 / hmac /
+  hmac-sha256 sign of every call;
+- dispatches on `method`; serves aliexpress.solution.product.list.get,
+  aliexpress.solution.product.info.get, the batch price and inventory
+  updates and taobao.time.get from a generated catalog;
+- answers with gzip when the client accepts it, over keep-alive connections;
+- injects latency, isp.* service errors, call limits (also a real QPS limit),
+  HSF pool-full failures, HTTP 503 and a skewed server clock.
+
+Run it and point update_ali_data.py at it through .env:
+
+    python benchmarks/gateway.py --port 8080 --products 2000 --latency 0.05 --hsf-rate 0.05
+
+    AE_DOMAIN=127.0.0.1
+    AE_PORT=8080
+    AE_APPKEY=test
+    AE_APPSECRET=test
+
+or start it from Python (benchmarks do):
+
+    gateway = Gateway(Catalog(products=1000), port=0)
+    gateway.start()
+    client = top.api.Client(top.appinfo('test', 'test'), '127.0.0.1', gateway.port)
+"""
+import argparse
+import calendar
+import collections
+import datetime
+import email.parser
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from top.api import base  # noqa: E402
+from top.api.clock import SERVER_UTC_OFFSET  # noqa: E402
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Gateway accepts timestamps within this many seconds of its clock
+TIMESTAMP_WINDOW = 600
+# AliExpress limits of one batch price or inventory update
+MAX_BATCH_PRODUCTS = 20
+MAX_BATCH_SKUS = 200
+
+METHOD_PRODUCT_LIST = 'aliexpress.solution.product.list.get'
+METHOD_PRODUCT_INFO = 'aliexpress.solution.product.info.get'
+METHOD_PRICE_UPDATE = 'aliexpress.solution.batch.product.price.update'
+METHOD_INVENTORY_UPDATE = 'aliexpress.solution.batch.product.inventory.update'
+METHOD_TIME_GET = 'taobao.time.get'
+
+HSF_POOL_FULL = 'HSF Provider thread pool is full'
+
+
+class GatewayError(Exception):
+    """An error_response returned to the caller."""
+
+    def __init__(self, code, msg, sub_code=None, sub_msg=None):
+        Exception.__init__(self, msg)
+        self.code = code
+        self.msg = msg
+        self.sub_code = sub_code
+        self.sub_msg = sub_msg
+
+    def to_response(self, request_id):
+        error = {'code': self.code, 'msg': self.msg, 'request_id': request_id}
+        if self.sub_code:
+            error['sub_code'] = self.sub_code
+        if self.sub_msg:
+            error['sub_msg'] = self.sub_msg
+        return {'error_response': error}
+
+
+def server_datetime():
+    """Current gateway local time (UTC+8, like gmt_modified on AliExpress) as a naive datetime, whole seconds."""
+    return datetime.datetime.fromtimestamp(int(time.time()) + SERVER_UTC_OFFSET,
+                                           datetime.timezone.utc).replace(tzinfo=None)
+
+
+class Catalog(object):
+    """Generated products of a seller: product_id -> product with its SKUs, prices and stock.
+
+    products - number of products; max_skus - each product gets 1..max_skus SKUs;
+    seed - random seed, the same seed gives the same catalog.
+    """
+
+    def __init__(self, products=1000, max_skus=5, seed=0, status='onSelling'):
+        rng = random.Random(seed)
+        now = server_datetime()
+        self.lock = threading.Lock()
+        self.products = collections.OrderedDict()
+        for index in range(products):
+            product_id = 1005000000000 + index
+            skus = collections.OrderedDict(
+                ('SKU-%d-%d' % (index, sku), {'price': '%d.%02d' % (rng.randint(1, 999), rng.randint(0, 99)),
+                                             'inventory': rng.randint(0, 100)})
+                for sku in range(rng.randint(1, max_skus)))
+            self.products[product_id] = {
+                'product_id': product_id,
+                'subject': 'Product %d' % index,
+                'status': status,
+                'gmt_modified': now - datetime.timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+                'skus': skus,
+            }
+
+    def sku_count(self):
+        return sum(len(product['skus']) for product in self.products.values())
+
+    def touch(self, product):
+        product['gmt_modified'] = server_datetime()
+
+
+class Faults(object):
+    """Faults injected into calls; rates are probabilities per call (hsf_rate per batch item).
+
+    latency, latency_jitter - seconds added to every call (jitter is uniform 0..latency_jitter);
+    error_rate - isp.remote-service-error (code 15);
+    throttle_rate - App Call Limited (code 7);
+    max_qps - real per-app-key limit, calls above it get code 7;
+    hsf_rate - "HSF Provider thread pool is full" for a batch item or a whole non-batch call;
+    http_error_rate - HTTP 503 with an HTML body;
+    clock_offset - seconds the gateway clock is ahead of the local one.
+    """
+
+    def __init__(self, latency=0.0, latency_jitter=0.0, error_rate=0.0, throttle_rate=0.0, max_qps=None,
+                 hsf_rate=0.0, http_error_rate=0.0, clock_offset=0.0, seed=None):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_qps = max_qps
+        self.hsf_rate = hsf_rate
+        self.http_error_rate = http_error_rate
+        self.clock_offset = clock_offset
+        self.random = random.Random(seed)
+
+    def chance(self, rate):
+        return rate > 0 and self.random.random() < rate
+
+
+class Gateway(object):
+    """The stand-in gateway: an HTTP server on host:port (port 0 picks a free one).
+
+    apps - dict of app key to secret accepted by the gateway.
+    """
+
+    def __init__(self, catalog=None, faults=None, apps=None, host='127.0.0.1', port=0):
+        self.catalog = catalog if catalog is not None else Catalog()
+        self.faults = faults if faults is not None else Faults()
+        self.apps = dict(apps or {'test': 'test'})
+        self.stats = collections.Counter()
+        self._stats_lock = threading.Lock()
+        self._calls = collections.defaultdict(collections.deque)
+        self.handlers = {
+            METHOD_PRODUCT_LIST: self.product_list,
+            METHOD_PRODUCT_INFO: self.product_info,
+            METHOD_PRICE_UPDATE: self.price_update,
+            METHOD_INVENTORY_UPDATE: self.inventory_update,
+            METHOD_TIME_GET: self.time_get,
+        }
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.gateway = self
+        self.host, self.port = self.server.server_address[:2]
+        self._thread = None
+
+    def count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def now(self):
+        return time.time() + self.faults.clock_offset
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # --- contract checks ---
+
+    def check_qps(self, app_key):
+        if not self.faults.max_qps:
+            return
+        now = time.monotonic()
+        with self._stats_lock:
+            calls = self._calls[app_key]
+            while calls and now - calls[0] > 1.0:
+                calls.popleft()
+            if len(calls) >= self.faults.max_qps:
+                raise GatewayError(7, 'App Call Limited', 'accesscontrol.limited-by-app-access-count',
+                                   'This ban will last for 1 more seconds')
+            calls.append(now)
+
+    def check_timestamp(self, value):
+        try:
+            if value.isdigit():
+                timestamp = int(value) / 1000.0
+            else:
+                # Formatted timestamps are Beijing time, like the gateway's own clock
+                timestamp = calendar.timegm(time.strptime(value, TIME_FORMAT)) - SERVER_UTC_OFFSET
+        except (ValueError, OverflowError):
+            raise GatewayError(31, 'Invalid timestamp')
+        if abs(self.now() - timestamp) > TIMESTAMP_WINDOW:
+            raise GatewayError(31, 'Invalid timestamp',
+                               sub_msg='timestamp is out of the %d seconds window' % TIMESTAMP_WINDOW)
+
+    def check_sign(self, parameters):
+        app_key = parameters.get(base.P_APPKEY)
+        if not app_key:
+            raise GatewayError(28, 'Missing app key')
+        if app_key not in self.apps:
+            raise GatewayError(29, 'Invalid app Key')
+        sign_method = parameters.get(base.P_SIGN_METHOD, base.SIGN_METHOD_MD5)
+        if sign_method not in base.SIGN_METHODS:
+            raise GatewayError(25, 'Invalid signature', sub_msg='unsupported sign_method %s' % sign_method)
+        received = parameters.get(base.P_SIGN)
+        if not received:
+            raise GatewayError(25, 'Invalid signature', sub_msg='sign is missing')
+        expected = base.sign(self.apps[app_key], {key: value for key, value in parameters.items()
+                                                  if key != base.P_SIGN}, sign_method)
+        if received.upper() != expected:
+            raise GatewayError(25, 'Invalid signature')
+        return app_key
+
+    def call(self, parameters):
+        """Check and dispatch one call. Returns the response dict."""
+        method = parameters.get(base.P_API)
+        if not method:
+            raise GatewayError(21, 'Missing method')
+        app_key = self.check_sign(parameters)
+        self.check_timestamp(parameters.get(base.P_TIMESTAMP, ''))
+        handler = self.handlers.get(method)
+        if handler is None:
+            raise GatewayError(22, 'Invalid method')
+        if method != METHOD_TIME_GET and not parameters.get(base.P_SESSION):
+            raise GatewayError(26, 'Missing session')
+        self.check_qps(app_key)
+        faults = self.faults
+        if faults.chance(faults.throttle_rate):
+            self.count('injected_throttle')
+            raise GatewayError(7, 'App Call Limited', 'accesscontrol.limited-by-api-access-count',
+                               'This ban will last for 1 more seconds')
+        if faults.chance(faults.error_rate):
+            self.count('injected_error')
+            raise GatewayError(15, 'Remote service error', 'isp.remote-service-error', 'remote service timeout')
+        if method not in (METHOD_PRICE_UPDATE, METHOD_INVENTORY_UPDATE) and faults.chance(faults.hsf_rate):
+            self.count('injected_hsf')
+            raise GatewayError(15, 'Remote service error', 'isp.remote-service-error', HSF_POOL_FULL)
+        self.count(method)
+        # aliexpress.solution.product.list.get -> aliexpress_solution_product_list_get_response,
+        # taobao.time.get -> time_get_response
+        name = method[len('taobao.'):] if method.startswith('taobao.') else method
+        return {name.replace('.', '_') + '_response': handler(parameters)}
+
+    # --- API methods ---
+
+    @staticmethod
+    def _json_parameter(parameters, name):
+        try:
+            return json.loads(parameters.get(name) or 'null')
+        except ValueError:
+            raise GatewayError(41, 'Invalid arguments:' + name)
+
+    def product_list(self, parameters):
+        query = self._json_parameter(parameters, 'aeop_a_e_product_list_query') or {}
+        page = max(1, int(query.get('current_page') or 1))
+        page_size = min(100, max(1, int(query.get('page_size') or 20)))
+        status = query.get('product_status_type', 'onSelling')
+        modified_start = query.get('gmt_modified_start')
+        modified_end = query.get('gmt_modified_end')
+        with self.catalog.lock:
+            products = [product for product in self.catalog.products.values() if product['status'] == status
+                        and (not modified_start or product['gmt_modified'].strftime(TIME_FORMAT) >= modified_start)
+                        and (not modified_end or product['gmt_modified'].strftime(TIME_FORMAT) <= modified_end)]
+        selected = products[(page - 1) * page_size:page * page_size]
+        return {'result': {
+            'success': True,
+            'product_count': len(products),
+            'total_page': (len(products) + page_size - 1) // page_size,
+            'current_page': page,
+            'page_size': page_size,
+            'aeop_a_e_product_display_d_t_o_list': {'item_display_dto': [
+                {'product_id': product['product_id'], 'subject': product['subject'],
+                 'gmt_modified': product['gmt_modified'].strftime(TIME_FORMAT)}
+                for product in selected]},
+        }}
+
+    def product_info(self, parameters):
+        try:
+            product_id = int(parameters.get('product_id'))
+        except (TypeError, ValueError):
+            raise GatewayError(40, 'Missing required arguments:product_id')
+        with self.catalog.lock:
+            product = self.catalog.products.get(product_id)
+            if product is None:
+                raise GatewayError(15, 'Remote service error', 'isv.product-not-exist',
+                                   'product %d does not exist' % product_id)
+            skus = [{'sku_code': sku_code, 'sku_price': sku['price'], 'ipm_sku_stock': sku['inventory'],
+                     'sku_stock': sku['inventory'] > 0}
+                    for sku_code, sku in product['skus'].items()]
+            result = {'product_id': product_id, 'subject': product['subject'],
+                      'product_status_type': product['status'],
+                      'gmt_modified': product['gmt_modified'].strftime(TIME_FORMAT),
+                      'detail': '<p>%s</p>' % ('description ' * 200),
+                      'aeop_ae_product_s_k_us': {'global_aeop_ae_product_sku': skus}}
+        return {'result': result}
+
+    def _batch_update(self, parameters, field, convert):
+        update_list = self._json_parameter(parameters, 'mutiple_product_update_list')
+        if not isinstance(update_list, list) or not update_list:
+            raise GatewayError(40, 'Missing required arguments:mutiple_product_update_list')
+        if (len(update_list) > MAX_BATCH_PRODUCTS
+                or sum(len(item.get('multiple_sku_update_list') or ()) for item in update_list) > MAX_BATCH_SKUS):
+            raise GatewayError(15, 'Remote service error', 'isv.param-size-exceed',
+                               'at most %d products and %d skus per call' % (MAX_BATCH_PRODUCTS, MAX_BATCH_SKUS))
+        failed = []
+        successful = []
+        with self.catalog.lock:
+            for item in update_list:
+                product_id = int(item.get('product_id') or 0)
+                product = self.catalog.products.get(product_id)
+                if product is None:
+                    failed.append({'product_id': product_id, 'error_code': 'product.not.exist',
+                                   'error_message': 'product does not exist'})
+                    continue
+                if self.faults.chance(self.faults.hsf_rate):
+                    self.count('injected_hsf')
+                    failed.append({'product_id': product_id, 'error_code': 'system.error',
+                                   'error_message': HSF_POOL_FULL})
+                    continue
+                missing = [sku['sku_code'] for sku in item.get('multiple_sku_update_list') or ()
+                           if sku.get('sku_code') not in product['skus']]
+                if missing:
+                    failed.append({'product_id': product_id, 'error_code': 'sku.not.exist',
+                                   'error_message': 'sku does not exist: %s' % ','.join(map(str, missing))})
+                    continue
+                for sku in item['multiple_sku_update_list']:
+                    product['skus'][sku['sku_code']][field] = convert(sku[field])
+                self.catalog.touch(product)
+                successful.append({'product_id': product_id})
+        response = {'update_success': not failed,
+                    'update_successful_list': {'synchronize_product_response_dto': successful}}
+        if failed:
+            response['update_error_code'] = 'partial.failure'
+            response['update_error_message'] = '%d of %d products were not updated' % (len(failed), len(update_list))
+            response['update_failed_list'] = {'synchronize_product_response_dto': failed}
+        return response
+
+    def price_update(self, parameters):
+        return self._batch_update(parameters, 'price', str)
+
+    def inventory_update(self, parameters):
+        return self._batch_update(parameters, 'inventory', int)
+
+    def time_get(self, parameters):
+        return {'time': time.strftime(TIME_FORMAT, time.gmtime(self.now() + SERVER_UTC_OFFSET))}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'TOP-Gateway-Stub'
+    # Headers and body are written separately: without TCP_NODELAY every keep-alive
+    # response after the first waits for the client's delayed ACK (about 40 ms)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def date_time_string(self, timestamp=None):
+        # The Date header follows the (possibly skewed) gateway clock
+        return super().date_time_string(self.server.gateway.now() if timestamp is None else timestamp)
+
+    def _read_parameters(self):
+        parameters = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query, keep_blank_values=True))
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.startswith('multipart/form-data'):
+            message = email.parser.BytesParser().parsebytes(
+                b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body)
+            for part in message.get_payload():
+                # Files are not signed, only plain fields are parameters
+                if part.get_filename() is None:
+                    parameters[part.get_param('name', header='content-disposition')] = \
+                        part.get_payload(decode=True).decode('utf-8')
+        elif body:
+            parameters.update(urllib.parse.parse_qsl(body.decode('utf-8'), keep_blank_values=True))
+        return parameters
+
+    def do_POST(self):
+        gateway = self.server.gateway
+        gateway.count('requests')
+        parameters = self._read_parameters()
+        faults = gateway.faults
+        delay = faults.latency + (faults.random.uniform(0, faults.latency_jitter) if faults.latency_jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if urllib.parse.urlsplit(self.path).path != base.N_REST:
+            self._send(404, b'<html><body>Not Found</body></html>', 'text/html')
+            return
+        if faults.chance(faults.http_error_rate):
+            gateway.count('injected_http_error')
+            self._send(503, b'<html><body>Service Temporarily Unavailable</body></html>', 'text/html')
+            return
+        request_id = uuid.uuid4().hex[:13]
+        try:
+            response = gateway.call(parameters)
+            response[next(iter(response))]['request_id'] = request_id
+        except GatewayError as e:
+            gateway.count('error_%s' % e.code)
+            response = e.to_response(request_id)
+        self._send(200, json.dumps(response, ensure_ascii=False).encode('utf-8'), 'text/javascript;charset=UTF-8')
+
+    do_GET = do_POST
+
+    def _send(self, status, body, content_type):
+        gzipped = 'gzip' in self.headers.get('Accept-Encoding', '') and len(body) > 256
+        if gzipped:
+            body = gzip.compress(body, 6)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Application-Host', '%s:%s' % (self.server.gateway.host, self.server.gateway.port))
+        self.send_header('Location-Host', 'stub-%d' % os.getpid())
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--app', action='append', default=[], metavar='KEY:SECRET',
+                        help='accepted app key and secret, test:test by default')
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--max-skus', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--max-qps', type=float, default=None)
+    parser.add_argument('--hsf-rate', type=float, default=0.0)
+    parser.add_argument('--http-error-rate', type=float, default=0.0)
+    parser.add_argument('--clock-offset', type=float, default=0.0)
+    args = parser.parse_args()
+
+    apps = dict(app.split(':', 1) for app in args.app) or None
+    catalog = Catalog(args.products, args.max_skus, args.seed)
+    faults = Faults(args.latency, args.latency_jitter, args.error_rate, args.throttle_rate, args.max_qps,
+                    args.hsf_rate, args.http_error_rate, args.clock_offset, args.seed)
+    gateway = Gateway(catalog, faults, apps, args.host, args.port)
+    print('TOP gateway stub on http://%s:%d%s: %d products, %d SKUs'
+          % (gateway.host, gateway.port, base.N_REST, len(catalog.products), catalog.sku_count()))
+    try:
+        gateway.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(dict(gateway.stats))
+        gateway.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite of the SDK and batching hot paths with stored baselines.
+
+Every case is timed at the requested scales (number of SKUs) and compared with
+benchmarks/baseline.json; a case slower than its baseline by more than the
+threshold is a regression and makes the suite exit with status 1.
+
+Cases:
+- sign (md5, hmac-sha256) and getApplicationParameters of a batch price
+  update of 20 products / 200 SKUs;
+- MultiPartForm.__str__ of a form with 20 fields and a 1 MB file;
+- top.api.codec.loads and LazyObject field access of a product list response
+  holding N SKUs;
+- AEProductBatchUpdater.create_data_batch and form_update_list over a
+  DataFrame of N SKUs (need pandas and the other update_ali_data.py
+  dependencies). create_data_batch filters the whole frame for every product,
+  so it grows quadratically; above --max-batch-scale it is skipped unless
+  --full is given.
+
+    python benchmarks/suite.py [--scales 1k,100k,1M] [--threshold 1.25] [--case sign] [--update-baseline]
+
+Timings are the best of --repeat runs, in seconds per operation. Baselines are
+only comparable on the machine (and Python) they were recorded on, which is
+stored next to them, so record them in an environment with all the project
+dependencies. A selected case that cannot run (missing dependencies) or has no
+baseline entry also makes the suite exit with status 1: the regression check
+must not pass by not checking. Use --case to run only some of the cases.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import top.api  # noqa: E402
+from top.api import base, codec  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SCALES = {'1k': 1000, '100k': 100000, '1M': 1000000}
+SKUS_PER_PRODUCT = 10
+
+
+class Skip(Exception):
+    """Raised by a case setup that cannot run here; the message says why."""
+
+
+def parse_scale(text):
+    if text in SCALES:
+        return SCALES[text]
+    return int(text)
+
+
+def scale_name(scale):
+    for name, value in SCALES.items():
+        if value == scale:
+            return name
+    return str(scale)
+
+
+# --- data ---
+
+def build_update_list(products, skus_per_product, field='price'):
+    return [
+        {'product_id': 1005000000000 + product,
+         'multiple_sku_update_list': [{'sku_code': 'SKU-%d-%d' % (product, sku), field: '%d.99' % sku}
+                                      for sku in range(skus_per_product)]}
+        for product in range(products)
+    ]
+
+
+def build_batch_request():
+    request = top.api.AliexpressSolutionBatchProductPriceUpdateRequest()
+    request.mutiple_product_update_list = build_update_list(20, 10)
+    return request
+
+
+def build_list_response(skus):
+    products = max(1, skus // SKUS_PER_PRODUCT)
+    items = [{'product_id': 1005000000000 + product, 'subject': 'Product %d' % product,
+              'gmt_modified': '2026-10-18 12:00:00', 'product_status_type': 'onSelling',
+              'aeop_ae_product_s_k_us': {'global_aeop_ae_product_sku': [
+                  {'sku_code': 'SKU-%d-%d' % (product, sku), 'sku_price': '%d.99' % sku, 'ipm_sku_stock': sku}
+                  for sku in range(SKUS_PER_PRODUCT)]}}
+             for product in range(products)]
+    return json.dumps({'aliexpress_solution_product_list_get_response': {'result': {
+        'success': True, 'product_count': products, 'current_page': 1,
+        'aeop_a_e_product_display_d_t_o_list': {'item_display_dto': items}}}}).encode('utf-8')
+
+
+def import_updater():
+    try:
+        import update_ali_data
+    except ImportError as e:
+        raise Skip('update_ali_data.py dependencies are missing: %s' % e)
+    return update_ali_data
+
+
+def build_frame(skus):
+    update_ali_data = import_updater()
+    pd = update_ali_data.pd
+    products = max(1, skus // SKUS_PER_PRODUCT)
+    return update_ali_data.AEProductBatchUpdater, pd.DataFrame({
+        'product_id': [1005000000000 + product for product in range(products) for _ in range(SKUS_PER_PRODUCT)],
+        'SKU': ['SKU-%d-%d' % (product, sku) for product in range(products) for sku in range(SKUS_PER_PRODUCT)],
+        'price': ['%d.99' % sku for _ in range(products) for sku in range(SKUS_PER_PRODUCT)],
+        'inventory': [sku for _ in range(products) for sku in range(SKUS_PER_PRODUCT)],
+    })
+
+
+# --- cases: setup(scale) returns the function to time ---
+
+def case_sign_md5(scale):
+    request = build_batch_request()
+    parameters = request.getApplicationParameters()
+    sys_parameters = {base.P_FORMAT: 'json', base.P_APPKEY: '12345678', base.P_SIGN_METHOD: 'md5',
+                      base.P_VERSION: '2.0', base.P_TIMESTAMP: '1760000000000',
+                      base.P_PARTNER_ID: base.SYSTEM_GENERATE_VERSION, base.P_API: request.getapiname(),
+                      base.P_SESSION: 'session-token'}
+    return lambda: base.sign('secret', sys_parameters, base.SIGN_METHOD_MD5, parameters)
+
+
+def case_sign_hmac_sha256(scale):
+    request = build_batch_request()
+    parameters = request.getApplicationParameters()
+    sys_parameters = {base.P_FORMAT: 'json', base.P_APPKEY: '12345678', base.P_SIGN_METHOD: 'hmac-sha256',
+                      base.P_VERSION: '2.0', base.P_TIMESTAMP: '1760000000000',
+                      base.P_PARTNER_ID: base.SYSTEM_GENERATE_VERSION, base.P_API: request.getapiname(),
+                      base.P_SESSION: 'session-token'}
+    return lambda: base.sign('secret', sys_parameters, base.SIGN_METHOD_HMAC_SHA256, parameters)
+
+
+def case_application_parameters(scale):
+    return build_batch_request().getApplicationParameters
+
+
+def case_multipart_str(scale):
+    form = base.MultiPartForm()
+    for index in range(20):
+        form.add_field('field_%d' % index, 'value %d' % index)
+    form.add_file('image', 'image.jpg', os.urandom(1024 * 1024))
+    return form.__str__
+
+
+def case_json_loads(scale):
+    data = build_list_response(scale)
+    return lambda: codec.loads(data)
+
+
+def case_lazy_field(scale):
+    data = build_list_response(scale)
+    return lambda: codec.LazyObject(data)['aliexpress_solution_product_list_get_response']['result']['product_count']
+
+
+def case_create_data_batch(scale):
+    updater_class, frame = build_frame(scale)
+    return lambda: updater_class.create_data_batch(frame)
+
+
+def case_form_update_list(scale):
+    updater_class, frame = build_frame(scale)
+    return lambda: updater_class.form_update_list(frame, 'price')
+
+
+# name -> (setup, uses scale, quadratic)
+CASES = {
+    'sign.md5': (case_sign_md5, False, False),
+    'sign.hmac-sha256': (case_sign_hmac_sha256, False, False),
+    'getApplicationParameters': (case_application_parameters, False, False),
+    'MultiPartForm.__str__': (case_multipart_str, False, False),
+    'codec.loads': (case_json_loads, True, False),
+    'LazyObject.field': (case_lazy_field, True, False),
+    'create_data_batch': (case_create_data_batch, True, True),
+    'form_update_list': (case_form_update_list, True, True),
+}
+
+
+def measure(function, repeat, min_time):
+    """Best time of `repeat` runs, seconds per call; fast functions are looped for at least min_time."""
+    timer = timeit.Timer(function)
+    number = 1
+    started = time.perf_counter()
+    function()
+    if time.perf_counter() - started < min_time:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def load_baseline(path):
+    if not os.path.isfile(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', default='1k,100k,1M', help='comma separated SKU counts: 1k, 100k, 1M or numbers')
+    parser.add_argument('--case', action='append', default=[], help='run only cases starting with this name')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds a timed loop should take at least')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='slowdown against the baseline that counts as a regression')
+    parser.add_argument('--max-batch-scale', default='100k', help='largest scale of the quadratic batching cases')
+    parser.add_argument('--full', action='store_true', help='run the quadratic batching cases at every scale')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help='store the timings as the new baseline')
+    args = parser.parse_args()
+
+    scales = [parse_scale(text.strip()) for text in args.scales.split(',') if text.strip()]
+    max_batch_scale = parse_scale(args.max_batch_scale)
+    baseline = load_baseline(args.baseline)
+    results = dict(baseline.get('results', {}))
+    regressions = []
+    missing = []
+
+    print('%-28s %6s %14s %14s %7s' % ('case', 'scale', 'sec/op', 'baseline', 'ratio'))
+    for name, (setup, scaled, quadratic) in CASES.items():
+        if args.case and not any(name.startswith(prefix) for prefix in args.case):
+            continue
+        for scale in (scales if scaled else [None]):
+            key = '%s@%s' % (name, scale_name(scale)) if scaled else name
+            if quadratic and scale > max_batch_scale and not args.full:
+                print('%-28s %6s skipped: quadratic, use --full' % (name, scale_name(scale)))
+                continue
+            try:
+                function = setup(scale)
+            except Skip as e:
+                print('%-28s %6s FAILED: %s' % (name, scale_name(scale) if scaled else '-', e))
+                missing.append('%s (%s)' % (name, e))
+                break
+            seconds = measure(function, args.repeat if not scaled or scale < 1000000 else 1, args.min_time)
+            reference = baseline.get('results', {}).get(key)
+            ratio = seconds / reference if reference else None
+            status = ''
+            if ratio is not None and ratio > args.threshold:
+                status = 'REGRESSION'
+                regressions.append(key)
+            elif reference is None and not args.update_baseline:
+                status = 'NO BASELINE'
+                missing.append('%s (no baseline)' % key)
+            print('%-28s %6s %14.9f %14s %7s %s' % (name, scale_name(scale) if scaled else '-', seconds,
+                                                  '%.9f' % reference if reference else '-',
+                                                  '%.2f' % ratio if ratio else '-', status))
+            results[key] = seconds
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as handle:
+            json.dump({'machine': {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+                                   'platform': platform.platform(), 'processor': platform.machine()},
+                       'json_decoder': codec.get_json_decoder()[0],
+                       'results': results}, handle, indent=2, sort_keys=True)
+            handle.write('\n')
+        print('baseline written to %s' % args.baseline)
+    if regressions:
+        print('regressions over x%.2f: %s' % (args.threshold, ', '.join(regressions)))
+    if missing:
+        print('not checked: %s' % ', '.join(missing))
+    return 1 if regressions or missing else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
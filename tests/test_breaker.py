@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+import unittest
+
+import top
+from top.api.aio import AsyncClient
+from top.api.breaker import STATE_HALF_OPEN, CircuitBreaker
+from top.api.client import Client
+from top.api.errors import ERROR_TRANSPORT, CircuitOpenError
+from top.api.rest import TimeGetRequest
+
+DOMAIN = '127.0.0.1'
+METHOD = 'taobao.time.get'
+
+
+class FailingLimiter(object):
+    """Limiter whose reservation fails, e.g. a FileBackend on an unreadable file."""
+
+    def reserve(self, app_key, method):
+        raise OSError('rate limit state is not available')
+
+    def acquire(self, app_key, method):
+        return self.reserve(app_key, method)
+
+
+class SlowLimiter(object):
+    """Limiter that makes every call wait for a minute."""
+
+    backend = None
+
+    def reserve(self, app_key, method):
+        return 60.0
+
+
+def half_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01)
+    breaker.record(DOMAIN, METHOD, ERROR_TRANSPORT)
+    time.sleep(0.02)
+    return breaker
+
+
+class HalfOpenTrialTest(unittest.TestCase):
+
+    def test_release_gives_back_the_trial_slot(self):
+        breaker = half_open_breaker()
+        self.assertTrue(breaker.before_call(DOMAIN, METHOD))
+        self.assertEqual(breaker.get_state(DOMAIN, METHOD), STATE_HALF_OPEN)
+        self.assertRaises(CircuitOpenError, breaker.before_call, DOMAIN, METHOD)
+        breaker.release(DOMAIN, METHOD)
+        self.assertTrue(breaker.before_call(DOMAIN, METHOD))
+
+    def test_closed_circuit_takes_no_trial_slot(self):
+        self.assertFalse(CircuitBreaker().before_call(DOMAIN, METHOD))
+
+    def test_limiter_error_during_trial_does_not_block_the_circuit(self):
+        breaker = half_open_breaker()
+        client = Client(top.appinfo('test', 'test'), DOMAIN, 1, limiter=FailingLimiter(), breaker=breaker)
+        for _ in range(3):
+            # Without the release the second call would get CircuitOpenError
+            self.assertRaises(OSError, client.execute, TimeGetRequest())
+        self.assertEqual(breaker.get_state(DOMAIN, METHOD), STATE_HALF_OPEN)
+        self.assertEqual(breaker.stats['rejected'], 0)
+
+    def test_cancelled_async_trial_does_not_block_the_circuit(self):
+        breaker = half_open_breaker()
+
+        async def run():
+            client = AsyncClient(appinfo=top.appinfo('test', 'test'), breaker=breaker, limiter=SlowLimiter())
+            for _ in range(3):
+                # The trial call waits for the limiter and is cancelled by the timeout
+                with self.assertRaises(asyncio.TimeoutError):
+                    await asyncio.wait_for(client.execute(TimeGetRequest(DOMAIN, 1)), 0.01)
+            await client.close()
+
+        asyncio.run(run())
+        self.assertEqual(breaker.stats['rejected'], 0)
+        self.assertTrue(breaker.before_call(DOMAIN, METHOD))
+
+if __name__ == '__main__':
+    unittest.main()
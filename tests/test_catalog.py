@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import update_ali_data  # noqa: E402
+from gateway import Catalog, Gateway  # noqa: E402
+
+MODIFIED = '2026-10-18 12:00:00'
+
+
+def write_legacy_files(directory, product_skus):
+    """ids_info.csv and product_info.csv as written before the catalog existed."""
+    with open(os.path.join(directory, 'ids_info.csv'), 'w', newline='', encoding='utf_8_sig') as ids_file:
+        writer = csv.writer(ids_file, delimiter=';')
+        writer.writerow(['product_id'])
+        writer.writerows([product_id] for product_id in product_skus)
+    with open(os.path.join(directory, 'product_info.csv'), 'w') as info_file:
+        json.dump({str(product_id): skus for product_id, skus in product_skus.items()}, info_file)
+
+
+class LegacyImportThenSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.catalog = update_ali_data.AECatalogStore(os.path.join(self.directory, 'catalog.sqlite3'))
+        self.addCleanup(self.catalog.close)
+        write_legacy_files(self.directory, {1: ['A-1', 'A-2'], 2: ['B-1']})
+        self.assertTrue(self.catalog.import_legacy_files(os.path.join(self.directory, 'ids_info.csv'),
+                                                         os.path.join(self.directory, 'product_info.csv')))
+
+    def listing(self, *product_ids, gmt_modified=MODIFIED):
+        return [{'product_id': product_id, 'status': 'onSelling', 'gmt_modified': gmt_modified}
+                for product_id in product_ids]
+
+    def test_first_sync_keeps_imported_skus(self):
+        # Imported products have no gmt_modified yet: the first sync only fills it in
+        self.assertEqual(self.catalog.merge_products(self.listing(1, 2, 3)), [3])
+        self.assertEqual(self.catalog.get_skus(1), ['A-1', 'A-2'])
+        self.assertEqual(self.catalog.get_skus(2), ['B-1'])
+        self.assertEqual(self.catalog.get_products_without_skus(), [3])
+        self.assertEqual(self.catalog.get_product(1)['gmt_modified'], MODIFIED)
+
+    def test_changed_product_is_fetched_again(self):
+        self.catalog.merge_products(self.listing(1, 2))
+        changed = self.catalog.merge_products(self.listing(1) + self.listing(2, gmt_modified='2026-10-19 08:00:00'))
+        self.assertEqual(changed, [2])
+        self.assertEqual(self.catalog.get_skus(1), ['A-1', 'A-2'])
+        self.assertEqual(self.catalog.get_products_without_skus(), [2])
+
+
+class CollectorFirstSyncTest(unittest.TestCase):
+    """Legacy files of a seller, then the first (full) product list sync against the stand-in gateway."""
+
+    def setUp(self):
+        self.gateway = Gateway(catalog=Catalog(products=30)).start()
+        self.addCleanup(self.gateway.stop)
+        directory = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        os.chdir(directory)
+        self.addCleanup(os.chdir, cwd)
+        # The class keeps the identifiers in a class attribute
+        self.addCleanup(setattr, update_ali_data.AEGeneralProductUpdater, 'result_list_ali_ids', [])
+        update_ali_data.AEGeneralProductUpdater.result_list_ali_ids = []
+        self.product_skus = {product_id: list(product['skus'])
+                             for product_id, product in self.gateway.catalog.products.items()}
+        write_legacy_files(directory, self.product_skus)
+        self.config = {
+            'AE_APPKEY': 'test', 'AE_APPSECRET': 'test', 'AE_OAUTH_TOKEN': 'test',
+            'AE_DOMAIN': self.gateway.host, 'AE_PORT': self.gateway.port, 'AE_RATE_LIMIT': '1000',
+            'LOG_FOLDER': 'logs', 'WRITE_LOG_MESSAGE_TO_FILE': '0', 'SEND_LOG_MESSAGE_TO_SERVER': '0',
+            'PRINT_LOG_MESSAGE_TO_CONSOLE': '0',
+        }
+
+    def test_first_sync_does_not_refetch_imported_products(self):
+        collector = update_ali_data.AEGeneralProductUpdater(self.config)
+        self.addCleanup(collector.catalog.close)
+        collector.sync_product_list()
+        self.assertEqual(sorted(collector.result_list_ali_ids), sorted(self.product_skus))
+        self.assertEqual(collector.catalog.get_products_without_skus(), [])
+        self.assertEqual(collector.catalog.get_product_skus(),
+                         {str(product_id): skus for product_id, skus in self.product_skus.items()})
+        self.assertIsNotNone(collector.catalog.get_state(collector.product_list_watermark))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import gzip
+import threading
+import unittest
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from top.api.aio import AsyncConnectionPool
+from top.api.pool import ConnectionPool
+
+# Large enough to be read in several chunks
+BODY = b''.join(b'{"product_id": %d, "sku_code": "SKU-%d", "price": "%d.99"}\n' % (i, i, i) for i in range(20000))
+
+
+def raw_deflate(data):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+# path -> (Content-Encoding, encoded body)
+ENCODINGS = {
+    'gzip': ('gzip', gzip.compress(BODY)),
+    'deflate': ('deflate', zlib.compress(BODY)),
+    'raw-deflate': ('deflate', raw_deflate(BODY)),
+    'identity': (None, BODY),
+}
+
+
+class CompressingHandler(BaseHTTPRequestHandler):
+    """Answers /<encoding> or /<encoding>/chunked with BODY compressed that way."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        parts = self.path.strip('/').split('/')
+        encoding, data = ENCODINGS[parts[0]]
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if parts[1:] == ['chunked']:
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for start in range(0, len(data), 4096):
+                chunk = data[start:start + 4096]
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+        else:
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CompressedResponseTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), CompressingHandler)
+        cls.server.daemon_threads = True
+        cls.port = cls.server.server_address[1]
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def paths(self):
+        for name in ENCODINGS:
+            for suffix in ('', '/chunked'):
+                yield name, '/' + name + suffix
+
+    def test_connection_pool(self):
+        pool = ConnectionPool()
+        for name, path in self.paths():
+            with self.subTest(path=path):
+                response, data = pool.urlopen('127.0.0.1', self.port, 'POST', path, body='x=1')
+                self.assertEqual(response.status, 200)
+                self.assertEqual(data, BODY)
+                self.assertEqual(response.wire_size, len(ENCODINGS[name][1]))
+        # Every response was read to the end, so the one connection was kept alive throughout
+        self.assertEqual(pool.get_stats()['connections_created'], 1)
+        pool.clear()
+
+    def test_async_connection_pool(self):
+
+        async def run():
+            pool = AsyncConnectionPool()
+            for name, path in self.paths():
+                with self.subTest(path=path):
+                    response, data = await pool.urlopen('127.0.0.1', self.port, 'POST', path, body='x=1')
+                    self.assertEqual(response.status, 200)
+                    self.assertEqual(data, BODY)
+                    self.assertEqual(response.wire_size, len(ENCODINGS[name][1]))
+            self.assertEqual(pool.stats['connections_created'], 1)
+            await pool.close()
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import update_ali_data  # noqa: E402
+from gateway import Catalog, Gateway  # noqa: E402
+from top.api.errors import ERROR_TRANSPORT  # noqa: E402
+
+QUEUE = 'product_info'
+
+
+class WorkQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = update_ali_data.AEWorkQueue(os.path.join(tempfile.mkdtemp(), 'queue.sqlite3'),
+                                                 max_attempts=2, backoff=0)
+        self.addCleanup(self.queue.close)
+        self.queue.add(QUEUE, [1, 2])
+
+    def test_defer_does_not_use_an_attempt(self):
+        for _ in range(5):
+            self.queue.defer(QUEUE, 1, 0)
+        self.assertEqual(self.queue.get_counts(QUEUE), {'pending': 2})
+        self.assertFalse(self.queue.fail(QUEUE, 1))
+        self.assertTrue(self.queue.fail(QUEUE, 1))
+
+    def test_deferred_item_is_not_due_until_its_time(self):
+        self.queue.defer(QUEUE, 1, time.time() + 60)
+        self.assertEqual(self.queue.take_due(QUEUE), ['2'])
+        self.queue.complete(QUEUE, 2, [])
+        self.assertGreater(self.queue.next_attempt_at(QUEUE), time.time())
+
+
+class OpenCircuitTest(unittest.TestCase):
+    """Products that are not sent while the circuit of product.info.get is open keep their attempts."""
+
+    def setUp(self):
+        gateway = Gateway(catalog=Catalog(products=5)).start()
+        self.addCleanup(gateway.stop)
+        directory = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        os.chdir(directory)
+        self.addCleanup(os.chdir, cwd)
+        self.addCleanup(setattr, update_ali_data.AEGeneralProductUpdater, 'result_list_ali_ids', [])
+        update_ali_data.AEGeneralProductUpdater.result_list_ali_ids = []
+        self.collector = update_ali_data.AEGeneralProductUpdater({
+            'AE_APPKEY': 'test', 'AE_APPSECRET': 'test', 'AE_OAUTH_TOKEN': 'test',
+            'AE_DOMAIN': gateway.host, 'AE_PORT': gateway.port, 'AE_RATE_LIMIT': '1000',
+            'AE_QUEUE_MAX_ATTEMPTS': '1', 'AE_BREAKER_FAILURES': '1', 'AE_BREAKER_RECOVERY': '60',
+            'LOG_FOLDER': 'logs', 'WRITE_LOG_MESSAGE_TO_FILE': '0', 'SEND_LOG_MESSAGE_TO_SERVER': '0',
+            'PRINT_LOG_MESSAGE_TO_CONSOLE': '0',
+        })
+        self.addCleanup(self.collector.catalog.close)
+        self.addCleanup(self.collector.work_queue.close)
+        self.collector.sync_product_list()
+
+    def test_skipped_products_are_deferred_not_dead_lettered(self):
+        breaker = self.collector.client.breaker
+        breaker.record(self.collector.config['AE_DOMAIN'], 'aliexpress.solution.product.info.get', ERROR_TRANSPORT)
+        queue = self.collector.work_queue
+        self.assertEqual(self.collector.get_products_info_ali(), 5)
+        self.assertEqual(queue.get_dead(self.collector.product_info_queue), [])
+        self.assertEqual(queue.get_counts(self.collector.product_info_queue), {'pending': 5})
+        # Deferred until the circuit allows a trial call
+        self.assertGreater(queue.next_attempt_at(self.collector.product_info_queue), time.time() + 50)
+        self.assertEqual(self.collector.get_products_info_ali(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,2 +1,29 @@
-from top.api.rest import *
-from top.api.base import FileItem
\ No newline at end of file
+from top.api import rest
+from top.api.base import FileItem
+from top.api.pool import ConnectionPool, get_default_pool, set_default_pool
+from top.api.ratelimit import FileBackend, MemoryBackend, RateLimiter, get_default_limiter, set_default_limiter
+from top.api.client import Client
+from top.api.clock import ServerClock, get_default_clock, set_default_clock
+from top.api.hooks import AttemptStats, ClientHook
+from top.api.retry import RetryBudget, RetryPolicy, RetryRule
+from top.api.breaker import CircuitBreaker, CircuitOpenError
+from top.api.cache import REFERENCE_API_TTLS, ResponseCache
+from top.api.throttle import AdaptiveThrottle
+from top.api.metrics import MetricsHook, MetricsRegistry, get_default_registry, set_default_registry, \
+    start_http_server
+from top.api.timing import RequestTiming, TimingLogger, get_timing_hooks, set_timing_hooks
+from top.api.codec import LazyObject, set_json_decoder
+
+
+def __getattr__(name):
+    # Request classes (top.api.AliexpressSolutionProductListGetRequest etc.) are loaded lazily by top.api.rest
+    try:
+        request_class = getattr(rest, name)
+    except AttributeError:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name)) from None
+    globals()[name] = request_class
+    return request_class
+
+
+def __dir__():
+    return sorted(set(globals()) | set(rest.__all__))
\ No newline at end of file
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+Asyncio client for the TOP REST gateway.
+
+AsyncClient runs any RestApi request as a coroutine. Signing and parameter
+extraction are shared with RestApi.getResponse, only the transport differs:
+requests go over pooled keep-alive asyncio streams and the number of calls in
+flight is limited by a semaphore. A call waits for the rate limiter before it
+takes the semaphore, so waiting calls do not hold up the ones that may go.
+
+    async with AsyncClient(concurrency=20) as client:
+        response = await client.execute(request, session)
+"""
+
+import asyncio
+import collections
+import ssl
+import time
+
+from top.api.cache import CachedResponse, make_key
+from top.api.errors import classify_exception, classify_response
+from top.api.pool import READ_CHUNK_SIZE, SCHEME_HTTPS, ContentDecoder, get_scheme
+from top.api.ratelimit import get_default_limiter
+from top.api.retry import as_retry_policy
+
+
+class AsyncResponse(object):
+    """Status line and headers of a response, with the same getheader() as http.client."""
+
+    def __init__(self, status, reason, headers):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name.lower(), default)
+
+
+class AsyncConnectionPool(object):
+    """Pool of idle asyncio stream connections keyed by (domain, port, scheme).
+
+    maxsize - maximum number of idle connections kept for one key;
+    idle_timeout - seconds after which an idle connection is closed instead of reused.
+    The pool must only be used from the event loop it was first used in.
+    """
+
+    def __init__(self, maxsize=10, idle_timeout=60, ssl_context=None):
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.ssl_context = ssl_context
+        self._idle = {}
+        self.stats = collections.Counter()
+
+    def _get(self, key):
+        now = time.monotonic()
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer, released_at = idle.pop()
+            if now - released_at <= self.idle_timeout and not reader.at_eof() and not writer.is_closing():
+                self.stats['connections_reused'] += 1
+                return reader, writer
+            self.stats['connections_evicted'] += 1
+            writer.close()
+        return None
+
+    def _put(self, key, reader, writer):
+        idle = self._idle.setdefault(key, collections.deque())
+        if len(idle) >= self.maxsize:
+            writer.close()
+            return
+        idle.append((reader, writer, time.monotonic()))
+
+    async def _connect(self, key):
+        domain, port, scheme = key
+        context = None
+        if scheme == SCHEME_HTTPS:
+            if self.ssl_context is None:
+                self.ssl_context = ssl.create_default_context()
+            context = self.ssl_context
+        self.stats['connections_created'] += 1
+        return await asyncio.open_connection(domain, port, ssl=context)
+
+    async def close(self):
+        """Close all idle connections."""
+        for idle in self._idle.values():
+            for _, writer, _ in idle:
+                writer.close()
+        self._idle = {}
+
+    async def urlopen(self, domain, port, method, url, body=None, headers=None, timeout=30):
+        """Send a request over a pooled connection and return (response, data).
+
+        The body is decompressed while it is read if the server used gzip or
+        deflate; response.wire_size holds the number of bytes actually received.
+
+        If a reused connection turns out to be closed by the server, the request
+        is sent once more over a new connection.
+        """
+        key = (domain, int(port), get_scheme(port))
+        connection = self._get(key)
+        reused = connection is not None
+        while True:
+            if connection is None:
+                connection = await asyncio.wait_for(self._connect(key), timeout)
+            reader, writer = connection
+            try:
+                response, data, keep_alive = await asyncio.wait_for(
+                    self._exchange(reader, writer, key, method, url, body, headers or {}), timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if not reused:
+                    raise
+                self.stats['reconnects'] += 1
+                connection, reused = None, False
+                continue
+            except BaseException:
+                writer.close()
+                raise
+            self.stats['requests'] += 1
+            self.stats['response_bytes_wire'] += response.wire_size
+            self.stats['response_bytes_decoded'] += len(data)
+            if keep_alive:
+                self._put(key, reader, writer)
+            else:
+                writer.close()
+            return response, data
+
+    @staticmethod
+    async def _exchange(reader, writer, key, method, url, body, headers):
+        domain, port, scheme = key
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        body = body or b''
+        if isinstance(body, (bytes, bytearray)):
+            content_length = len(body)
+            chunks = (body,)
+        else:
+            # Streamed body such as MultiPartForm: its length is already in the headers
+            content_length = int({name.lower(): value for name, value in headers.items()}['content-length'])
+            chunks = body
+        lines = ['%s %s HTTP/1.1' % (method, url), 'Host: %s:%s' % (domain, port),
+                 'Content-Length: %d' % content_length]
+        lines.extend('%s: %s' % (name, value) for name, value in headers.items()
+                     if name.lower() not in ('host', 'content-length'))
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        for chunk in chunks:
+            writer.write(chunk)
+            await writer.drain()
+
+        status_line = await reader.readuntil(b'\r\n')
+        version, status, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+        response_headers = {}
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+        response = AsyncResponse(int(status), reason, response_headers)
+
+        decoder = ContentDecoder(response_headers.get('content-encoding'))
+        chunks = []
+        wire_size = 0
+        keep_alive = True
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+                if size == 0:
+                    # Trailer section ends with an empty line
+                    while await reader.readuntil(b'\r\n') != b'\r\n':
+                        pass
+                    break
+                chunk = await reader.readexactly(size)
+                await reader.readexactly(2)
+                wire_size += size
+                chunks.append(decoder.decompress(chunk))
+        elif 'content-length' in response_headers:
+            left = int(response_headers['content-length'])
+            while left > 0:
+                chunk = await reader.readexactly(min(left, READ_CHUNK_SIZE))
+                left -= len(chunk)
+                wire_size += len(chunk)
+                chunks.append(decoder.decompress(chunk))
+        else:
+            # Body ends when the server closes the connection
+            keep_alive = False
+            while True:
+                chunk = await reader.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                wire_size += len(chunk)
+                chunks.append(decoder.decompress(chunk))
+        chunks.append(decoder.flush())
+        response.wire_size = wire_size
+
+        connection_header = response_headers.get('connection', '').lower()
+        if connection_header == 'close' or (version == 'HTTP/1.0' and connection_header != 'keep-alive'):
+            keep_alive = False
+        return response, b''.join(chunks), keep_alive
+
+
+class AsyncClient(object):
+    """Runs RestApi requests as awaitable calls.
+
+    concurrency - maximum number of requests in flight at the same time;
+    pool - AsyncConnectionPool, a new one is created when omitted;
+    timeout - seconds allowed for one request including connect;
+    appinfo - top.appinfo used to sign requests instead of the one set on each request;
+    sign_method - md5, hmac or hmac-sha256 instead of the one set on each request;
+    lazy_response - return top.api.codec.LazyObject views instead of fully decoded dicts;
+    limiter - top.api.ratelimit.RateLimiter, the default limiter when omitted;
+    retry - top.api.retry.RetryPolicy, or the number of extra attempts after a transport error;
+    breaker - top.api.breaker.CircuitBreaker that refuses calls to failing endpoints, None to disable;
+    cache - top.api.cache.ResponseCache for read-only APIs, None to disable.
+    """
+
+    def __init__(self, concurrency=10, pool=None, timeout=30, appinfo=None, sign_method=None,
+                 lazy_response=False, limiter=None, retry=0, breaker=None, cache=None):
+        self.appinfo = appinfo
+        self.cache = cache
+        self.limiter = limiter
+        self.breaker = breaker
+        self.retry = as_retry_policy(retry)
+        self.sign_method = sign_method
+        self.lazy_response = lazy_response
+        self.concurrency = concurrency
+        self.pool = pool if pool is not None else AsyncConnectionPool(maxsize=concurrency)
+        self.timeout = timeout
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        await self.pool.close()
+
+    async def execute(self, request, session=None, timeout=None):
+        """Sign and send one request. Returns the decoded response like getResponse()."""
+        if self._semaphore is None:
+            # Created on first use so that it belongs to the running event loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        domain = request._get_endpoint()[0]
+        method = request.getapiname()
+        cache_key = None
+        if self.cache is not None and self.cache.is_cached(method):
+            app_key = self.appinfo.appkey if self.appinfo is not None else request._get_app_key()
+            cache_key = make_key(request, app_key, session)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return request._parse_response(CachedResponse(), cached, self.lazy_response)
+        state = self.retry.start()
+        while True:
+            trial = self.breaker is not None and self.breaker.before_call(domain, method)
+            response, error = None, None
+            try:
+                await self._wait_for_limiter(request)
+                try:
+                    response, data = await self._send(request, session, timeout)
+                    outcome = classify_response(response)
+                except Exception as e:
+                    error = e
+                    outcome = classify_exception(e)
+            except BaseException:
+                # Cancelled or interrupted without an outcome: the half-open trial slot is given back
+                if trial:
+                    self.breaker.release(domain, method)
+                raise
+            if cache_key is not None and outcome is None:
+                self.cache.put(cache_key, method, data)
+            if self.breaker is not None:
+                self.breaker.record(domain, method, outcome)
+            delay = state.next_delay(outcome)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            # The semaphore is not held while waiting for the next attempt
+            await asyncio.sleep(delay)
+
+    async def _wait_for_limiter(self, request):
+        limiter = self.limiter if self.limiter is not None else get_default_limiter()
+        if limiter is None:
+            return
+        app_key = self.appinfo.appkey if self.appinfo is not None else request._get_app_key()
+        if getattr(limiter.backend, 'blocking', False):
+            # A file backend locks and rewrites its file: that must not stall the event loop
+            wait = await asyncio.get_running_loop().run_in_executor(None, limiter.reserve, app_key,
+                                                                    request.getapiname())
+        else:
+            wait = limiter.reserve(app_key, request.getapiname())
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _send(self, request, session, timeout):
+        domain, port, method = request._get_endpoint()
+        async with self._semaphore:
+            # Signed after the limiter wait so that the timestamp is fresh
+            url, body, header = request._prepare_request(session, self.appinfo, self.sign_method)
+            response, data = await self.pool.urlopen(domain, port, method, url, body=body, headers=header,
+                                                     timeout=timeout or self.timeout)
+        return request._parse_response(response, data, self.lazy_response), data
+
+    async def execute_many(self, requests, session=None, return_exceptions=False):
+        """Run several requests concurrently, results are returned in the order of requests."""
+        return await asyncio.gather(*(self.execute(request, session) for request in requests),
+                                    return_exceptions=return_exceptions)
@@ -5,19 +5,24 @@ Created on 2012-7-3
 @author: lihao
 """
 
-try:
-    import httplib
-except ImportError:
-    import http.client as httplib
 import urllib.parse
 import urllib.request
 import urllib.response
 import time
 import hashlib
-import json
+import hmac
 import top
-import itertools
+import io
 import mimetypes
+import mmap
+import os
+import uuid
+from top.api import codec
+from top.api.clock import get_default_clock
+from top.api.codec import STRUCTURED_TYPES, LazyObject, encode_json
+from top.api.pool import get_default_pool
+from top.api.ratelimit import get_default_limiter
+from top.api.timing import RequestTiming, body_size, get_timing_hooks
 
 '''
 定义一些系统变量
@@ -43,49 +48,112 @@ P_SUB_MSG = 'sub_msg'
 
 N_REST = '/router/rest'
 
+# Кэш таблиц полей запросов, см. RestApi._get_field_table
+_FIELD_TABLES = {}
 
-def sign(secret, parameters):
+
+SIGN_METHOD_MD5 = 'md5'
+SIGN_METHOD_HMAC = 'hmac'
+SIGN_METHOD_HMAC_SHA256 = 'hmac-sha256'
+SIGN_METHODS = (SIGN_METHOD_MD5, SIGN_METHOD_HMAC, SIGN_METHOD_HMAC_SHA256)
+
+# Системные параметры, значения которых не меняются между вызовами (кроме timestamp и sign).
+# Их закодированная форма "ключзначение" кэшируется в _SIGN_PAIR_CACHE.
+_CONSTANT_SIGN_KEYS = frozenset((P_FORMAT, P_APPKEY, P_SIGN_METHOD, P_VERSION, P_PARTNER_ID, P_API, P_SESSION))
+_SIGN_PAIR_CACHE = {}
+_SIGN_PAIR_CACHE_SIZE = 1024
+
+
+def _new_sign_hash(secret, sign_method):
+    if sign_method == SIGN_METHOD_MD5:
+        return hashlib.md5()
+    elif sign_method == SIGN_METHOD_HMAC:
+        return hmac.new(secret, digestmod=hashlib.md5)
+    elif sign_method == SIGN_METHOD_HMAC_SHA256:
+        return hmac.new(secret, digestmod=hashlib.sha256)
+    raise ValueError('unsupported sign_method: %r' % (sign_method,))
+
+
+def sign(secret, parameters, sign_method=SIGN_METHOD_MD5, application_parameters=None):
     # ===========================================================================
     # '''签名方法
     # @param secret: 签名需要的密钥
     # @param parameters: 支持字典和string两种
+    # @param sign_method: md5, hmac (HMAC-MD5) или hmac-sha256
+    # @param application_parameters: второй словарь параметров, перекрывает parameters.
     # '''
     # ===========================================================================
+    # Строка для подписи собирается сразу в bytes: постоянные системные пары берутся из кэша,
+    # значения типа bytes (уже закодированный JSON) подаются в хэш без повторного кодирования
+    secret = secret.encode('utf-8')
+    digest = _new_sign_hash(secret, sign_method)
+    pieces = []
+    append = pieces.append
+    if sign_method == SIGN_METHOD_MD5:
+        append(secret)
     # 如果parameters 是字典类的话
-    strparams = ""
     if hasattr(parameters, "items"):
-        keys = list(parameters.keys())
-        keys.sort()
-
-        strparams = "%s%s%s" % (secret,
-                                     str().join('%s%s' % (key, parameters[key]) for key in keys),
-                                     secret)
-    current_sign = hashlib.md5(strparams.encode('utf-8')).hexdigest().upper()
-    return current_sign
+        if application_parameters:
+            parameters = {**parameters, **application_parameters}
+        get_cached = _SIGN_PAIR_CACHE.get
+        for key in sorted(parameters):
+            value = parameters[key]
+            constant = key in _CONSTANT_SIGN_KEYS
+            piece = get_cached((key, value)) if constant else None
+            if piece is None:
+                if type(value) is bytes:
+                    piece = key.encode('utf-8') + value
+                else:
+                    piece = ('%s%s' % (key, value)).encode('utf-8')
+                if constant:
+                    if len(_SIGN_PAIR_CACHE) >= _SIGN_PAIR_CACHE_SIZE:
+                        _SIGN_PAIR_CACHE.clear()
+                    _SIGN_PAIR_CACHE[(key, value)] = piece
+            append(piece)
+    elif parameters:
+        append(str(parameters).encode('utf-8'))
+    if sign_method == SIGN_METHOD_MD5:
+        append(secret)
+    digest.update(b''.join(pieces))
+    return digest.hexdigest().upper()
 
 
 def mixStr(pstr):
+    # Всегда возвращает bytes: раньше bytes превращались в свое str()-представление и портили файлы
     if isinstance(pstr, bytes):
-        return str(pstr)
+        return pstr
     elif isinstance(pstr, str):
         return pstr.encode('utf-8')
     else:
-        return str(pstr)
+        return str(pstr).encode('utf-8')
 
 
 class FileItem(object):
+    # ===========================================================================
+    # Файл для загрузки через multipart-запрос
+    # @param content: bytes, memoryview, mmap или открытый в режиме 'rb' файл.
+    #                 Файл и mmap не читаются в память целиком, а отправляются частями.
+    # ===========================================================================
     def __init__(self, filename=None, content=None):
         self.filename = filename
         self.content = content
 
 
 class MultiPartForm(object):
-    """Accumulate the data to be used when posting a form."""
+    """Accumulate the data to be used when posting a form.
 
-    def __init__(self):
+    The body is built from bytes only. File contents are not read up front:
+    they are streamed in chunks from the file handle or buffer on every
+    iteration, so the form can be sent more than once (for example after a
+    reconnect) and a large upload runs in constant memory.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, boundary=None):
         self.form_fields = []
         self.files = []
-        self.boundary = "PYTHON_SDK_BOUNDARY"
+        self.boundary = boundary or 'PYTHON_SDK_' + uuid.uuid4().hex
         return
 
     def get_content_type(self):
@@ -93,56 +161,74 @@ class MultiPartForm(object):
 
     def add_field(self, name, value):
         """Add a simple field to the form data."""
-        self.form_fields.append((name, str(value)))
+        self.form_fields.append((mixStr(name), mixStr(value)))
         return
 
     def add_file(self, fieldname, filename, fileHandle, mimetype=None):
-        """Add a file to be uploaded."""
-        body = fileHandle.read()
+        """Add a file to be uploaded: bytes-like object, mmap or binary file handle."""
         if mimetype is None:
             mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
-        self.files.append((mixStr(fieldname), mixStr(filename), mixStr(mimetype), mixStr(body)))
+        if hasattr(fileHandle, 'read') and not isinstance(fileHandle, mmap.mmap):
+            start = fileHandle.tell()
+            try:
+                size = os.fstat(fileHandle.fileno()).st_size - start
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                size = fileHandle.seek(0, io.SEEK_END) - start
+                fileHandle.seek(start)
+            content = (fileHandle, start)
+        else:
+            content = memoryview(mixStr(fileHandle) if isinstance(fileHandle, str) else fileHandle).cast('B')
+            size = len(content)
+        self.files.append((mixStr(fieldname), mixStr(filename), mixStr(mimetype), content, size))
         return
 
+    def _iter_parts(self):
+        # Части тела по порядку: bytes для заголовков и полей, (handle, start) или memoryview для файлов
+        boundary = b'--' + self.boundary.encode('ascii')
+        for name, value in self.form_fields:
+            yield (boundary + b'\r\n'
+                   b'Content-Disposition: form-data; name="' + name + b'"\r\n'
+                   b'Content-Type: text/plain; charset=UTF-8\r\n'
+                   b'\r\n' + value + b'\r\n'), None
+        for field_name, filename, content_type, content, size in self.files:
+            yield (boundary + b'\r\n'
+                   b'Content-Disposition: file; name="' + field_name + b'"; filename="' + filename + b'"\r\n'
+                   b'Content-Type: ' + content_type + b'\r\n'
+                   b'Content-Transfer-Encoding: binary\r\n'
+                   b'\r\n'), None
+            yield content, size
+            yield b'\r\n', None
+        yield boundary + b'--\r\n', None
+
+    def get_content_length(self):
+        """Length of the encoded body in bytes, computed without reading any file."""
+        return sum(len(part) if size is None else size for part, size in self._iter_parts())
+
+    def __iter__(self):
+        """Yield the encoded body in chunks of at most chunk_size bytes for file contents."""
+        for part, size in self._iter_parts():
+            if size is None:
+                yield part
+            elif isinstance(part, memoryview):
+                for offset in range(0, size, self.chunk_size):
+                    yield part[offset:offset + self.chunk_size]
+            else:
+                handle, start = part
+                handle.seek(start)
+                left = size
+                while left > 0:
+                    chunk = handle.read(min(self.chunk_size, left))
+                    if not chunk:
+                        raise IOError('file %r was truncated while uploading' % getattr(handle, 'name', handle))
+                    left -= len(chunk)
+                    yield chunk
+
+    def __bytes__(self):
+        return b''.join(self)
+
     def __str__(self):
-        """Return a string representing the form data, including attached files."""
-        # Build a list of lists, each containing "lines" of the
-        # request.  Each part is separated by a boundary string.
-        # Once the list is built, return a string where each
-        # line is separated by '\r\n'.  
-        parts = []
-        part_boundary = '--' + self.boundary
-
-        # Add the form fields
-        parts.extend(
-            [part_boundary,
-             'Content-Disposition: form-data; name="%s"' % name,
-             'Content-Type: text/plain; charset=UTF-8',
-             '',
-             value,
-             ]
-            for name, value in self.form_fields
-        )
-
-        # Add the files to upload
-        parts.extend(
-            [part_boundary,
-             'Content-Disposition: file; name="%s"; filename="%s"' % \
-             (field_name, filename),
-             'Content-Type: %s' % content_type,
-             'Content-Transfer-Encoding: binary',
-             '',
-             body,
-             ]
-            for field_name, filename, content_type, body in self.files
-        )
-
-        # Flatten the list and add closing boundary marker,
-        # then return CR+LF separated data
-        flattened = list(itertools.chain(*parts))
-        flattened.append('--' + self.boundary + '--')
-        flattened.append('')
-        return '\r\n'.join(flattened)
+        """Return the whole body as a string, one character per byte (latin-1)."""
+        return bytes(self).decode('latin-1')
 
 
 class TopException(Exception):
@@ -188,6 +274,7 @@ class RestApi(object):
         self.__domain = domain
         self.__port = port
         self.__httpmethod = "POST"
+        self.__sign_method = SIGN_METHOD_MD5
         if top.getDefaultAppInfo():
             self.__app_key = top.getDefaultAppInfo().appkey
             self.__secret = top.getDefaultAppInfo().secret
@@ -197,6 +284,8 @@ class RestApi(object):
             'Content-type': 'application/x-www-form-urlencoded;charset=UTF-8',
             "Cache-Control": "no-cache",
             "Connection": "Keep-Alive",
+            # Большие JSON-ответы передаются сжатыми, транспорт распаковывает их сам
+            "Accept-Encoding": "gzip, deflate",
         }
 
     def set_app_info(self, appinfo):
@@ -208,6 +297,14 @@ class RestApi(object):
         self.__app_key = appinfo.appkey
         self.__secret = appinfo.secret
 
+    def set_sign_method(self, sign_method):
+        # =======================================================================
+        # Метод подписи запроса: md5 (по умолчанию), hmac или hmac-sha256
+        # =======================================================================
+        if sign_method not in SIGN_METHODS:
+            raise ValueError('unsupported sign_method: %r' % (sign_method,))
+        self.__sign_method = sign_method
+
     def getapiname(self):
         return ""
 
@@ -224,16 +321,78 @@ class RestApi(object):
         # =======================================================================
         # 获取response结果
         # =======================================================================
-        if self.__port == 443:
-            connection = httplib.HTTPSConnection(self.__domain, self.__port, None, None, timeout=timeout)
+        limiter = get_default_limiter()
+        if limiter is not None:
+            limiter.acquire(self.__app_key, self.getapiname())
+        url, body, header = self._prepare_request(authrize)
+        timing_hooks = get_timing_hooks()
+        if timing_hooks:
+            return self._send_timed(timing_hooks, get_default_pool(), self.__domain, self.__port, self.__httpmethod,
+                                    url, body, header, timeout)[1]
+        # Соединения берутся из общего пула keep-alive соединений и возвращаются в него после чтения ответа
+        response, result = get_default_pool().urlopen(self.__domain, self.__port, self.__httpmethod, url,
+                                                      body=body, headers=header, timeout=timeout)
+        return self._parse_response(response, result)
+
+    def _send_timed(self, timing_hooks, pool, domain, port, method, url, body, header, timeout, lazy=False):
+        # =======================================================================
+        # Отправляет запрос и разбирает ответ, записывая фазы вызова в top.api.timing.RequestTiming,
+        # который затем передается в on_timing() каждого хука - и при успехе, и при ошибке.
+        # Возвращает (тело ответа, разобранный ответ)
+        # =======================================================================
+        timing = RequestTiming(self.getapiname())
+        timing.request_bytes = body_size(body)
+        started = time.perf_counter()
+        try:
+            response, result = pool.urlopen(domain, port, method, url, body=body, headers=header,
+                                             timeout=timeout, timing=timing)
+            timing.decoded_bytes = len(result)
+            timing.application_host = response.getheader("Application-Host")
+            timing.location_host = response.getheader("Location-Host")
+            decoding = time.perf_counter()
+            try:
+                jsonobj = self._parse_response(response, result, lazy)
+            finally:
+                timing.decode = time.perf_counter() - decoding
+            if "error_response" in jsonobj:
+                error = jsonobj["error_response"]
+                timing.error_code = error[P_CODE] if P_CODE in error else None
+                timing.sub_code = error[P_SUB_CODE] if P_SUB_CODE in error else None
+            return result, jsonobj
+        except Exception as e:
+            timing.error = e
+            raise
+        finally:
+            timing.total = time.perf_counter() - started
+            for hook in timing_hooks:
+                hook.on_timing(self, timing)
+
+    def _get_endpoint(self):
+        return self.__domain, self.__port, self.__httpmethod
+
+    def _get_app_key(self):
+        return self.__app_key
+
+    def _prepare_request(self, authrize=None, appinfo=None, sign_method=None, clock=None):
+        # =======================================================================
+        # Подписывает запрос и возвращает url, body и заголовки.
+        # Общая часть для getResponse, top.api.client и асинхронного клиента top.api.aio
+        # @param appinfo: top.appinfo; если не передан, используются данные из set_app_info
+        # @param sign_method: метод подписи; если не передан, используется set_sign_method
+        # @param clock: top.api.clock.ServerClock для метки времени; если не передан, используются часы
+        #               по умолчанию (set_default_clock) - локальное время с поправкой на часы шлюза
+        # =======================================================================
+        if appinfo is not None:
+            app_key, secret = appinfo.appkey, appinfo.secret
         else:
-            connection = httplib.HTTPConnection(self.__domain, self.__port, timeout=timeout)
+            app_key, secret = self.__app_key, self.__secret
+        sign_method = sign_method or self.__sign_method
         sys_parameters = {
             P_FORMAT: 'json',
-            P_APPKEY: self.__app_key,
-            P_SIGN_METHOD: "md5",
+            P_APPKEY: app_key,
+            P_SIGN_METHOD: sign_method,
             P_VERSION: '2.0',
-            P_TIMESTAMP: str(int(time.time() * 1000)),
+            P_TIMESTAMP: str(int((clock if clock is not None else get_default_clock()).now() * 1000)),
             P_PARTNER_ID: SYSTEM_GENERATE_VERSION,
             P_API: self.getapiname()
         }
@@ -241,10 +400,7 @@ class RestApi(object):
         if authrize is not None:
             sys_parameters[P_SESSION] = authrize
         application_parameter = self.getApplicationParameters()
-        sign_parameter = sys_parameters.copy()
-        sign_parameter.update(application_parameter)
-        sys_parameters[P_SIGN] = sign(self.__secret, sign_parameter)
-        connection.connect()
+        sys_parameters[P_SIGN] = sign(secret, sys_parameters, sign_method, application_parameter)
 
         header = self.get_request_header()
         if self.getMultipartParas():
@@ -255,19 +411,30 @@ class RestApi(object):
                 fileitem = getattr(self, key)
                 if fileitem and isinstance(fileitem, FileItem):
                     form.add_file(key, fileitem.filename, fileitem.content)
-            body = str(form)
+            # Тело передается как итерируемый объект: файлы читаются частями во время отправки
+            body = form
             header['Content-type'] = form.get_content_type()
+            header['Content-Length'] = str(form.get_content_length())
         else:
             body = urllib.parse.urlencode(application_parameter)
 
         url = N_REST + "?" + urllib.parse.urlencode(sys_parameters)
-        connection.request(self.__httpmethod, url, body=body, headers=header)
-        response = connection.getresponse()
+        return url, body, header
+
+    def _parse_response(self, response, result, lazy=False):
+        # =======================================================================
+        # Разбирает ответ шлюза
+        # @param response: объект ответа со свойством status и методом getheader()
+        # @param result: тело ответа (bytes)
+        # @param lazy: вернуть top.api.codec.LazyObject, который разбирает только запрошенные ветки JSON
+        # =======================================================================
         if response.status != 200:
-            raise RequestException('invalid http status ' + str(response.status) + ',detail body:'
-                                   + response.read().decode('UTF-8'))
-        result = response.read()
-        jsonobj = json.loads(result)
+            error = RequestException('invalid http status ' + str(response.status) + ',detail body:'
+                                     + result.decode('UTF-8', 'replace'))
+            # Код статуса нужен top.api.errors, чтобы отличать ошибки сервера (5xx) от ошибок запроса
+            error.status = response.status
+            raise error
+        jsonobj = LazyObject(result) if lazy else codec.loads(result)
         if "error_response" in jsonobj:
             error = TopException()
             if P_CODE in jsonobj["error_response"]:
@@ -284,19 +451,36 @@ class RestApi(object):
             # raise error
         return jsonobj
 
+    def _get_field_table(self):
+        # =======================================================================
+        # Таблица полей запроса: кортеж пар (атрибут экземпляра, имя параметра API).
+        # Строится один раз для класса и набора атрибутов и затем берется из кэша,
+        # поэтому getMultipartParas() и getTranslateParas() не вызываются на каждый запрос.
+        # =======================================================================
+        cache_key = (type(self), tuple(self.__dict__))
+        table = _FIELD_TABLES.get(cache_key)
+        if table is None:
+            multipart_parameter = set(self.getMultipartParas())
+            # 查询翻译字典来规避一些关键字属性
+            translate_parameter = self.getTranslateParas()
+            table = []
+            for key in cache_key[1]:
+                if key.startswith("__") or key.startswith("_RestApi__") or key in multipart_parameter:
+                    continue
+                name = key[1:] if key.startswith("_") else key
+                table.append((key, translate_parameter.get(name, name)))
+            table = _FIELD_TABLES[cache_key] = tuple(table)
+        return table
+
     def getApplicationParameters(self):
+        # Словари и списки кодируются в компактный JSON (bytes) один раз за вызов:
+        # эти же bytes используются и для подписи, и для тела запроса
+        attributes = self.__dict__
         application_parameter = {}
-        for key, value in self.__dict__.items():
-            if not key.startswith("__") and key not in self.getMultipartParas() and not key.startswith(
-                    "_RestApi__") and value is not None:
-                if key.startswith("_"):
-                    application_parameter[key[1:]] = value
-                else:
-                    application_parameter[key] = value
-        # 查询翻译字典来规避一些关键字属性
-        translate_parameter = self.getTranslateParas()
-        for key, value in application_parameter.items():
-            if key in translate_parameter:
-                application_parameter[translate_parameter[key]] = application_parameter[key]
-                del application_parameter[key]
+        for key, name in self._get_field_table():
+            value = attributes[key]
+            if value is not None:
+                if isinstance(value, STRUCTURED_TYPES):
+                    value = encode_json(value)
+                application_parameter[name] = value
         return application_parameter
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Circuit breaker for TOP calls, one circuit per (domain, API method).
+
+A circuit is CLOSED while calls succeed. After `failure_threshold` failures
+in a row it OPENS: calls are refused at once with CircuitOpenError instead of
+being sent to a gateway or API that is down. After `recovery_timeout` seconds
+it becomes HALF_OPEN and lets `half_open_calls` trial calls through; if they
+succeed the circuit closes, if one fails it opens again. A trial call that
+ends without an outcome (the rate limiter failed, the call was interrupted or
+cancelled) gives its slot back with release().
+
+Only failures of the endpoint count (transport errors, HTTP 5xx, service
+errors, overload); an invalid session or bad parameters mean the endpoint
+works. State changes are logged to the 'top.api.breaker' logger, counted in
+stats and passed to the listeners given to CircuitBreaker.
+"""
+
+import collections
+import logging
+import threading
+import time
+
+from top.api.errors import ERROR_HTTP_SERVER, ERROR_OVERLOAD, ERROR_SERVICE, ERROR_TRANSPORT, CircuitOpenError
+
+logger = logging.getLogger('top.api.breaker')
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+# Error classes that count as a failure of the endpoint
+FAILURE_ERRORS = frozenset((ERROR_TRANSPORT, ERROR_HTTP_SERVER, ERROR_SERVICE, ERROR_OVERLOAD))
+
+
+class _Circuit(object):
+    __slots__ = ('state', 'failures', 'opened_at', 'trials')
+
+    def __init__(self):
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trials = 0
+
+
+class CircuitBreaker(object):
+    """Circuits for every (domain, API method) a client calls.
+
+    failure_threshold - failures in a row that open a circuit;
+    recovery_timeout - seconds a circuit stays open before trial calls are allowed;
+    half_open_calls - trial calls let through while half-open;
+    failure_errors - error classes that count as failures, FAILURE_ERRORS by default;
+    listeners - callables listener(key, old_state, new_state) called on every state change.
+    """
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30.0, half_open_calls=1,
+                 failure_errors=FAILURE_ERRORS, listeners=None):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_calls = half_open_calls
+        self.failure_errors = frozenset(failure_errors)
+        self.listeners = list(listeners or ())
+        self._lock = threading.Lock()
+        self._circuits = {}
+        self.stats = collections.Counter()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _set_state(self, key, circuit, new_state, changes):
+        changes.append((key, circuit.state, new_state))
+        self.stats['%s_to_%s' % (circuit.state, new_state)] += 1
+        circuit.state = new_state
+
+    def _notify(self, changes):
+        # Called outside the lock so that listeners may use the breaker
+        for key, old_state, new_state in changes:
+            logger.warning('circuit %s %s: %s -> %s', key[0], key[1], old_state, new_state)
+            for listener in self.listeners:
+                listener(key, old_state, new_state)
+
+    def before_call(self, domain, method):
+        """Raise CircuitOpenError if a call to (domain, method) must not be sent now.
+
+        Returns True if the call took a half-open trial slot: it must then end with
+        record() or, if it is not sent after all, with release().
+        """
+        key = (domain, method)
+        changes = []
+        error = None
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit.state == STATE_CLOSED:
+                return False
+            if circuit.state == STATE_OPEN:
+                left = circuit.opened_at + self.recovery_timeout - time.monotonic()
+                if left > 0:
+                    error = CircuitOpenError(key, left)
+                else:
+                    self._set_state(key, circuit, STATE_HALF_OPEN, changes)
+                    circuit.trials = 0
+            if error is None:
+                if circuit.trials < self.half_open_calls:
+                    circuit.trials += 1
+                else:
+                    # Trial calls are in flight; the others wait for their outcome
+                    error = CircuitOpenError(key, self.recovery_timeout)
+            if error is not None:
+                self.stats['rejected'] += 1
+        self._notify(changes)
+        if error is not None:
+            raise error
+        return True
+
+    def release(self, domain, method):
+        """Give back the trial slot taken by before_call() for a call that ended without an outcome."""
+        with self._lock:
+            circuit = self._circuits.get((domain, method))
+            if circuit is not None and circuit.state == STATE_HALF_OPEN and circuit.trials > 0:
+                circuit.trials -= 1
+
+    def record(self, domain, method, outcome):
+        """Record the outcome of a sent call: None for success or a top.api.errors ERROR_* class."""
+        key = (domain, method)
+        failed = outcome in self.failure_errors
+        changes = []
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                if not failed:
+                    return
+                circuit = self._circuits[key] = _Circuit()
+            if circuit.state == STATE_HALF_OPEN:
+                if failed:
+                    self._set_state(key, circuit, STATE_OPEN, changes)
+                    circuit.opened_at = time.monotonic()
+                else:
+                    circuit.trials -= 1
+                    circuit.failures = 0
+                    self._set_state(key, circuit, STATE_CLOSED, changes)
+            elif circuit.state == STATE_CLOSED:
+                if not failed:
+                    circuit.failures = 0
+                else:
+                    circuit.failures += 1
+                    if circuit.failures >= self.failure_threshold:
+                        self._set_state(key, circuit, STATE_OPEN, changes)
+                        circuit.opened_at = time.monotonic()
+        self._notify(changes)
+
+    def get_state(self, domain, method):
+        with self._lock:
+            circuit = self._circuits.get((domain, method))
+            return circuit.state if circuit is not None else STATE_CLOSED
+
+    def get_states(self):
+        """Dict of (domain, API method) to state for every circuit that has failed at least once."""
+        with self._lock:
+            return {key: circuit.state for key, circuit in self._circuits.items()}
+
+    def get_retry_after(self):
+        """Seconds until the last open circuit allows a trial call, 0 if none is open."""
+        now = time.monotonic()
+        with self._lock:
+            return max([circuit.opened_at + self.recovery_timeout - now for circuit in self._circuits.values()
+                        if circuit.state == STATE_OPEN] + [0.0])
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in TTL cache of responses of read-only TOP APIs.
+
+Only APIs listed in `ttls` are cached, and only successful responses. The key
+is the API name plus the canonical application parameters (sorted by name,
+structured values re-encoded with sorted keys); the app key and a hash of the
+session are part of it too because many "reference" APIs answer per seller.
+System parameters such as timestamp and sign never are.
+
+Entries live in two tiers: an in-memory LRU of `memory_size` entries in front
+of an optional on-disk directory bounded to `max_disk_bytes`, so several
+processes and consecutive runs share the cache. The raw response body is
+stored and decoded on every hit, so a hit returns the same type (dict or
+LazyObject) as a call.
+
+    cache = ResponseCache(REFERENCE_API_TTLS, directory='.top_cache')
+    client = Client(appinfo, domain, port, cache=cache)
+"""
+
+import collections
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+
+# Suggested TTLs, seconds, of the slow-changing AliExpress reference APIs
+REFERENCE_API_TTLS = {
+    'aliexpress.category.redefining.getchildrenpostcategorybyid': 24 * 3600,
+    'aliexpress.category.redefining.getallchildattributesresult': 24 * 3600,
+    'aliexpress.solution.seller.category.tree.query': 24 * 3600,
+    'aliexpress.freight.redefining.listfreighttemplate': 3600,
+    'aliexpress.logistics.redefining.getallprovince': 7 * 24 * 3600,
+}
+
+# On-disk entry: 8 byte big-endian expiry (float, time.time()) followed by the body
+_HEADER = struct.Struct('>d')
+_SUFFIX = '.cache'
+
+
+class CachedResponse(object):
+    """Stands in for the HTTP response of a cache hit in RestApi._parse_response."""
+    status = 200
+
+    def getheader(self, name, default=None):
+        return default
+
+
+def _canonical_value(value):
+    if isinstance(value, bytes):
+        try:
+            # Structured parameters are JSON: re-encode with sorted keys so that dict order does not matter
+            return json.dumps(json.loads(value), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        except ValueError:
+            return value.decode('utf-8', 'replace')
+    return str(value)
+
+
+def make_key(request, app_key=None, session=None):
+    """Cache key of a request: a hex digest of API name, app key, session and application parameters."""
+    parameters = request.getApplicationParameters()
+    canonical = [request.getapiname(), str(app_key or ''),
+                 hashlib.sha256(session.encode('utf-8')).hexdigest() if session else '']
+    canonical.extend('%s=%s' % (name, _canonical_value(parameters[name])) for name in sorted(parameters))
+    return hashlib.sha256('\n'.join(canonical).encode('utf-8')).hexdigest()
+
+
+class ResponseCache(object):
+    """Two-tier (memory LRU and disk) TTL cache of response bodies.
+
+    ttls - dict of API method name to time to live in seconds; other APIs are not cached;
+    memory_size - number of entries kept in memory;
+    directory - folder of the on-disk tier, None to keep the cache in memory only;
+    max_disk_bytes - size limit of the on-disk tier; the oldest files are removed above it.
+    """
+
+    def __init__(self, ttls, memory_size=256, directory=None, max_disk_bytes=64 * 1024 * 1024):
+        self.ttls = dict(ttls)
+        self.memory_size = memory_size
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._memory = collections.OrderedDict()
+        self._disk_sizes = None
+        self.stats = collections.Counter()
+
+    def __getstate__(self):
+        # The memory tier is not copied to another process, the disk tier is shared through the directory
+        return {'ttls': self.ttls, 'memory_size': self.memory_size, 'directory': self.directory,
+                'max_disk_bytes': self.max_disk_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def is_cached(self, method):
+        return method in self.ttls
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def get(self, key):
+        """Return the cached body for a key, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return entry[1]
+                del self._memory[key]
+        data = self._read_disk(key, now)
+        with self._lock:
+            if data is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['disk_hits'] += 1
+            self._remember(key, data[0], data[1])
+        return data[1]
+
+    def put(self, key, method, body):
+        """Store the body of a successful response of an API method listed in ttls."""
+        expires = time.time() + self.ttls[method]
+        with self._lock:
+            self._remember(key, expires, body)
+            self.stats['stores'] += 1
+        if self.directory is not None:
+            self._write_disk(key, expires, body)
+
+    def _remember(self, key, expires, body):
+        self._memory[key] = (expires, body)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self.stats['memory_evictions'] += 1
+
+    def _read_disk(self, key, now):
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), 'rb') as handle:
+                content = handle.read()
+        except OSError:
+            return None
+        if len(content) < _HEADER.size:
+            return None
+        expires = _HEADER.unpack_from(content)[0]
+        if expires <= now:
+            self._remove_file(key)
+            return None
+        return expires, content[_HEADER.size:]
+
+    def _write_disk(self, key, expires, body):
+        os.makedirs(self.directory, exist_ok=True)
+        # Written to a temporary file and renamed so that readers never see a partial entry
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                temp_file.write(_HEADER.pack(expires))
+                temp_file.write(body)
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            sizes = self._get_disk_sizes()
+            sizes[key] = _HEADER.size + len(body)
+            if sum(sizes.values()) > self.max_disk_bytes:
+                self._evict_disk(sizes)
+
+    def _get_disk_sizes(self):
+        # Sizes of the files of the disk tier, read from the directory once
+        if self._disk_sizes is None:
+            self._disk_sizes = {}
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(_SUFFIX):
+                    self._disk_sizes[entry.name[:-len(_SUFFIX)]] = entry.stat().st_size
+        return self._disk_sizes
+
+    def _evict_disk(self, sizes):
+        # Other processes write to the same directory: eviction goes by file modification time
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(_SUFFIX):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-len(_SUFFIX)], stat.st_size))
+        entries.sort()
+        total = sum(size for _, _, size in entries)
+        sizes.clear()
+        sizes.update((key, size) for _, key, size in entries)
+        for _, key, size in entries:
+            if total <= self.max_disk_bytes:
+                break
+            self._remove_file(key)
+            sizes.pop(key, None)
+            total -= size
+            self.stats['disk_evictions'] += 1
+
+    def _remove_file(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self.directory is not None and os.path.isdir(self.directory):
+                for entry in os.scandir(self.directory):
+                    if entry.name.endswith(_SUFFIX):
+                        self._remove_file(entry.name[:-len(_SUFFIX)])
+            self._disk_sizes = None
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Reusable client for the TOP REST gateway.
+
+A Client keeps everything that does not change between calls: app key and
+secret, gateway endpoint, connection pool, retry settings and hooks. Request
+objects then only carry API parameters, so one Client can be shared by many
+worker threads:
+
+    client = Client(top.appinfo(appkey, secret), 'api.taobao.com', 443)
+    request = top.api.AliexpressSolutionProductInfoGetRequest()
+    request.product_id = product_id
+    response = client.execute(request, session)
+"""
+
+import time
+
+from top.api.base import SIGN_METHOD_MD5
+from top.api.cache import CachedResponse, make_key
+from top.api.errors import ERROR_TIMESTAMP, classify_exception, classify_response
+from top.api.pool import get_default_pool
+from top.api.ratelimit import get_default_limiter
+from top.api.retry import as_retry_policy
+from top.api.timing import get_timing_hooks, overrides_on_timing
+
+
+class Client(object):
+    """Thread safe client that signs and sends RestApi requests.
+
+    appinfo - top.appinfo(appkey, secret) used to sign every request;
+    domain, port - gateway endpoint, port 443 means HTTPS;
+    timeout - socket timeout in seconds for one attempt;
+    pool - top.api.pool.ConnectionPool, the process-wide default pool when omitted;
+    retry - top.api.retry.RetryPolicy, or the number of extra attempts after a transport error;
+    hooks - list of top.api.hooks.ClientHook called around every request; phase timing is
+            recorded when one of them (or of top.api.timing.set_timing_hooks) overrides on_timing;
+    sign_method - md5, hmac or hmac-sha256;
+    lazy_response - return top.api.codec.LazyObject views instead of fully decoded dicts;
+    limiter - top.api.ratelimit.RateLimiter, the default limiter when omitted;
+    breaker - top.api.breaker.CircuitBreaker that refuses calls to failing endpoints, None to disable;
+    cache - top.api.cache.ResponseCache for read-only APIs, None to disable;
+    clock - top.api.clock.ServerClock kept in sync with the gateway by this client; timestamps come
+            from the default clock when omitted.
+    """
+
+    def __init__(self, appinfo, domain='gw.api.taobao.com', port=80, timeout=30, pool=None, retry=0,
+                 hooks=None, sign_method=SIGN_METHOD_MD5, lazy_response=False, limiter=None, breaker=None, cache=None,
+                 clock=None):
+        self.appinfo = appinfo
+        self.clock = clock
+        self.cache = cache
+        self.limiter = limiter
+        self.breaker = breaker
+        self.sign_method = sign_method
+        self.lazy_response = lazy_response
+        self.domain = domain
+        self.port = int(port)
+        self.timeout = timeout
+        self.pool = pool
+        self.retry = as_retry_policy(retry)
+        self.hooks = tuple(hooks or ())
+        self.timing_hooks = tuple(hook for hook in self.hooks if overrides_on_timing(hook))
+
+    def get_pool(self):
+        return self.pool if self.pool is not None else get_default_pool()
+
+    def get_limiter(self):
+        return self.limiter if self.limiter is not None else get_default_limiter()
+
+    def execute(self, request, session=None, timeout=None):
+        """Sign and send the request. Returns the decoded response like RestApi.getResponse()."""
+        for hook in self.hooks:
+            hook.before_execute(request, session)
+        try:
+            response = self._send(request, session, timeout or self.timeout)
+        except Exception as e:
+            for hook in self.hooks:
+                hook.after_execute(request, None, e)
+            raise
+        for hook in self.hooks:
+            hook.after_execute(request, response, None)
+        return response
+
+    def _send(self, request, session, timeout):
+        method = request.getapiname()
+        cache_key = None
+        if self.cache is not None and self.cache.is_cached(method):
+            cache_key = make_key(request, self.appinfo.appkey, session)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return request._parse_response(CachedResponse(), cached, self.lazy_response)
+        state = self.retry.start()
+        limiter = self.get_limiter()
+        timing_hooks = self.timing_hooks + get_timing_hooks()
+        clock = self.clock
+        if clock is not None and clock.needs_sync():
+            clock.sync(self)
+        clock_synced = False
+        while True:
+            # An open circuit raises CircuitOpenError, which is not retried
+            trial = self.breaker is not None and self.breaker.before_call(self.domain, method)
+            response, error = None, None
+            try:
+                if limiter is not None:
+                    limiter.acquire(self.appinfo.appkey, method)
+                started = time.monotonic()
+                try:
+                    # Signed again on every attempt so that the timestamp stays fresh
+                    url, body, header = request._prepare_request(session, self.appinfo, self.sign_method, clock)
+                    if timing_hooks:
+                        result, response = request._send_timed(timing_hooks, self.get_pool(), self.domain,
+                                                               self.port, 'POST', url, body, header, timeout,
+                                                               self.lazy_response)
+                    else:
+                        http_response, result = self.get_pool().urlopen(self.domain, self.port, 'POST', url,
+                                                                        body=body, headers=header, timeout=timeout)
+                        response = request._parse_response(http_response, result, self.lazy_response)
+                    outcome = classify_response(response)
+                except Exception as e:
+                    error = e
+                    outcome = classify_exception(e)
+            except BaseException:
+                # The limiter failed or the call was interrupted: there is no outcome to record,
+                # a half-open trial slot is given back so that the circuit does not stay blocked
+                if trial:
+                    self.breaker.release(self.domain, method)
+                raise
+            if cache_key is not None and outcome is None:
+                self.cache.put(cache_key, method, result)
+            if self.breaker is not None:
+                self.breaker.record(self.domain, method, outcome)
+            for hook in self.hooks:
+                hook.after_attempt(request, state.attempt + 1, time.monotonic() - started, outcome)
+            if outcome == ERROR_TIMESTAMP and clock is not None and not clock_synced:
+                # The local clock has drifted: sent again at once with the corrected timestamp,
+                # without using up an attempt of the retry policy
+                clock_synced = True
+                clock.invalidate()
+                if clock.sync(self) is not None:
+                    continue
+            delay = state.next_delay(outcome)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            time.sleep(delay)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Server clock used for the timestamp of signed TOP calls.
+
+The gateway rejects calls whose timestamp is too far from its own clock
+(error 31, Invalid timestamp). A ServerClock keeps the offset between the
+local clock and the gateway's, measured with taobao.time.get, and every
+timestamp is taken from ServerClock.now().
+
+RestApi requests use the process-wide default clock (set_default_clock). A
+Client given a clock keeps it in sync: at its first call, every `interval`
+seconds after that, and at once when the gateway answers with a timestamp
+error, in which case the call is sent again with the corrected timestamp.
+When taobao.time.get itself is rejected, the offset is taken from the Date
+header of its response.
+"""
+
+import calendar
+import collections
+import email.utils
+import logging
+import threading
+import time
+
+logger = logging.getLogger('top.api.clock')
+
+# taobao.time.get returns the gateway's local time, which is Beijing time (UTC+8)
+SERVER_UTC_OFFSET = 8 * 3600
+SERVER_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def parse_server_time(text, utc_offset=SERVER_UTC_OFFSET):
+    """Unix time of a 'YYYY-MM-DD HH:MM:SS' gateway time given in UTC+utc_offset."""
+    return calendar.timegm(time.strptime(text, SERVER_TIME_FORMAT)) - utc_offset
+
+
+def format_server_time(timestamp, utc_offset=SERVER_UTC_OFFSET):
+    """'YYYY-MM-DD HH:MM:SS' gateway time (UTC+utc_offset) of a Unix time, e.g. for gmt_modified filters."""
+    return time.strftime(SERVER_TIME_FORMAT, time.gmtime(timestamp + utc_offset))
+
+
+def parse_http_date(text):
+    """Unix time of an HTTP Date header, or None if it cannot be parsed."""
+    try:
+        return email.utils.parsedate_to_datetime(text).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class ServerClock(object):
+    """Local clock corrected by the measured offset of the gateway's clock.
+
+    interval - seconds between periodic re-syncs, None to sync only once;
+    retry_interval - seconds before another attempt after a failed sync;
+    utc_offset - time zone of the times returned by taobao.time.get.
+    """
+
+    def __init__(self, interval=3600.0, retry_interval=60.0, utc_offset=SERVER_UTC_OFFSET):
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.utc_offset = utc_offset
+        self.offset = 0.0
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+        self._syncing = False
+        self.stats = collections.Counter()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_syncing'] = False
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def now(self):
+        """Current gateway time, seconds since the epoch."""
+        return time.time() + self.offset
+
+    def needs_sync(self):
+        return time.monotonic() >= self._next_sync
+
+    def invalidate(self):
+        """Request a sync before the next call, e.g. after a timestamp error."""
+        self._next_sync = 0.0
+
+    def begin_sync(self):
+        """Return True if the caller should sync now; only one caller at a time gets True."""
+        with self._lock:
+            if self._syncing or not self.needs_sync():
+                return False
+            self._syncing = True
+            return True
+
+    def end_sync(self, server_time=None, sent_at=None, received_at=None, precision=1.0):
+        """Record the result of a sync started with begin_sync().
+
+        server_time - gateway time read from a response, None if the sync failed;
+        sent_at, received_at - local time.time() around the request;
+        precision - resolution of server_time: gateway times are truncated to whole seconds.
+        """
+        with self._lock:
+            self._syncing = False
+            if server_time is None:
+                self.stats['sync_errors'] += 1
+                self._next_sync = time.monotonic() + self.retry_interval
+                return
+            # The server read its clock somewhere between sending and receiving; on average in the middle
+            offset = server_time + precision / 2.0 - (sent_at + received_at) / 2.0
+            changed = abs(offset - self.offset) >= precision
+            self.offset = offset
+            self.stats['syncs'] += 1
+            self._next_sync = time.monotonic() + self.interval if self.interval is not None else float('inf')
+        if changed:
+            logger.warning('gateway clock offset %.3f s (round trip %.3f s)', offset, received_at - sent_at)
+
+    def sync(self, client):
+        """Measure the offset with taobao.time.get sent by a top.api.client.Client.
+
+        Returns the new offset, or None if the gateway time could not be read.
+        """
+        if not self.begin_sync():
+            return self.offset
+        server_time = sent_at = received_at = None
+        try:
+            server_time, sent_at, received_at = fetch_server_time(client, self)
+        except Exception as e:
+            logger.warning('clock sync with %s failed: %s', client.domain, e)
+        finally:
+            self.end_sync(server_time, sent_at, received_at)
+        return self.offset if server_time is not None else None
+
+
+def fetch_server_time(client, clock):
+    """Send taobao.time.get through the client's pool and return (server_time, sent_at, received_at).
+
+    server_time is read from the response body, or from its Date header when the
+    gateway rejected the call; it is None if neither is available.
+    """
+    from top.api.rest import TimeGetRequest
+    request = TimeGetRequest()
+    limiter = client.get_limiter()
+    if limiter is not None:
+        limiter.acquire(client.appinfo.appkey, request.getapiname())
+    url, body, header = request._prepare_request(None, client.appinfo, client.sign_method, clock)
+    sent_at = time.time()
+    response, data = client.get_pool().urlopen(client.domain, client.port, 'POST', url, body=body,
+                                               headers=header, timeout=client.timeout)
+    received_at = time.time()
+    server_time = None
+    if response.status == 200:
+        answer = request._parse_response(response, data)
+        if 'time_get_response' in answer:
+            server_time = parse_server_time(answer['time_get_response']['time'], clock.utc_offset)
+    if server_time is None:
+        server_time = parse_http_date(response.getheader('Date'))
+    return server_time, sent_at, received_at
+
+
+_default_clock = ServerClock(interval=None)
+
+
+def get_default_clock():
+    return _default_clock
+
+
+def set_default_clock(clock):
+    global _default_clock
+    _default_clock = clock
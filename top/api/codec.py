@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+JSON encoding of application parameters and decoding of responses.
+
+Structured parameters (dicts and lists such as aeop_a_e_product_list_query or
+mutiple_product_update_list) are sent as compact UTF-8 JSON. They are encoded
+once per call, and the same bytes are used for the signature and the body.
+
+Responses are decoded with the fastest installed backend (see
+set_json_decoder), either completely or through a LazyObject view.
+"""
+
+import datetime
+import decimal
+import json
+import re
+from collections.abc import Mapping
+
+
+def _json_default(value):
+    # numpy/pandas scalars (int64, float64, bool_) as they come out of DataFrame rows
+    item = getattr(value, 'item', None)
+    if callable(item):
+        return item()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, datetime.date):
+        return value.strftime('%Y-%m-%d')
+    raise TypeError('Object of type %s is not JSON serializable' % type(value).__name__)
+
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+STRUCTURED_TYPES = (dict, list, tuple)
+
+
+def encode_json(value):
+    """Return value as compact JSON in UTF-8 bytes."""
+    return _encoder.encode(value).encode('utf-8')
+
+
+# ---------------------------------------------------------------------------
+# Response decoding
+# ---------------------------------------------------------------------------
+
+def _import_decoder(name):
+    if name == 'orjson':
+        import orjson
+        return orjson.loads
+    elif name == 'ujson':
+        import ujson
+        return ujson.loads
+    elif name == 'json':
+        return json.loads
+    raise ValueError('unknown JSON decoder: %r' % (name,))
+
+
+# Faster parsers are preferred when installed, the standard library is the fallback
+DECODER_PREFERENCE = ('orjson', 'ujson', 'json')
+
+_decoder_name = None
+_decoder = None
+
+
+def set_json_decoder(decoder=None):
+    """Select the JSON decoder for responses.
+
+    decoder - backend name ('orjson', 'ujson', 'json'), a callable taking bytes,
+    or None to pick the first installed backend from DECODER_PREFERENCE.
+    """
+    global _decoder_name, _decoder
+    if callable(decoder):
+        _decoder_name, _decoder = getattr(decoder, '__module__', None) or repr(decoder), decoder
+        return
+    names = DECODER_PREFERENCE if decoder is None else (decoder,)
+    for name in names:
+        try:
+            _decoder = _import_decoder(name)
+        except ImportError:
+            if decoder is not None:
+                raise
+            continue
+        _decoder_name = name
+        return
+
+
+def get_json_decoder():
+    """Return (name, callable) of the decoder in use."""
+    if _decoder is None:
+        set_json_decoder()
+    return _decoder_name, _decoder
+
+
+def loads(data):
+    """Decode a JSON document given as bytes or str."""
+    if _decoder is None:
+        set_json_decoder()
+    return _decoder(data)
+
+
+# Lazy views. A JSON object is scanned member by member only as far as the
+# requested key: values of earlier members are skipped, later members are not
+# looked at at all, and nested objects become LazyObject views themselves. So
+# the untouched parts of a large response are never kept as Python objects.
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_raw_decode = json.JSONDecoder().raw_decode
+_scanstring = json.decoder.scanstring
+
+
+def _skip_whitespace(text, pos):
+    return _WHITESPACE.match(text, pos).end()
+
+
+class LazyObject(Mapping):
+    """Read-only mapping over a JSON object that decodes members on first access.
+
+    Nested objects are returned as LazyObject too; arrays and scalars are
+    decoded when the member is accessed.
+    """
+
+    __slots__ = ('_text', '_start', '_spans', '_values', '_scan_pos', '_pending')
+
+    def __init__(self, data, start=None):
+        if not isinstance(data, str):
+            data = bytes(data).decode('utf-8')
+        self._text = data
+        self._start = _skip_whitespace(data, 0) if start is None else start
+        if data[self._start:self._start + 1] != '{':
+            raise ValueError('JSON document is not an object')
+        # spans: key -> [value start, value end or None while not skipped yet]
+        self._spans = {}
+        self._values = {}
+        self._scan_pos = _skip_whitespace(data, self._start + 1)
+        self._pending = None
+        if data[self._scan_pos:self._scan_pos + 1] == '}':
+            self._scan_pos = None
+
+    def _scan(self, wanted=None):
+        # Read members until the wanted key is found (or to the end of the object when wanted is None)
+        text = self._text
+        spans = self._spans
+        while self._scan_pos is not None:
+            pos = self._scan_pos
+            if self._pending is not None:
+                span = spans[self._pending]
+                if span[1] is None:
+                    span[1] = _raw_decode(text, span[0])[1]
+                self._pending = None
+                pos = _skip_whitespace(text, span[1])
+                separator = text[pos:pos + 1]
+                if separator == '}':
+                    self._scan_pos = None
+                    return
+                if separator != ',':
+                    raise ValueError('expected "," or "}" at position %d' % pos)
+                pos = _skip_whitespace(text, pos + 1)
+            if text[pos:pos + 1] != '"':
+                raise ValueError('expected a key at position %d' % pos)
+            key, pos = _scanstring(text, pos + 1)
+            pos = _skip_whitespace(text, pos)
+            if text[pos:pos + 1] != ':':
+                raise ValueError('expected ":" at position %d' % pos)
+            value_start = _skip_whitespace(text, pos + 1)
+            spans[key] = [value_start, None]
+            self._pending = key
+            self._scan_pos = value_start
+            if key == wanted:
+                return
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        if key not in self._spans:
+            self._scan(key)
+        span = self._spans[key]
+        if self._text[span[0]] == '{':
+            value = LazyObject(self._text, span[0])
+        else:
+            value, span[1] = _raw_decode(self._text, span[0])
+        self._values[key] = value
+        return value
+
+    def __contains__(self, key):
+        if key not in self._spans:
+            self._scan(key)
+        return key in self._spans
+
+    def __iter__(self):
+        self._scan()
+        return iter(self._spans)
+
+    def __len__(self):
+        self._scan()
+        return len(self._spans)
+
+    def __repr__(self):
+        return '<LazyObject keys=%r>' % (list(self),)
+
+    def to_dict(self):
+        """Decode the whole object into plain Python objects."""
+        return _raw_decode(self._text, self._start)[0]
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Classification of TOP gateway errors.
+
+The gateway reports errors as {"error_response": {"code", "msg", "sub_code",
+"sub_msg"}}; batch APIs also report per-item errors inside a successful
+response. classify_error() maps a code, sub_code and message to one of the
+ERROR_* classes below, so that throttling and retry logic do not have to know
+individual codes.
+"""
+
+import asyncio
+
+try:
+    import httplib
+except ImportError:
+    import http.client as httplib
+
+from top.api.base import P_CODE, P_MSG, P_SUB_CODE, P_SUB_MSG, RequestException, TopException
+
+# App or API call quota exhausted (code 7 "App Call Limited", accesscontrol.limited-by-*)
+ERROR_CALL_LIMIT = 'call_limit'
+# Gateway flow control of one API (isv.*-flow-control, isp.call-limited)
+ERROR_FLOW_CONTROL = 'flow_control'
+# Backend overloaded: HSF provider thread pool is full, service busy
+ERROR_OVERLOAD = 'overload'
+# Backend failure or timeout that is not the caller's fault (isp.*, codes 10, 15, 520)
+ERROR_SERVICE = 'service'
+# Timestamp rejected by the gateway (code 31 "Invalid Timestamp")
+ERROR_TIMESTAMP = 'timestamp'
+# Missing, invalid or expired session (codes 26, 27)
+ERROR_SESSION = 'session'
+# Connection failures and socket timeouts: the request may not have reached the gateway
+ERROR_TRANSPORT = 'transport'
+# HTTP 5xx status from the gateway or a proxy in front of it
+ERROR_HTTP_SERVER = 'http_server'
+# Anything the caller has to fix: bad arguments, signature, permissions, isv.* sub codes
+ERROR_CLIENT = 'client'
+# Call refused by an open top.api.breaker circuit without being sent
+ERROR_CIRCUIT_OPEN = 'circuit_open'
+ERROR_UNKNOWN = 'unknown'
+
+# Transport errors raised by http.client and sockets (socket.timeout is an OSError)
+TRANSPORT_ERRORS = (httplib.HTTPException, OSError)
+# Same for top.api.aio streams; asyncio.TimeoutError is not an OSError before Python 3.11
+_ASYNC_TRANSPORT_ERRORS = (asyncio.TimeoutError, asyncio.IncompleteReadError)
+
+# Errors that mean the caller sends too much and must slow down
+THROTTLE_ERRORS = frozenset((ERROR_CALL_LIMIT, ERROR_FLOW_CONTROL, ERROR_OVERLOAD))
+
+_CODE_CLASSES = {
+    7: ERROR_CALL_LIMIT,
+    10: ERROR_SERVICE,
+    15: ERROR_SERVICE,
+    520: ERROR_SERVICE,
+    31: ERROR_TIMESTAMP,
+    26: ERROR_SESSION,
+    27: ERROR_SESSION,
+}
+_CLIENT_CODES = frozenset((9, 11, 12, 21, 22, 25, 28, 29, 30, 32, 33, 40, 41, 42, 43, 47))
+
+_OVERLOAD_MARKERS = ('thread pool is full', 'threadpool is full', 'hsf', 'system busy', 'server busy',
+                     'service busy')
+_FLOW_CONTROL_MARKERS = ('flow-control', 'flow_control', 'flowcontrol', 'call-limited', 'frequency')
+_CALL_LIMIT_MARKERS = ('accesscontrol.limited', 'call limited', 'call-limited-by', 'ban will last')
+
+
+class CircuitOpenError(RequestException):
+    """Raised instead of sending a call while its circuit is open.
+
+    key - (domain, API method) of the circuit; retry_after - seconds until a trial call is allowed.
+    """
+
+    def __init__(self, key, retry_after):
+        RequestException.__init__(self, 'circuit open for %s %s, retry after %.1f s' % (key[0], key[1], retry_after))
+        self.key = key
+        self.retry_after = retry_after
+
+
+def _int_code(code):
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(code=None, sub_code=None, message=None):
+    """Return the ERROR_* class of an error given its code, sub_code and message(s)."""
+    sub_code = str(sub_code or '').lower()
+    text = (sub_code + ' ' + str(message or '')).lower()
+    # Overload is reported inside other codes (15, isp.*), so the text is checked first
+    if any(marker in text for marker in _OVERLOAD_MARKERS):
+        return ERROR_OVERLOAD
+    if any(marker in text for marker in _CALL_LIMIT_MARKERS):
+        return ERROR_CALL_LIMIT
+    if any(marker in text for marker in _FLOW_CONTROL_MARKERS):
+        return ERROR_FLOW_CONTROL
+    number = _int_code(code)
+    error_class = _CODE_CLASSES.get(number)
+    if error_class is not None and error_class != ERROR_SERVICE:
+        return error_class
+    # Remote service errors (code 15) carry the real cause in the sub_code: isp.* or isv.*
+    if sub_code.startswith('isp.'):
+        return ERROR_SERVICE
+    if sub_code.startswith('isv.') or number in _CLIENT_CODES:
+        return ERROR_CLIENT
+    return error_class or ERROR_UNKNOWN
+
+
+def get_error(response):
+    """Return the error_response part of a decoded response, or None if the call succeeded."""
+    if response is None or 'error_response' not in response:
+        return None
+    return response['error_response']
+
+
+def classify_response(response):
+    """Return the ERROR_* class of a decoded response, or None if the call succeeded."""
+    error = get_error(response)
+    if error is None:
+        return None
+    messages = ' '.join(str(error[key]) for key in (P_MSG, P_SUB_MSG) if key in error)
+    return classify_error(error[P_CODE] if P_CODE in error else None,
+                          error[P_SUB_CODE] if P_SUB_CODE in error else None,
+                          messages)
+
+
+def classify_exception(error):
+    """Return the ERROR_* class of an exception raised while sending a request."""
+    if isinstance(error, CircuitOpenError):
+        return ERROR_CIRCUIT_OPEN
+    if isinstance(error, RequestException):
+        status = getattr(error, 'status', None)
+        if status is None or status >= 500:
+            return ERROR_HTTP_SERVER
+        if status == 429:
+            return ERROR_CALL_LIMIT
+        return ERROR_CLIENT
+    if isinstance(error, TopException):
+        return classify_error(error.errorcode, error.subcode, '%s %s' % (error.message, error.submsg))
+    if isinstance(error, TRANSPORT_ERRORS + _ASYNC_TRANSPORT_ERRORS):
+        return ERROR_TRANSPORT
+    return ERROR_UNKNOWN
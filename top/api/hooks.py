@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Hooks called by top.api.client.Client around every executed request.
+"""
+
+import collections
+import threading
+
+
+class ClientHook(object):
+    """Base class for client hooks. Override only the methods you need."""
+
+    def before_execute(self, request, session):
+        """Called before the request is signed and sent."""
+        pass
+
+    def after_attempt(self, request, attempt, elapsed, outcome):
+        """Called after every attempt: attempt counts from 1, elapsed is in seconds,
+        outcome is None for success or the top.api.errors ERROR_* class of the failure."""
+        pass
+
+    def after_execute(self, request, response, error):
+        """Called after the call finished: response is the decoded answer or None if error was raised."""
+        pass
+
+    def on_timing(self, request, timing):
+        """Called after every attempt with its top.api.timing.RequestTiming. Timing is only
+        recorded when at least one hook overrides this method."""
+        pass
+
+
+class AttemptStats(ClientHook):
+    """Counts attempts and their latency per (API method, outcome); outcome 'ok' means success."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = collections.Counter()
+        self.seconds = collections.Counter()
+        self.max_seconds = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def after_attempt(self, request, attempt, elapsed, outcome):
+        key = (request.getapiname(), outcome or 'ok')
+        with self._lock:
+            self.counts[key] += 1
+            self.seconds[key] += elapsed
+            self.max_seconds[key] = max(elapsed, self.max_seconds.get(key, 0.0))
+
+    def summary(self):
+        """Lines 'method outcome: count, average and maximum latency' sorted by method."""
+        with self._lock:
+            return ['%s %s: %d, avg %.3f s, max %.3f s' % (method, outcome, count,
+                                                          self.seconds[(method, outcome)] / count,
+                                                          self.max_seconds[(method, outcome)])
+                    for (method, outcome), count in sorted(self.counts.items())]
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+In-process metrics in the Prometheus text exposition format.
+
+A MetricsRegistry holds counters, gauges and histograms with labels. Its
+render() output can be written to a file at the end of a run (for the node
+exporter textfile collector or a plain cron check) with write(), or served
+over HTTP to a scraper with start_http_server().
+
+MetricsHook is a ClientHook that fills a registry from the calls of a Client:
+
+    top_requests_total{method, outcome} - executed calls by final outcome;
+    top_attempts_total{method, outcome} - attempts, retries included;
+    top_retries_total{method} - attempts after the first;
+    top_request_duration_seconds{method} - latency histogram of attempts;
+    top_request_phase_seconds{method, phase} - dns, connect, tls, server, transfer, decode;
+    top_request_bytes_total{method, direction} - bytes sent and received on the wire.
+
+Values that live in other objects (limiter waits, breaker states) are copied
+into the registry by collectors added with add_collector(), which run before
+every render.
+"""
+
+import collections
+import math
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from top.api.errors import classify_exception, classify_response
+from top.api.hooks import ClientHook
+
+# Latency buckets, seconds: TOP calls take from tens of milliseconds to the 30 s socket timeout
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+TIMING_PHASES = ('dns', 'connect', 'tls', 'server', 'transfer', 'decode')
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = ['%s="%s"' % (name, _escape(value)) for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append('%s="%s"' % (extra[0], _escape(extra[1])))
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+class _Metric(object):
+    """A metric family: one value (or histogram) per combination of label values."""
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames, lock):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = lock
+        self._values = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError('%s expects labels %s, got %s' % (self.name, self.labelnames, tuple(labels)))
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        return [(self.name, key, None, value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = ['# HELP %s %s' % (self.name, self.documentation.replace('\\', '\\\\').replace('\n', '\\n')),
+                 '# TYPE %s %s' % (self.name, self.type_name)]
+        for name, key, extra, value in self._samples():
+            lines.append('%s%s %s' % (name, _format_labels(self.labelnames, key, extra), _format_value(value)))
+        return lines
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value, **labels):
+        """Set the total; for counters copied by a collector from another object's statistics."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Gauge(_Metric):
+    type_name = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames, lock, buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, documentation, labelnames, lock)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Counts per bucket (not cumulative), then sum and count
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def get(self, **labels):
+        """(count, sum) of the observations with these labels."""
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return (entry[2], entry[1]) if entry is not None else (0, 0.0)
+
+    def _samples(self):
+        samples = []
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append((self.name + '_bucket', key, ('le', _format_value(float(bound))), cumulative))
+            samples.append((self.name + '_bucket', key, ('le', '+Inf'), count))
+            samples.append((self.name + '_sum', key, None, total))
+            samples.append((self.name + '_count', key, None, count))
+        return samples
+
+
+class MetricsRegistry(object):
+    """Thread safe set of metrics. counter(), gauge() and histogram() return the existing
+    metric of that name or register a new one."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = collections.OrderedDict()
+        self._collectors = []
+
+    def _get_or_create(self, metric_class, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, documentation, labelnames, threading.Lock(),
+                                                            **kwargs)
+            elif type(metric) is not metric_class or metric.labelnames != tuple(labelnames):
+                raise ValueError('metric %s is already registered as a %s with labels %s'
+                                 % (name, metric.type_name, metric.labelnames))
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def add_collector(self, collector):
+        """Add a callable collector(registry) that updates metrics before every render."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            collector(self)
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            with metric._lock:
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write render() to a file; the file is replaced atomically, so a reader never sees half of it."""
+        directory = os.path.dirname(os.path.abspath(path))
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w', encoding='utf-8') as temp_file:
+                temp_file.write(self.render())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+
+def start_http_server(registry, port, host='127.0.0.1'):
+    """Serve registry.render() at http://host:port/metrics from a daemon thread.
+
+    Returns the server; call server.shutdown() to stop it. port 0 picks a free port
+    (server.server_address holds the one in use).
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='top-metrics-http', daemon=True)
+    thread.start()
+    return server
+
+
+class MetricsHook(ClientHook):
+    """Client hook that counts calls, attempts and retries and records latency into a registry,
+    the default registry when omitted."""
+
+    def __init__(self, registry=None):
+        self.registry = registry if registry is not None else get_default_registry()
+        self.requests = self.registry.counter('top_requests_total', 'TOP calls by final outcome.',
+                                              ('method', 'outcome'))
+        self.attempts = self.registry.counter('top_attempts_total', 'TOP call attempts by outcome.',
+                                              ('method', 'outcome'))
+        self.retries = self.registry.counter('top_retries_total', 'TOP call attempts after the first.',
+                                             ('method',))
+        self.duration = self.registry.histogram('top_request_duration_seconds', 'Latency of TOP call attempts.',
+                                                ('method',))
+        self.phases = self.registry.histogram('top_request_phase_seconds', 'Time of TOP call attempts by phase.',
+                                              ('method', 'phase'))
+        self.bytes = self.registry.counter('top_request_bytes_total', 'Bytes of TOP calls on the wire.',
+                                           ('method', 'direction'))
+
+    def __getstate__(self):
+        # A registry is per process: a copy in another process reports to that process's default registry
+        return {'registry': None}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def after_attempt(self, request, attempt, elapsed, outcome):
+        method = request.getapiname()
+        self.attempts.inc(method=method, outcome=outcome or 'ok')
+        self.duration.observe(elapsed, method=method)
+        if attempt > 1:
+            self.retries.inc(method=method)
+
+    def after_execute(self, request, response, error):
+        outcome = classify_exception(error) if error is not None else classify_response(response)
+        self.requests.inc(method=request.getapiname(), outcome=outcome or 'ok')
+
+    def on_timing(self, request, timing):
+        method = timing.method
+        for phase in TIMING_PHASES:
+            value = getattr(timing, phase)
+            # dns, connect and tls are zero on a reused connection: only connection setups are observed
+            if value or phase not in ('dns', 'connect', 'tls'):
+                self.phases.observe(value, method=method, phase=phase)
+        self.bytes.inc(timing.request_bytes, method=method, direction='sent')
+        self.bytes.inc(timing.response_bytes, method=method, direction='received')
+
+
+_default_registry = MetricsRegistry()
+
+
+def get_default_registry():
+    return _default_registry
+
+
+def set_default_registry(registry):
+    global _default_registry
+    _default_registry = registry
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+Keep-alive connection pool shared by every RestApi request.
+
+Connections are kept per (domain, port, scheme). A connection is taken out of
+the pool for the duration of one request/response exchange and put back once
+the response body has been read completely, so a single connection is never
+used by two threads at the same time.
+
+urlopen() optionally fills a top.api.timing.RequestTiming with the DNS,
+connect, TLS, server and transfer phases of the exchange.
+"""
+
+try:
+    import httplib
+except ImportError:
+    import http.client as httplib
+import collections
+import os
+import select
+import socket
+import threading
+import time
+import zlib
+
+SCHEME_HTTP = 'http'
+SCHEME_HTTPS = 'https'
+
+# Errors that mean the server closed a kept-alive socket between two requests
+_STALE_ERRORS = (httplib.RemoteDisconnected, httplib.BadStatusLine, ConnectionResetError,
+                 ConnectionAbortedError, BrokenPipeError)
+
+
+# Response bodies are read and decompressed in chunks of this size
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def get_scheme(port):
+    return SCHEME_HTTPS if int(port) == 443 else SCHEME_HTTP
+
+
+class ContentDecoder(object):
+    """Streaming decoder for the Content-Encoding of a response: gzip, deflate or identity."""
+
+    def __init__(self, encoding):
+        encoding = (encoding or '').strip().lower()
+        if encoding in ('gzip', 'x-gzip'):
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            self._decompressor = zlib.decompressobj()
+        else:
+            self._decompressor = None
+        self._deflate = encoding == 'deflate'
+        self._started = False
+
+    def decompress(self, chunk):
+        if self._decompressor is None or not chunk:
+            return chunk
+        if self._deflate and not self._started:
+            self._started = True
+            try:
+                return self._decompressor.decompress(chunk)
+            except zlib.error:
+                # Some servers send raw deflate data without the zlib header
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decompressor.decompress(chunk)
+
+    def flush(self):
+        if self._decompressor is None:
+            return b''
+        return self._decompressor.flush()
+
+
+def read_body(response):
+    """Read the whole body of an http.client response, decompressing it on the fly.
+
+    Returns (data, wire_size): the decoded body and the number of bytes received.
+    """
+    decoder = ContentDecoder(response.getheader('Content-Encoding'))
+    chunks = []
+    wire_size = 0
+    while True:
+        chunk = response.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        wire_size += len(chunk)
+        chunks.append(decoder.decompress(chunk))
+    chunks.append(decoder.flush())
+    return b''.join(chunks), wire_size
+
+
+class _TimedConnectionMixin(object):
+    """Measures DNS lookup, TCP connect and TLS handshake while `timing` is set."""
+    timing = None
+
+    def __init__(self, *args, **kwargs):
+        super(_TimedConnectionMixin, self).__init__(*args, **kwargs)
+        # http.client stores socket.create_connection on the instance; use the method below instead
+        del self._create_connection
+
+    def _create_connection(self, address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+        timing = self.timing
+        if timing is None:
+            return socket.create_connection(address, timeout, source_address)
+        started = time.perf_counter()
+        addresses = socket.getaddrinfo(address[0], address[1], 0, socket.SOCK_STREAM)
+        resolved = time.perf_counter()
+        timing.dns = resolved - started
+        error = OSError('getaddrinfo returned no address for %s' % address[0])
+        try:
+            for family, socktype, proto, _, sockaddr in addresses:
+                sock = socket.socket(family, socktype, proto)
+                try:
+                    if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                        sock.settimeout(timeout)
+                    if source_address:
+                        sock.bind(source_address)
+                    sock.connect(sockaddr)
+                    return sock
+                except OSError as e:
+                    error = e
+                    sock.close()
+            raise error
+        finally:
+            timing.connect = time.perf_counter() - resolved
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, httplib.HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, httplib.HTTPSConnection):
+
+    def connect(self):
+        timing = self.timing
+        if timing is None:
+            return super(TimedHTTPSConnection, self).connect()
+        started = time.perf_counter()
+        try:
+            super(TimedHTTPSConnection, self).connect()
+        finally:
+            timing.tls = time.perf_counter() - started - timing.dns - timing.connect
+
+
+class ConnectionPool(object):
+    """Thread safe pool of idle HTTP(S) connections.
+
+    maxsize - maximum number of idle connections kept for one (domain, port, scheme);
+    idle_timeout - seconds after which an idle connection is closed instead of reused.
+
+    stats counts created, reused, evicted and re-established connections, requests and
+    response bytes; it is updated under the pool lock, read it with get_stats().
+    """
+
+    def __init__(self, maxsize=10, idle_timeout=60):
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._pid = os.getpid()
+        self.stats = collections.Counter()
+
+    def __getstate__(self):
+        # Sockets and locks cannot cross a process boundary: a copy starts empty
+        return {'maxsize': self.maxsize, 'idle_timeout': self.idle_timeout}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _check_pid(self):
+        # After fork() the child must not share sockets with the parent
+        if self._pid != os.getpid():
+            self._idle = {}
+            self._pid = os.getpid()
+            self.stats = collections.Counter()
+
+    def _count(self, **amounts):
+        with self._lock:
+            self.stats.update(amounts)
+
+    def get_stats(self):
+        """Copy of the counters, consistent with each other."""
+        with self._lock:
+            return collections.Counter(self.stats)
+
+    def _new_connection(self, key, timeout):
+        domain, port, scheme = key
+        if scheme == SCHEME_HTTPS:
+            connection = TimedHTTPSConnection(domain, port, timeout=timeout)
+        else:
+            connection = TimedHTTPConnection(domain, port, timeout=timeout)
+        self._count(connections_created=1)
+        return connection
+
+    @staticmethod
+    def _is_dropped(connection):
+        # An idle keep-alive socket must not be readable: if it is, the server
+        # has closed it (EOF) or sent something we did not ask for
+        sock = connection.sock
+        if sock is None:
+            return True
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def _get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            self._check_pid()
+            idle = self._idle.get(key)
+            while idle:
+                connection, released_at = idle.pop()
+                if now - released_at <= self.idle_timeout and not self._is_dropped(connection):
+                    self.stats['connections_reused'] += 1
+                    return connection
+                self.stats['connections_evicted'] += 1
+                connection.close()
+        return None
+
+    def _put(self, key, connection):
+        with self._lock:
+            self._check_pid()
+            idle = self._idle.setdefault(key, collections.deque())
+            if len(idle) >= self.maxsize:
+                connection.close()
+                return
+            idle.append((connection, time.monotonic()))
+
+    def clear(self):
+        """Close all idle connections."""
+        with self._lock:
+            for idle in self._idle.values():
+                for connection, _ in idle:
+                    connection.close()
+            self._idle = {}
+
+    def urlopen(self, domain, port, method, url, body=None, headers=None, timeout=30, timing=None):
+        """Send a request over a pooled connection.
+
+        Returns (response, data): the http.client response and its fully read body,
+        decompressed if the server used gzip or deflate (response.wire_size holds
+        the number of bytes actually received).
+        If a reused connection turns out to be closed by the server, the request
+        is sent once more over a new connection.
+        timing - top.api.timing.RequestTiming that receives the phases, status and wire size.
+        """
+        key = (domain, int(port), get_scheme(port))
+        connection = self._get(key)
+        reused = connection is not None
+        while True:
+            if connection is None:
+                connection = self._new_connection(key, timeout)
+            elif connection.sock is not None:
+                connection.timeout = timeout
+                connection.sock.settimeout(timeout)
+            if timing is not None:
+                timing.dns = timing.connect = timing.tls = 0.0
+                connection.timing = timing
+                started = time.perf_counter()
+            try:
+                connection.request(method, url, body=body, headers=headers or {})
+                response = connection.getresponse()
+                if timing is not None:
+                    received = time.perf_counter()
+                data, wire_size = read_body(response)
+            except _STALE_ERRORS:
+                connection.timing = None
+                connection.close()
+                if not reused:
+                    raise
+                self._count(reconnects=1)
+                connection, reused = None, False
+                continue
+            except Exception:
+                connection.timing = None
+                connection.close()
+                raise
+            if timing is not None:
+                connection.timing = None
+                timing.transfer = time.perf_counter() - received
+                # Time to the status line, without connection setup: request upload plus server processing
+                timing.server = received - started - timing.dns - timing.connect - timing.tls
+                timing.reused = reused
+                timing.status = response.status
+                timing.response_bytes = wire_size
+            self._count(requests=1, response_bytes_wire=wire_size, response_bytes_decoded=len(data))
+            response.wire_size = wire_size
+            if response.will_close or connection.sock is None:
+                connection.close()
+            else:
+                self._put(key, connection)
+            return response, data
+
+
+_default_pool = ConnectionPool()
+
+
+def get_default_pool():
+    return _default_pool
+
+
+def set_default_pool(pool):
+    global _default_pool
+    _default_pool = pool
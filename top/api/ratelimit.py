@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Token-bucket rate limiting of TOP calls.
+
+A RateLimiter holds one bucket per app key and, optionally, one bucket per
+(app key, API method). Every call takes a token from both. A caller that
+finds a bucket empty reserves its token anyway (the bucket goes negative) and
+sleeps until the token is due, so concurrent callers queue up fairly.
+
+Bucket state lives in a backend: MemoryBackend for threads of one process,
+FileBackend to share the quota between processes through a locked file.
+
+The default limiter (set_default_limiter) is applied to RestApi.getResponse,
+top.api.client.Client and top.api.aio.AsyncClient; Client can also be given
+its own limiter.
+"""
+
+import json
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class MemoryBackend(object):
+    """Bucket state kept in memory, shared by the threads of one process."""
+
+    # reserve() does no I/O: an event loop may call it directly
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def __getstate__(self):
+        # Another process has its own memory: a copy starts with full buckets
+        return {}
+
+    def __setstate__(self, state):
+        self.__init__()
+
+    def reserve(self, requests, now):
+        """Take one token from each bucket. requests - list of (key, rate, capacity).
+
+        Returns the number of seconds to wait until all the tokens are due.
+        """
+        with self._lock:
+            return _reserve(self._buckets, requests, now)
+
+
+class FileBackend(object):
+    """Bucket state kept in a JSON file under an exclusive lock, shared by processes.
+
+    The clock is time.time() so that all processes agree on it.
+    """
+
+    # reserve() locks and rewrites a file: asyncio callers run it in an executor
+    blocking = True
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def reserve(self, requests, now):
+        with self._lock, open(self.path, 'a+b') as handle:
+            _lock_file(handle)
+            try:
+                handle.seek(0)
+                content = handle.read()
+                try:
+                    buckets = {key: tuple(value) for key, value in json.loads(content).items()} if content else {}
+                except ValueError:
+                    buckets = {}
+                wait = _reserve(buckets, requests, now)
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(buckets).encode('utf-8'))
+                handle.flush()
+            finally:
+                _unlock_file(handle)
+        return wait
+
+
+def _lock_file(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _reserve(buckets, requests, now):
+    # buckets: key -> (tokens, updated); tokens below zero are reservations of waiting callers
+    wait = 0.0
+    for key, rate, capacity in requests:
+        tokens, updated = buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate) - 1
+        buckets[key] = (tokens, now)
+        if tokens < 0:
+            wait = max(wait, -tokens / rate)
+    return wait
+
+
+class RateLimiter(object):
+    """Limits calls per app key and per API method.
+
+    rate - calls per second allowed for one app key, None for no app-wide limit;
+    burst - bucket size for the app key limit, defaults to max(1, rate);
+    method_rates - dict of API method name to calls per second;
+    method_burst - bucket size for method limits, defaults to max(1, rate);
+    backend - MemoryBackend (default) or FileBackend.
+    """
+
+    def __init__(self, rate=None, burst=None, method_rates=None, method_burst=None, backend=None):
+        self.rate = rate
+        self.burst = burst
+        self.method_rates = dict(method_rates or {})
+        self.method_burst = method_burst
+        self.backend = backend if backend is not None else MemoryBackend()
+        self._stats_lock = threading.Lock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_stats_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._stats_lock = threading.Lock()
+
+    def set_rate(self, rate, method=None):
+        """Change the app-wide rate, or the rate of one API method."""
+        if method is None:
+            self.rate = rate
+        elif rate is None:
+            self.method_rates.pop(method, None)
+        else:
+            self.method_rates[method] = rate
+
+    def get_rate(self, method=None):
+        if method is None:
+            return self.rate
+        return self.method_rates.get(method)
+
+    def _bucket_requests(self, app_key, method):
+        requests = []
+        if self.rate:
+            requests.append(('app:%s' % app_key, self.rate, self.burst or max(1.0, self.rate)))
+        method_rate = self.method_rates.get(method)
+        if method_rate:
+            requests.append(('method:%s:%s' % (app_key, method), method_rate,
+                             self.method_burst or max(1.0, method_rate)))
+        return requests
+
+    def reserve(self, app_key, method):
+        """Reserve a call and return how many seconds the caller must wait before making it."""
+        requests = self._bucket_requests(app_key, method)
+        if not requests:
+            return 0.0
+        wait = self.backend.reserve(requests, time.time())
+        if wait > 0:
+            with self._stats_lock:
+                self.waits += 1
+                self.wait_seconds += wait
+        return wait
+
+    def acquire(self, app_key, method):
+        """Block until a call is allowed. Returns the number of seconds waited."""
+        wait = self.reserve(app_key, method)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+_default_limiter = None
+
+
+def get_default_limiter():
+    return _default_limiter
+
+
+def set_default_limiter(limiter):
+    global _default_limiter
+    _default_limiter = limiter
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Retry policies for TOP calls.
+
+A RetryPolicy decides, after every attempt, whether the call is sent again
+and after what delay. The decision is made on the ERROR_* class of the outcome
+(see top.api.errors), so transport failures, HTTP 5xx, backend overload and
+call limits are retried while invalid sessions and bad parameters are not.
+
+Delays grow exponentially with "equal jitter": half of the delay is fixed and
+the other half random, so that workers that failed together do not retry
+together. A call also stops being retried when its deadline would be passed
+or when the shared RetryBudget is exhausted.
+
+    policy = RetryPolicy(max_attempts=4, backoff=1.0, deadline=60, budget=RetryBudget())
+    client = Client(appinfo, domain, port, retry=policy)
+"""
+
+import collections
+import random
+import threading
+import time
+
+from top.api.errors import (ERROR_CALL_LIMIT, ERROR_FLOW_CONTROL, ERROR_HTTP_SERVER, ERROR_OVERLOAD,
+                            ERROR_SERVICE, ERROR_TIMESTAMP, ERROR_TRANSPORT)
+
+# Error classes retried by default
+RETRYABLE_ERRORS = frozenset((ERROR_TRANSPORT, ERROR_HTTP_SERVER, ERROR_SERVICE, ERROR_OVERLOAD,
+                              ERROR_CALL_LIMIT, ERROR_FLOW_CONTROL, ERROR_TIMESTAMP))
+
+
+class RetryRule(object):
+    """Settings for one error class that differ from the policy defaults; None keeps the default.
+
+    max_attempts - total number of attempts, 1 disables retries for the class;
+    backoff - delay before the first retry, seconds.
+    """
+
+    def __init__(self, max_attempts=None, backoff=None):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+
+
+# Call limits and flow control need more time to clear than a dropped connection
+DEFAULT_RULES = {
+    ERROR_CALL_LIMIT: RetryRule(backoff=2.0),
+    ERROR_FLOW_CONTROL: RetryRule(backoff=2.0),
+    ERROR_OVERLOAD: RetryRule(backoff=1.0),
+}
+
+
+class RetryBudget(object):
+    """Caps retries at a share of all calls, shared by every call that uses it.
+
+    Each call deposits `ratio` tokens, each retry takes one; the balance starts at
+    and never exceeds `min_retries`, so short runs can always retry a little while
+    a long outage cannot turn into `max_attempts` times the normal traffic.
+    """
+
+    def __init__(self, ratio=0.2, min_retries=10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self._balance = float(min_retries)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._balance = min(self.min_retries, self._balance + self.ratio)
+
+    def withdraw(self):
+        """Take a token for one retry. Returns False if the budget is exhausted."""
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+class RetryPolicy(object):
+    """When and how soon a failed call is sent again.
+
+    max_attempts - total number of attempts including the first one;
+    backoff - delay before the first retry, seconds; multiplied by `multiplier`
+        for every further retry and capped at `max_backoff`;
+    jitter - randomise the second half of every delay;
+    deadline - seconds a call may take including all retries and delays, None for no limit;
+    retry_on - error classes that are retried, RETRYABLE_ERRORS by default;
+    rules - dict of error class to RetryRule, added to DEFAULT_RULES;
+    budget - RetryBudget shared by the calls of this policy, None for no budget.
+
+    stats counts attempts, retries by error class and the reasons retries stopped.
+    """
+
+    def __init__(self, max_attempts=3, backoff=0.5, multiplier=2.0, max_backoff=30.0, jitter=True,
+                 deadline=None, retry_on=RETRYABLE_ERRORS, rules=None, budget=None):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.multiplier = multiplier
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retry_on = frozenset(retry_on)
+        self.rules = dict(DEFAULT_RULES)
+        self.rules.update(rules or {})
+        self.budget = budget
+        self._stats_lock = threading.Lock()
+        self.stats = collections.Counter()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_stats_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def start(self):
+        """Begin a call. Returns the RetryState that decides about its attempts."""
+        if self.budget is not None:
+            self.budget.deposit()
+        return RetryState(self)
+
+    def get_delay(self, error_class, retry_number):
+        """Delay before retry number `retry_number` (1 for the first retry) of an error class."""
+        rule = self.rules.get(error_class)
+        backoff = rule.backoff if rule is not None and rule.backoff is not None else self.backoff
+        delay = min(self.max_backoff, backoff * self.multiplier ** (retry_number - 1))
+        if self.jitter:
+            delay = delay / 2 + random.uniform(0, delay / 2)
+        return delay
+
+    def get_max_attempts(self, error_class):
+        rule = self.rules.get(error_class)
+        if rule is not None and rule.max_attempts is not None:
+            return rule.max_attempts
+        return self.max_attempts
+
+
+class RetryState(object):
+    """Attempts of one call made under a RetryPolicy."""
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.attempt = 0
+        self.started = time.monotonic()
+
+    def next_delay(self, error_class):
+        """Record the outcome of an attempt: error_class is an ERROR_* class, None for success.
+
+        Returns the number of seconds to wait before the next attempt,
+        or None if the call must not be sent again.
+        """
+        policy = self.policy
+        self.attempt += 1
+        policy._count('attempts')
+        if error_class is None:
+            return None
+        if error_class not in policy.retry_on:
+            policy._count('not_retryable')
+            return None
+        if self.attempt >= policy.get_max_attempts(error_class):
+            policy._count('attempts_exhausted')
+            return None
+        delay = policy.get_delay(error_class, self.attempt)
+        if policy.deadline is not None and time.monotonic() - self.started + delay > policy.deadline:
+            policy._count('deadline_exceeded')
+            return None
+        if policy.budget is not None and not policy.budget.withdraw():
+            policy._count('budget_exhausted')
+            return None
+        policy._count('retries')
+        policy._count('retries_' + error_class)
+        return delay
+
+
+def as_retry_policy(retry):
+    """Return a RetryPolicy for a retry argument: a policy, or the number of extra attempts
+    after a transport error (the former meaning of Client(retry=n))."""
+    if isinstance(retry, RetryPolicy):
+        return retry
+    return RetryPolicy(max_attempts=int(retry or 0) + 1, backoff=0, jitter=False, retry_on=(ERROR_TRANSPORT,))
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptive (AIMD) throttling driven by gateway error codes.
+
+AdaptiveThrottle is a ClientHook: it looks at the outcome of every attempt a
+Client makes, retries and raised errors included, and steers the RateLimiter
+of that client. When the gateway reports call
+limits, flow control or an overloaded backend (see top.api.errors) the rate
+of the API is multiplied by `decrease`; every successful call adds `increase`
+calls per second back, up to the rate configured at the start.
+
+The same feedback drives a batch size for batch APIs: it is cut on overload
+and grows by one after every `batch_window` successful calls. Callers read it
+with get_batch_size() when they split their data.
+
+    limiter = RateLimiter(rate=0.5)
+    throttle = AdaptiveThrottle(limiter, batch_sizes={'aliexpress.solution.batch.product.price.update': 15})
+    client = Client(appinfo, domain, port, limiter=limiter, hooks=[throttle])
+"""
+
+import collections
+import threading
+import time
+
+from top.api.errors import THROTTLE_ERRORS
+from top.api.hooks import ClientHook
+
+
+class AdaptiveThrottle(ClientHook):
+    """Additive-increase/multiplicative-decrease control of request rate and batch size.
+
+    limiter - top.api.ratelimit.RateLimiter whose rates are adjusted; the rate of an
+        API method is used when the limiter has one, the app-wide rate otherwise;
+    min_rate, max_rate - bounds of the rate in calls per second, max_rate defaults
+        to the rate the limiter had when it was first adjusted;
+    increase - calls per second added after each successful call;
+    decrease - factor applied to the rate and batch size on overload;
+    cooldown - seconds after a decrease during which further overload errors of
+        the same method are not counted again (they come from requests already in flight);
+    batch_sizes - dict of API method name to initial batch size;
+    max_batch_sizes - dict of API method name to maximum batch size, defaults to the initial one;
+    min_batch_size - smallest batch size;
+    batch_window - successful calls needed to grow a batch size by one.
+    """
+
+    def __init__(self, limiter, min_rate=0.01, max_rate=None, increase=0.01, decrease=0.5, cooldown=1.0,
+                 batch_sizes=None, max_batch_sizes=None, min_batch_size=1, batch_window=5):
+        self.limiter = limiter
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.batch_sizes = dict(batch_sizes or {})
+        self.max_batch_sizes = dict(self.batch_sizes)
+        self.max_batch_sizes.update(max_batch_sizes or {})
+        self.min_batch_size = min_batch_size
+        self.batch_window = batch_window
+        self._lock = threading.Lock()
+        self._max_rates = {}
+        self._last_decrease = {}
+        self._successes = collections.Counter()
+        self.stats = collections.Counter()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def after_attempt(self, request, attempt, elapsed, outcome):
+        # Every attempt counts: an overload error followed by a successful retry is still an overload signal
+        self.record(request.getapiname(), outcome)
+
+    def _rate_key(self, method):
+        # The method rate is adjusted when the limiter has one, otherwise the app-wide rate
+        return method if self.limiter.get_rate(method) is not None else None
+
+    def record(self, method, error_class=None):
+        """Feed the outcome of one call: error_class is an ERROR_* class, None for success.
+
+        Returns True if the call was an overload signal that reduced the limits.
+        """
+        if error_class in THROTTLE_ERRORS:
+            return self._decrease(method, error_class)
+        if error_class is None:
+            self._increase(method)
+        return False
+
+    def _decrease(self, method, error_class):
+        now = time.monotonic()
+        with self._lock:
+            self.stats[error_class] += 1
+            if now - self._last_decrease.get(method, float('-inf')) < self.cooldown:
+                return False
+            self._last_decrease[method] = now
+            self._successes[method] = 0
+            key = self._rate_key(method)
+            rate = self.limiter.get_rate(key)
+            if rate:
+                self._max_rates.setdefault(key, self.max_rate or rate)
+                self.limiter.set_rate(max(self.min_rate, rate * self.decrease), key)
+            if method in self.batch_sizes:
+                self.batch_sizes[method] = max(self.min_batch_size, int(self.batch_sizes[method] * self.decrease))
+            self.stats['decreases'] += 1
+        return True
+
+    def _increase(self, method):
+        with self._lock:
+            key = self._rate_key(method)
+            rate = self.limiter.get_rate(key)
+            max_rate = self._max_rates.get(key)
+            if rate and max_rate is not None and rate < max_rate:
+                self.limiter.set_rate(min(max_rate, rate + self.increase), key)
+                self.stats['increases'] += 1
+            if method in self.batch_sizes and self.batch_sizes[method] < self.max_batch_sizes[method]:
+                self._successes[method] += 1
+                if self._successes[method] >= self.batch_window:
+                    self._successes[method] = 0
+                    self.batch_sizes[method] += 1
+
+    def get_batch_size(self, method, default=None):
+        """Current batch size for an API method."""
+        with self._lock:
+            return self.batch_sizes.get(method, default)
+
+    def get_metrics(self):
+        """Current limits and event counters, e.g. for logging or a metrics exporter.
+
+        Returns a dict with 'rate' (app-wide calls per second), 'method_rates',
+        'batch_sizes' and the counters of decreases, increases and overload
+        signals by error class.
+        """
+        with self._lock:
+            metrics = {'rate': self.limiter.get_rate(),
+                       'method_rates': dict(self.limiter.method_rates),
+                       'batch_sizes': dict(self.batch_sizes)}
+            metrics.update(self.stats)
+        return metrics
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Per-request phase timing.
+
+When timing hooks are registered, every call records where its time went in
+a RequestTiming and passes it to ClientHook.on_timing(request, timing):
+
+    dns, connect, tls - only for calls that opened a new connection;
+    server - from sending the request to the first response line, less the above;
+    transfer - reading (and decompressing) the response body;
+    decode - JSON decoding in _parse_response;
+    total - the whole call.
+
+RestApi.getResponse uses the hooks given to set_timing_hooks(); Client uses
+those plus its own hooks that override on_timing. Without any such hook no
+timer is read and no record is created.
+
+    class SlowCalls(ClientHook):
+        def on_timing(self, request, timing):
+            if timing.total > 1:
+                print(timing.as_dict())
+
+    set_timing_hooks([SlowCalls()])
+"""
+
+import logging
+
+from top.api.hooks import ClientHook
+
+
+class RequestTiming(object):
+    """Timing record of one call; durations are in seconds."""
+
+    __slots__ = ('method', 'dns', 'connect', 'tls', 'server', 'transfer', 'decode', 'total',
+                 'request_bytes', 'response_bytes', 'decoded_bytes', 'status', 'error_code', 'sub_code',
+                 'application_host', 'location_host', 'reused', 'error')
+
+    def __init__(self, method):
+        self.method = method
+        self.dns = self.connect = self.tls = 0.0
+        self.server = self.transfer = self.decode = self.total = 0.0
+        self.request_bytes = self.response_bytes = self.decoded_bytes = 0
+        self.status = None
+        self.error_code = self.sub_code = None
+        self.application_host = self.location_host = None
+        self.reused = False
+        self.error = None
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return 'RequestTiming(%s)' % ', '.join('%s=%r' % item for item in self.as_dict().items())
+
+
+def body_size(body):
+    """Size in bytes of a request body: bytes, str or an object with get_content_length() (MultiPartForm)."""
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    return body.get_content_length()
+
+
+def overrides_on_timing(hook):
+    return type(hook).on_timing is not ClientHook.on_timing
+
+
+class TimingLogger(ClientHook):
+    """Writes every timing record to the 'top.api.timing' logger; calls slower than
+    slow_seconds are logged as warnings, the others at DEBUG level."""
+
+    def __init__(self, slow_seconds=None):
+        self.slow_seconds = slow_seconds
+        self.logger = logging.getLogger('top.api.timing')
+
+    def __getstate__(self):
+        return {'slow_seconds': self.slow_seconds}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def on_timing(self, request, timing):
+        slow = self.slow_seconds is not None and timing.total >= self.slow_seconds
+        level = logging.WARNING if slow else logging.DEBUG
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, '%s status=%s code=%s sub_code=%s total=%.3f dns=%.3f connect=%.3f tls=%.3f '
+                                   'server=%.3f transfer=%.3f decode=%.3f sent=%d received=%d/%d reused=%s host=%s/%s',
+                            timing.method, timing.status, timing.error_code, timing.sub_code, timing.total,
+                            timing.dns, timing.connect, timing.tls, timing.server, timing.transfer, timing.decode,
+                            timing.request_bytes, timing.response_bytes, timing.decoded_bytes, timing.reused,
+                            timing.application_host, timing.location_host)
+
+
+_timing_hooks = ()
+
+
+def get_timing_hooks():
+    return _timing_hooks
+
+
+def set_timing_hooks(hooks):
+    """Hooks whose on_timing() receives the timing of every RestApi.getResponse call; None or [] to disable."""
+    global _timing_hooks
+    _timing_hooks = tuple(hook for hook in (hooks or ()) if overrides_on_timing(hook))
@@ -1,22 +1,303 @@
+import argparse
 import json
 import requests
 import top.api
 import pandas as pd
-from multiprocessing import Pool
 from dotenv import dotenv_values
-import time
+import collections
+import concurrent.futures
 import csv
 import datetime
 import os
+import sqlite3
+import time
 import traceback
 
 
 class Utils:
+    # Методы API пакетного обновления цен и остатков
+    BATCH_UPDATE_METHODS = ('aliexpress.solution.batch.product.price.update',
+                            'aliexpress.solution.batch.product.inventory.update')
+    # Ошибки отправки запроса, оставшиеся после всех повторных попыток клиента
+    REQUEST_ERRORS = top.api.errors.TRANSPORT_ERRORS + (top.api.base.RequestException,)
+    # Общий для процесса пул потоков для параллельных запросов к API (Utils.get_io_executor)
+    io_executor = None
+
+    @staticmethod
+    def get_io_executor(config_):
+        """
+        Функция возвращает общий пул потоков для запросов к API AliExpress, создавая его при первом вызове.
+        Запросы ждут ответа сети, поэтому потоков достаточно: не нужно запускать процессы и копировать
+        в них объекты обработчиков. Клиент TOP API потокобезопасен, частоту запросов ограничивает его регулятор.
+        - AE_IO_WORKERS - максимальное количество одновременных запросов (по умолчанию 10).
+        Пул закрывается процедурой Utils.shutdown_io_executor в конце работы.
+        """
+        if Utils.io_executor is None:
+            Utils.io_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=int(config_.get("AE_IO_WORKERS") or 10), thread_name_prefix='ae-io')
+        return Utils.io_executor
+
+    @staticmethod
+    def create_catalog_store(config_):
+        """
+        Функция создает каталог товаров и SKU (AECatalogStore) в файле AE_CATALOG_FILE
+        (по умолчанию ae_catalog.sqlite3).
+        """
+        return AECatalogStore(config_.get("AE_CATALOG_FILE") or 'ae_catalog.sqlite3')
+
+    @staticmethod
+    def create_work_queue(config_):
+        """
+        Функция создает постоянную очередь заданий (AEWorkQueue) для возобновляемого сбора данных.
+        - AE_QUEUE_FILE - файл базы данных очереди (по умолчанию ae_work_queue.sqlite3);
+        - AE_QUEUE_MAX_ATTEMPTS - количество попыток, после которого товар не запрашивается (по умолчанию 5);
+        - AE_QUEUE_BACKOFF - пауза перед повторным запросом товара после первой неудачи, сек. (по умолчанию 30).
+        """
+        return AEWorkQueue(config_.get("AE_QUEUE_FILE") or 'ae_work_queue.sqlite3',
+                           max_attempts=int(config_.get("AE_QUEUE_MAX_ATTEMPTS") or 5),
+                           backoff=float(config_.get("AE_QUEUE_BACKOFF") or 30))
+
+    @staticmethod
+    def iter_completed(executor, function, items, max_in_flight):
+        """
+        Генератор выполняет function(item) для каждого элемента items в пуле потоков executor и возвращает пары
+        (item, результат) по мере завершения. Одновременно выполняется не более max_in_flight вызовов,
+        поэтому задачи не накапливаются в очереди пула и несколько обработчиков могут делить один пул.
+        """
+        items = iter(items)
+        in_flight = {}
+        while True:
+            for item in items:
+                in_flight[executor.submit(function, item)] = item
+                if len(in_flight) >= max_in_flight:
+                    break
+            if not in_flight:
+                return
+            done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield in_flight.pop(future), future.result()
+
+    @staticmethod
+    def shutdown_io_executor():
+        """
+        Процедура дожидается завершения запущенных запросов и закрывает общий пул потоков.
+        """
+        if Utils.io_executor is not None:
+            Utils.io_executor.shutdown(wait=True)
+            Utils.io_executor = None
 
     @staticmethod
     def load_env():
         return dotenv_values('.env')
 
+    @staticmethod
+    def create_ae_client(config_, throttle=None, hooks=None, breaker=None):
+        """
+        Функция создает клиент TOP API с настройками подключения к AliExpress из конфигурации.
+        Клиент хранит ключи приложения и адрес сервера, поэтому объекты запросов несут только параметры.
+        Один клиент используется для всех запросов и может разделяться между потоками.
+        Ответы разбираются лениво: из JSON декодируются только те ветки, к которым обращается код
+        (описание товара и прочие неиспользуемые поля не превращаются в объекты Python).
+        Если передан throttle (Utils.create_throttle), клиент использует его ограничитель частоты
+        и сообщает ему о каждом ответе сервера. hooks - дополнительные обработчики top.api.ClientHook.
+        breaker - автоматический выключатель (Utils.create_circuit_breaker).
+        """
+        hooks = list(hooks or [])
+        if throttle is None:
+            limiter = Utils.create_rate_limiter(config_)
+        else:
+            limiter = throttle.limiter
+            hooks.append(throttle)
+        return top.api.Client(top.appinfo(config_.get("AE_APPKEY"), config_.get("AE_APPSECRET")),
+                              config_.get("AE_DOMAIN"),
+                              config_.get("AE_PORT"),
+                              lazy_response=True,
+                              limiter=limiter,
+                              hooks=hooks,
+                              retry=Utils.create_retry_policy(config_),
+                              breaker=breaker,
+                              cache=Utils.create_response_cache(config_),
+                              clock=Utils.create_server_clock(config_))
+
+    @staticmethod
+    def create_server_clock(config_):
+        """
+        Функция возвращает часы шлюза (top.api.ServerClock), по которым ставится метка времени запросов.
+        Клиент измеряет расхождение локальных часов с часами шлюза запросом taobao.time.get перед первым
+        запросом, затем каждые AE_CLOCK_SYNC_INTERVAL секунд (по умолчанию 3600) и сразу после ошибки
+        31 (Invalid timestamp), поэтому запросы не отклоняются при уходе часов сервера.
+        Часы общие для всех клиентов процесса (часы по умолчанию top.api).
+        """
+        clock = top.api.get_default_clock()
+        clock.interval = float(config_.get("AE_CLOCK_SYNC_INTERVAL") or 3600)
+        return clock
+
+    @staticmethod
+    def create_metrics_hook(throttle, breaker, component):
+        """
+        Функция создает обработчик top.api.MetricsHook, который записывает в общий реестр метрик
+        количество запросов, повторных попыток и время ответа по методам API.
+        Ожидания ограничителя частоты, текущие лимиты регулятора и состояние выключателя
+        копируются в реестр перед каждой выгрузкой метрик; component - метка ('collector' или 'updater').
+        """
+        registry = top.api.get_default_registry()
+        registry.add_collector(lambda registry_: Utils.collect_client_metrics(registry_, component, throttle, breaker))
+        return top.api.MetricsHook(registry)
+
+    @staticmethod
+    def collect_client_metrics(registry, component, throttle, breaker):
+        registry.counter('ae_throttle_waits_total', 'Calls delayed by the rate limiter.',
+                         ('component',)).set(throttle.limiter.waits, component=component)
+        registry.counter('ae_throttle_wait_seconds_total', 'Time spent waiting for the rate limiter.',
+                         ('component',)).set(throttle.limiter.wait_seconds, component=component)
+        rate_limit = registry.gauge('ae_rate_limit', 'Current calls per second allowed by the throttle.',
+                                    ('component', 'method'))
+        metrics = throttle.get_metrics()
+        if metrics['rate'] is not None:
+            rate_limit.set(metrics['rate'], component=component, method='*')
+        for method, rate in metrics['method_rates'].items():
+            rate_limit.set(rate, component=component, method=method)
+        batch_size = registry.gauge('ae_batch_size', 'Current products per batch update.', ('component', 'method'))
+        for method, size in metrics['batch_sizes'].items():
+            batch_size.set(size, component=component, method=method)
+        circuit_open = registry.gauge('ae_circuit_open', '1 while calls to an API method are refused by the breaker.',
+                                      ('component', 'method'))
+        for (_, method), state in breaker.get_states().items():
+            circuit_open.set(int(state != 'closed'), component=component, method=method)
+
+    @staticmethod
+    def start_metrics_server(config_):
+        """
+        Функция запускает HTTP-сервер метрик в формате Prometheus (http://127.0.0.1:AE_METRICS_PORT/metrics),
+        если задан AE_METRICS_PORT. Сервер нужен для долгих запусков; по окончании запуска метрики
+        в любом случае записываются в файл (Utils.write_metrics).
+        """
+        port = config_.get("AE_METRICS_PORT")
+        if not port:
+            return None
+        return top.api.start_http_server(top.api.get_default_registry(), int(port),
+                                         config_.get("AE_METRICS_HOST") or '127.0.0.1')
+
+    @staticmethod
+    def write_metrics(config_, started):
+        """
+        Процедура записывает метрики запуска в формате Prometheus в файл AE_METRICS_FILE
+        (по умолчанию ae_metrics.prom). started - время начала запуска, time.time().
+        """
+        registry = top.api.get_default_registry()
+        finished = time.time()
+        registry.gauge('ae_run_start_timestamp_seconds', 'Start time of the last run.').set(started)
+        registry.gauge('ae_run_end_timestamp_seconds', 'End time of the last run.').set(finished)
+        registry.gauge('ae_run_duration_seconds', 'Duration of the last run.').set(finished - started)
+        registry.write(config_.get("AE_METRICS_FILE") or 'ae_metrics.prom')
+
+    @staticmethod
+    def create_response_cache(config_):
+        """
+        Функция создает кэш ответов справочных методов API (категории, атрибуты, шаблоны доставки, регионы).
+        Кэш включается, только если задан AE_CACHE_DIR - папка для хранения ответов между запусками;
+        время жизни записей задано для каждого метода в top.api.REFERENCE_API_TTLS.
+        """
+        cache_dir = config_.get("AE_CACHE_DIR")
+        if not cache_dir:
+            return None
+        return top.api.ResponseCache(top.api.REFERENCE_API_TTLS, directory=cache_dir)
+
+    @staticmethod
+    def create_circuit_breaker(config_, logger):
+        """
+        Функция создает автоматический выключатель запросов для каждой пары (сервер, метод API).
+        После AE_BREAKER_FAILURES (по умолчанию 5) ошибок сервера подряд запросы к методу не отправляются
+        (клиент сразу вызывает top.api.CircuitOpenError) в течение AE_BREAKER_RECOVERY секунд (по умолчанию 60),
+        затем отправляется пробный запрос. Смена состояния пишется в лог.
+        """
+        return top.api.CircuitBreaker(failure_threshold=int(config_.get("AE_BREAKER_FAILURES") or 5),
+                                      recovery_timeout=float(config_.get("AE_BREAKER_RECOVERY") or 60),
+                                      listeners=[logger.log_circuit_state])
+
+    @staticmethod
+    def create_retry_policy(config_):
+        """
+        Функция создает политику повторных попыток запросов к TOP API.
+        Повторяются ошибки соединения, таймауты, HTTP 5xx, ошибки сервиса и перегрузка шлюза,
+        с экспоненциально растущей паузой и случайным разбросом. Ошибки сессии и параметров не повторяются.
+        - AE_RETRY_ATTEMPTS - общее количество попыток (по умолчанию 3);
+        - AE_RETRY_BACKOFF - пауза перед первой повторной попыткой, сек. (по умолчанию 2);
+        - AE_RETRY_DEADLINE - предельное время выполнения запроса со всеми попытками, сек. (по умолчанию 120).
+        Доля повторных попыток ограничена бюджетом (не более 20% от числа запросов после первых 10 повторов).
+        """
+        return top.api.RetryPolicy(max_attempts=int(config_.get("AE_RETRY_ATTEMPTS") or 3),
+                                   backoff=float(config_.get("AE_RETRY_BACKOFF") or 2),
+                                   deadline=float(config_.get("AE_RETRY_DEADLINE") or 120),
+                                   budget=top.api.RetryBudget())
+
+    @staticmethod
+    def create_throttle(config_):
+        """
+        Функция создает адаптивный регулятор (AIMD) частоты запросов и размера порций обновления.
+        При ошибках перегрузки шлюза (лимит вызовов, flow control, "HSF Provider thread pool is full")
+        частота запросов и размер порции уменьшаются вдвое, при успешных ответах - постепенно растут
+        до исходных значений.
+        - AE_BATCH_SIZE - начальное количество товаров в порции обновления (по умолчанию 15);
+        - AE_MAX_BATCH_SIZE - максимальное количество товаров в порции (по умолчанию 20, ограничение AliExpress).
+        """
+        batch_size = int(config_.get("AE_BATCH_SIZE") or 15)
+        max_batch_size = int(config_.get("AE_MAX_BATCH_SIZE") or 20)
+        return top.api.AdaptiveThrottle(
+            Utils.create_rate_limiter(config_),
+            batch_sizes={name: batch_size for name in Utils.BATCH_UPDATE_METHODS},
+            max_batch_sizes={name: max_batch_size for name in Utils.BATCH_UPDATE_METHODS})
+
+    @staticmethod
+    def create_rate_limiter(config_):
+        """
+        Функция создает ограничитель частоты запросов к TOP API (token bucket) вместо пауз time.sleep.
+        - AE_RATE_LIMIT - запросов в секунду на ключ приложения (по умолчанию 0.5, как прежняя пауза 2 сек);
+        - AE_BATCH_RATE_LIMIT - запросов в секунду для пакетного обновления цен и остатков
+          (по умолчанию 0.25, как прежняя пауза 4 сек);
+        - AE_RATE_LIMIT_FILE - файл состояния, через который квоту делят одновременно запущенные процессы.
+        """
+        batch_rate = float(config_.get("AE_BATCH_RATE_LIMIT") or 0.25)
+        backend = top.api.FileBackend(config_.get("AE_RATE_LIMIT_FILE") or 'ae_rate_limit.json')
+        return top.api.RateLimiter(
+            rate=float(config_.get("AE_RATE_LIMIT") or 0.5),
+            method_rates={name: batch_rate for name in Utils.BATCH_UPDATE_METHODS},
+            backend=backend)
+
+
+class AEProgress:
+    """
+    Счетчик прогресса долгой операции: не чаще раза в interval секунд пишет в лог количество обработанных
+    элементов, скорость и оценку оставшегося времени.
+    """
+
+    def __init__(self, logger, title, total, interval=60):
+        self.logger = logger
+        self.title = title
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.started = time.monotonic()
+        self.logged = self.started
+
+    def update(self, count=1):
+        self.done += count
+        now = time.monotonic()
+        if now - self.logged >= self.interval or self.done == self.total:
+            self.logged = now
+            self.logger.process_log_message(self.format_message(now))
+
+    def format_message(self, now):
+        elapsed = now - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        if self.done >= self.total:
+            eta = "завершено"
+        elif rate > 0:
+            eta = f"осталось ~{datetime.timedelta(seconds=int((self.total - self.done) / rate))}"
+        else:
+            eta = "оценка времени недоступна"
+        return f"{self.title}: {self.done} из {self.total}, {rate:.2f} в сек., {eta}"
+
 
 class AELogger:
     """
@@ -60,6 +341,14 @@ class AELogger:
         else:
             pass
 
+    def log_circuit_state(self, key, old_state, new_state):
+        """
+        Обработчик смены состояния автоматического выключателя (top.api.CircuitBreaker) для пары (сервер, метод API).
+        open - запросы к методу не отправляются до истечения паузы восстановления;
+        half_open - отправляется пробный запрос; closed - метод снова работает.
+        """
+        self.process_log_message(f"Состояние доступа к {key[1]} на {key[0]}: {old_state} -> {new_state}")
+
     def write_message_to_file(self, message='Неизвестная ошибка!'):
         """
         Процедура записывает сообщение в локальный файл лога.
@@ -98,6 +387,359 @@ class AELogger:
         z = 0
 
 
+class AEWorkQueue:
+    """
+    Постоянная (SQLite) очередь заданий: идентификаторы, которые нужно обработать, с количеством попыток.
+    Каждое изменение сразу записывается в базу, поэтому после аварийного завершения работа продолжается
+    с того места, где остановилась: выполненные задания не повторяются, их результаты хранятся в очереди.
+        path - файл базы данных;
+        max_attempts - количество неудачных попыток, после которого задание переносится в "мертвые" (dead);
+        backoff - пауза перед повторной попыткой после первой неудачи, сек.; удваивается с каждой попыткой
+                  до max_backoff.
+    Задания хранятся по очередям (queue) - строкам, например 'product_info'.
+    Объект используется из одного потока.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_DEAD = 'dead'
+
+    def __init__(self, path, max_attempts=5, backoff=30, max_backoff=3600):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.connection = sqlite3.connect(path)
+        # WAL: запись каждого задания не переписывает базу целиком и переживает аварийное завершение
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS work_items ("
+                " queue TEXT NOT NULL,"
+                " item TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " next_attempt_at REAL NOT NULL DEFAULT 0,"
+                " last_error TEXT,"
+                " result TEXT,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (queue, item))")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS work_items_due ON work_items (queue, status, next_attempt_at)")
+
+    def close(self):
+        self.connection.close()
+
+    def add(self, queue, items):
+        """
+        Процедура добавляет задания в очередь; задания, которые уже есть в очереди (в любом статусе), не меняются.
+        """
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO work_items (queue, item, status, updated_at) VALUES (?, ?, ?, ?)",
+                [(queue, str(item), self.STATUS_PENDING, now) for item in items])
+
+    def take_due(self, queue, limit=None):
+        """
+        Функция возвращает список заданий очереди, время повторной попытки которых наступило.
+        """
+        rows = self.connection.execute(
+            "SELECT item FROM work_items WHERE queue = ? AND status = ? AND next_attempt_at <= ?"
+            " ORDER BY next_attempt_at, item LIMIT ?",
+            (queue, self.STATUS_PENDING, time.time(), -1 if limit is None else limit))
+        return [row[0] for row in rows]
+
+    def complete(self, queue, item, result=None):
+        """
+        Процедура отмечает задание выполненным и сохраняет его результат (объект, сериализуемый в JSON).
+        """
+        with self.connection:
+            self.connection.execute(
+                "UPDATE work_items SET status = ?, attempts = attempts + 1, result = ?, last_error = NULL,"
+                " updated_at = ? WHERE queue = ? AND item = ?",
+                (self.STATUS_DONE, json.dumps(result), time.time(), queue, str(item)))
+
+    def fail(self, queue, item, error=None):
+        """
+        Процедура записывает неудачную попытку выполнить задание. Следующая попытка откладывается
+        (backoff, 2 * backoff, 4 * backoff ... не более max_backoff), после max_attempts попыток
+        задание становится "мертвым" и больше не выдается.
+        Возвращает True, если задание перенесено в "мертвые".
+        """
+        row = self.connection.execute("SELECT attempts FROM work_items WHERE queue = ? AND item = ?",
+                                      (queue, str(item))).fetchone()
+        attempts = (row[0] if row is not None else 0) + 1
+        dead = attempts >= self.max_attempts
+        next_attempt_at = time.time() + min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+        with self.connection:
+            self.connection.execute(
+                "UPDATE work_items SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ?"
+                " WHERE queue = ? AND item = ?",
+                (self.STATUS_DEAD if dead else self.STATUS_PENDING, attempts, next_attempt_at,
+                 None if error is None else str(error), time.time(), queue, str(item)))
+        return dead
+
+    def next_attempt_at(self, queue):
+        """
+        Функция возвращает время (time.time()) ближайшей повторной попытки или None, если очередь пуста.
+        """
+        row = self.connection.execute("SELECT MIN(next_attempt_at) FROM work_items WHERE queue = ? AND status = ?",
+                                      (queue, self.STATUS_PENDING)).fetchone()
+        return row[0]
+
+    def get_results(self, queue):
+        """
+        Функция возвращает словарь результатов выполненных заданий очереди: {задание: результат}.
+        """
+        rows = self.connection.execute("SELECT item, result FROM work_items WHERE queue = ? AND status = ?",
+                                       (queue, self.STATUS_DONE))
+        return {item: json.loads(result) for item, result in rows}
+
+    def get_dead(self, queue):
+        """
+        Функция возвращает список "мертвых" заданий очереди: (задание, количество попыток, последняя ошибка).
+        """
+        return self.connection.execute(
+            "SELECT item, attempts, last_error FROM work_items WHERE queue = ? AND status = ? ORDER BY item",
+            (queue, self.STATUS_DEAD)).fetchall()
+
+    def get_counts(self, queue):
+        """
+        Функция возвращает количество заданий очереди по статусам.
+        """
+        rows = self.connection.execute("SELECT status, COUNT(*) FROM work_items WHERE queue = ? GROUP BY status",
+                                       (queue,))
+        return dict(rows.fetchall())
+
+    def defer(self, queue, item, next_attempt_at):
+        """
+        Процедура откладывает задание до времени next_attempt_at (time.time()), не считая попытку неудачной:
+        например, если запрос не был отправлен, так как метод API временно отключен.
+        """
+        with self.connection:
+            self.connection.execute(
+                "UPDATE work_items SET next_attempt_at = ?, updated_at = ? WHERE queue = ? AND item = ? AND status = ?",
+                (next_attempt_at, time.time(), queue, str(item), self.STATUS_PENDING))
+
+    def remove(self, queue, items):
+        """
+        Процедура удаляет задания из очереди (в любом статусе), например чтобы задание было добавлено заново.
+        """
+        with self.connection:
+            self.connection.executemany("DELETE FROM work_items WHERE queue = ? AND item = ?",
+                                        [(queue, str(item)) for item in items])
+
+    def clear(self, queue):
+        """
+        Процедура удаляет все задания очереди.
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM work_items WHERE queue = ?", (queue,))
+
+
+class AECatalogStore:
+    """
+    Каталог товаров AliExpress во встроенной базе SQLite вместо файлов ids_info.csv и product_info.csv.
+    Таблицы:
+        products - товары: product_id, статус, дата изменения на AliExpress, количество SKU (NULL - SKU не получены);
+        skus - SKU товаров с индексом по sku_code;
+        sync_state - состояние синхронизации: пары ключ - значение (JSON).
+    Изменения записываются пакетами в одной транзакции. Объект используется из одного потока.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS products ("
+                " product_id INTEGER PRIMARY KEY,"
+                " status TEXT,"
+                " gmt_modified TEXT,"
+                " sku_count INTEGER,"
+                " updated_at REAL NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS products_sku_count ON products (sku_count)")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS skus ("
+                " product_id INTEGER NOT NULL REFERENCES products (product_id) ON DELETE CASCADE,"
+                " sku_code TEXT NOT NULL,"
+                " PRIMARY KEY (product_id, sku_code))")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS skus_sku_code ON skus (sku_code)")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT,"
+                " updated_at REAL NOT NULL)")
+
+    def close(self):
+        self.connection.close()
+
+    def upsert_products(self, products):
+        """
+        Процедура добавляет или обновляет товары. products - идентификаторы товаров или словари с ключами
+        product_id и, необязательно, status и gmt_modified; не переданные поля существующих товаров не меняются.
+        """
+        now = time.time()
+        rows = []
+        for product in products:
+            if isinstance(product, dict):
+                rows.append((int(product['product_id']), product.get('status'), product.get('gmt_modified'), now))
+            else:
+                rows.append((int(product), None, None, now))
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO products (product_id, status, gmt_modified, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (product_id) DO UPDATE SET"
+                " status = COALESCE(excluded.status, status),"
+                " gmt_modified = COALESCE(excluded.gmt_modified, gmt_modified),"
+                " updated_at = excluded.updated_at",
+                rows)
+
+    def set_skus(self, product_skus):
+        """
+        Процедура записывает списки SKU товаров: словарь {product_id: [sku_code, ...]}.
+        SKU каждого товара заменяются целиком; товары, которых нет в каталоге, добавляются.
+        Значение None означает, что SKU товара не получены.
+        """
+        now = time.time()
+        with self.connection:
+            for product_id, sku_codes in product_skus.items():
+                product_id = int(product_id)
+                self.connection.execute(
+                    "INSERT INTO products (product_id, sku_count, updated_at) VALUES (?, ?, ?)"
+                    " ON CONFLICT (product_id) DO UPDATE SET sku_count = excluded.sku_count,"
+                    " updated_at = excluded.updated_at",
+                    (product_id, None if sku_codes is None else len(sku_codes), now))
+                self.connection.execute("DELETE FROM skus WHERE product_id = ?", (product_id,))
+                if sku_codes:
+                    self.connection.executemany("INSERT OR IGNORE INTO skus (product_id, sku_code) VALUES (?, ?)",
+                                                [(product_id, str(sku_code)) for sku_code in sku_codes])
+
+    def merge_products(self, products):
+        """
+        Функция добавляет или обновляет товары из списка товаров AliExpress: словари с ключами product_id,
+        status и gmt_modified. У новых товаров и товаров, измененных на AliExpress (обе даты gmt_modified известны
+        и различаются), SKU сбрасываются, чтобы они были получены заново. Возвращает список идентификаторов
+        таких товаров. Товары без даты в каталоге (перенесенные из прежних файлов) считаются неизмененными:
+        дата заполняется, SKU сохраняются.
+        """
+        products = list(products)
+        now = time.time()
+        changed = []
+        with self.connection:
+            for product in products:
+                product_id = int(product['product_id'])
+                row = self.connection.execute("SELECT gmt_modified FROM products WHERE product_id = ?",
+                                              (product_id,)).fetchone()
+                gmt_modified = product.get('gmt_modified')
+                if row is None or (row[0] is not None and gmt_modified is not None and row[0] != gmt_modified):
+                    changed.append(product_id)
+            self.connection.executemany(
+                "INSERT INTO products (product_id, status, gmt_modified, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (product_id) DO UPDATE SET"
+                " status = excluded.status,"
+                " gmt_modified = COALESCE(excluded.gmt_modified, gmt_modified),"
+                " updated_at = excluded.updated_at",
+                [(int(product['product_id']), product.get('status'), product.get('gmt_modified'), now)
+                 for product in products])
+            self.connection.executemany("UPDATE products SET sku_count = NULL WHERE product_id = ?",
+                                        [(product_id,) for product_id in changed])
+            self.connection.executemany("DELETE FROM skus WHERE product_id = ?",
+                                        [(product_id,) for product_id in changed])
+        return changed
+
+    def remove_products(self, product_ids):
+        """
+        Процедура удаляет товары и их SKU из каталога.
+        """
+        with self.connection:
+            self.connection.executemany("DELETE FROM products WHERE product_id = ?",
+                                        [(int(product_id),) for product_id in product_ids])
+
+    def get_product_ids(self):
+        return [row[0] for row in self.connection.execute("SELECT product_id FROM products ORDER BY product_id")]
+
+    def get_products_without_skus(self):
+        """
+        Функция возвращает идентификаторы товаров, SKU которых еще не получены.
+        """
+        return [row[0] for row in self.connection.execute(
+            "SELECT product_id FROM products WHERE sku_count IS NULL OR sku_count = 0 ORDER BY product_id")]
+
+    def get_product(self, product_id):
+        """
+        Функция возвращает словарь с данными товара и списком его SKU или None, если товара нет в каталоге.
+        """
+        row = self.connection.execute(
+            "SELECT product_id, status, gmt_modified, sku_count FROM products WHERE product_id = ?",
+            (int(product_id),)).fetchone()
+        if row is None:
+            return None
+        return {'product_id': row[0], 'status': row[1], 'gmt_modified': row[2],
+                'SKU': self.get_skus(product_id) if row[3] is not None else None}
+
+    def get_skus(self, product_id):
+        return [row[0] for row in self.connection.execute(
+            "SELECT sku_code FROM skus WHERE product_id = ? ORDER BY rowid", (int(product_id),))]
+
+    def find_product_id(self, sku_code):
+        """
+        Функция возвращает идентификатор товара с данным SKU или None.
+        """
+        row = self.connection.execute("SELECT product_id FROM skus WHERE sku_code = ? LIMIT 1",
+                                      (str(sku_code),)).fetchone()
+        return row[0] if row is not None else None
+
+    def get_product_skus(self):
+        """
+        Функция возвращает словарь {str(product_id): [sku_code, ...] или None} - в формате прежнего product_info.csv.
+        """
+        result = {}
+        for product_id, sku_count in self.connection.execute("SELECT product_id, sku_count FROM products"):
+            result[str(product_id)] = None if sku_count is None else []
+        for product_id, sku_code in self.connection.execute(
+                "SELECT product_id, sku_code FROM skus ORDER BY product_id, rowid"):
+            result[str(product_id)].append(sku_code)
+        return result
+
+    def get_state(self, key, default=None):
+        row = self.connection.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else default
+
+    def set_state(self, key, value):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO sync_state (key, value, updated_at) VALUES (?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                (key, json.dumps(value), time.time()))
+
+    def import_legacy_files(self, ids_path, product_info_path):
+        """
+        Функция однократно переносит в каталог данные из прежних файлов: список идентификаторов ids_info.csv
+        и словарь SKU product_info.csv (JSON). Возвращает True, если импорт выполнен при этом вызове.
+        """
+        if self.get_state('legacy_import'):
+            return False
+        product_ids = []
+        if os.path.isfile(ids_path):
+            with open(ids_path, 'r', newline='', encoding='utf_8_sig') as ids_file:
+                reader = csv.reader(ids_file, delimiter=';')
+                next(reader, None)
+                product_ids = [row[0] for row in reader if row and row[0]]
+        product_skus = {}
+        if os.path.isfile(product_info_path):
+            with open(product_info_path, 'r') as info_file:
+                content = info_file.read()
+                product_skus = json.loads(content) if content.strip() else {}
+        self.upsert_products(product_ids)
+        self.set_skus(product_skus)
+        self.set_state('legacy_import', {'products': len(product_ids), 'product_info': len(product_skus),
+                                         'time': time.time()})
+        return True
+
+
 class AEGeneralProductUpdater:
     # Словарь для статусов товаров
     product_statuses = {
@@ -108,6 +750,10 @@ class AEGeneralProductUpdater:
     }
     path_id_info_file = 'ids_info.csv'
     path_product_info_file = 'product_info.csv'
+    # Очередь заданий получения SKU товаров в AEWorkQueue
+    product_info_queue = 'product_info'
+    # Ключ в sync_state каталога: время шлюза начала последней успешной синхронизации списка товаров
+    product_list_watermark = 'product_list_watermark'
     # Строки для обращения к структуре ответов/запросов AE
     resp_get_p_list = 'aliexpress_solution_product_list_get_response'
     resp_get_p_info = 'aliexpress_solution_product_info_get_response'
@@ -118,95 +764,113 @@ class AEGeneralProductUpdater:
     p_sub_code = 'sub_code'
     p_msg = 'msg'
     p_sub_msg = 'sub_msg'
+    # Результат make_request_with_retry, если запрос не отправлен: метод API отключен выключателем
+    request_skipped = object()
     # Общее количество страниц с товарами
     total_page_count = 0
     # В result помещаем данные, полученные в процессе работы
     result_list_ali_ids = []
     result_products_info = {}
     data_from_1c = None
-    time_sleep = 2
 
     def __init__(self, config_f):
         # Логгер для записи ошибок
         self.logger = AELogger(config_f)
-        self.check_for_file_ids_info_availability()
         self.config = config_f
+        # Каталог товаров и SKU
+        self.catalog = Utils.create_catalog_store(config_f)
+        self.check_for_file_ids_info_availability()
+        # Постоянная очередь товаров, для которых нужно получить SKU
+        self.work_queue = Utils.create_work_queue(config_f)
+        # Адаптивный регулятор частоты запросов
+        self.throttle = Utils.create_throttle(config_f)
+        # Статистика попыток запросов: количество и время ответа по методу API и результату
+        self.attempt_stats = top.api.AttemptStats()
+        # Товары и страницы списка, данные по которым не получены (метрика ae_failed_items_total)
+        self.failed_items = top.api.get_default_registry().counter(
+            'ae_failed_items_total', 'Items not processed on AliExpress.', ('resource',))
+        # Клиент TOP API, общий для всех запросов
+        breaker = Utils.create_circuit_breaker(config_f, self.logger)
+        self.client = Utils.create_ae_client(
+            config_f, self.throttle,
+            [self.attempt_stats, Utils.create_metrics_hook(self.throttle, breaker, 'collector')],
+            breaker)
 
     def check_for_file_ids_info_availability(self):
-        if os.path.isfile(self.path_id_info_file):
-            df = pd.read_csv(self.path_id_info_file, sep=";", encoding='utf_8_sig')
-        else:
-            df = pd.DataFrame({'product_id': list()})
-            df.to_csv(self.path_id_info_file, sep=";", encoding='utf_8_sig', index=False)
-        if df.shape[0] > 0:
-            for id_ in df['product_id'].values:
-                self.result_list_ali_ids.append(id_)
+        """
+        Процедура читает список идентификаторов AliExpress из каталога. При первом запуске с каталогом
+        в него переносятся данные прежних файлов ids_info.csv и product_info.csv.
+        """
+        if self.catalog.import_legacy_files(self.path_id_info_file, self.path_product_info_file):
+            log_message = f"Данные файлов {self.path_id_info_file} и {self.path_product_info_file} " \
+                          f"перенесены в каталог {self.catalog.path}"
+            self.logger.process_log_message(log_message)
+        self.result_list_ali_ids.extend(self.catalog.get_product_ids())
 
     def read_file_product_info(self, return_data=False):
-        if os.path.isfile(self.path_product_info_file):
-            with open(self.path_product_info_file, 'r') as outfile:
-                data = json.load(outfile)
-                self.result_products_info = data
-                if return_data:
-                    return json.load(data)
+        """
+        Функция читает из каталога словарь со списком идентификаторов AliExpress и связанными с ними SKU.
+        """
+        data = self.catalog.get_product_skus()
+        self.result_products_info = data
+        if return_data:
+            return data
 
     def save_file_product_info(self, data=None):
         """
-        Функция записывает словарь со списком идентификаторов AliExpress и связанными с ними SKU в csv.
+        Функция записывает словарь со списком идентификаторов AliExpress и связанными с ними SKU в каталог
+        (одной транзакцией).
         """
         if data is None:
             data = self.result_products_info
         else:
             self.result_products_info = data
-
-        with open(self.path_product_info_file, 'w') as outfile:
-            if not self.result_products_info == dict():
-                json.dump(data, outfile)
+        self.catalog.set_skus(data)
 
     def make_request_with_retry(self, request, add_info=None):
         """
         Функция выполняет запрос по API получения информации о товаре AliExpress.
-        -  возвращает или ответ API-сервера (словарь), или None.
+        Повторные попытки выполняет клиент по политике Utils.create_retry_policy: повторяются ошибки соединения,
+        таймауты, HTTP 5xx и перегрузка шлюза; ошибки сессии и параметров запроса не повторяются.
+        -  возвращает или ответ API-сервера (словарь), или None, или request_skipped, если запрос не отправлен,
+           так как метод API временно отключен выключателем.
         """
-        # Для запроса по одному товару обрабатывается ошибка, когда список SKU пуст
-        response = None
-        time.sleep(self.time_sleep)
         if add_info is not None:
             log_message = f'Обработка товара с ID {add_info}'
             self.logger.process_log_message(log_message)
 
-        for j in range(3):
-            log_message = "ok"
-            response = request.getResponse(self.config.get("AE_OAUTH_TOKEN"))
-            if ("error_response" in response
-                    and j < 3):
-                time.sleep(self.time_sleep)
-            elif (request is top.api.AliexpressSolutionProductInfoGetRequest
-                  and 'aeop_ae_product_s_k_us' not in response[self.resp_get_p_info]['result']
-                  and j < 3):
-                time.sleep(self.time_sleep)
-            else:  # НЕ ОШИБКА!!!
-                try:
-                    if not response.get('aliexpress_solution_product_info_get_response') is None:
-                        res = response['aliexpress_solution_product_info_get_response']['result']["subject"]
-                    elif not response.get('aliexpress_solution_product_list_get_response') is None:
-                        res = response['aliexpress_solution_product_list_get_response']['result']["success"]
-                    else:
-                        res = "Структура ответа от сервера - не валидная."
-                    log_message = f"Структура ответа от сервера - валидная."
-                except KeyError as er:
-                    log_message = er
-                    pass
-                finally:
-                    self.logger.process_log_message(log_message)
-                    return response
-
-        log_message = '---> error_response'
+        try:
+            response = self.client.execute(request, self.config.get("AE_OAUTH_TOKEN"))
+        except top.api.CircuitOpenError as er:
+            # Метод API недоступен: товар пропускается и будет запрошен на следующем проходе
+            log_message = f"Запрос не отправлен, метод временно отключен: {er}"
+            self.logger.process_log_message(log_message)
+            return self.request_skipped
+        except Utils.REQUEST_ERRORS as er:
+            log_message = f"Ошибка соединения с сервером AliExpress после всех попыток: {type(er).__name__}: {er}"
+            self.logger.process_log_message(log_message)
+            return None
+
+        if "error_response" in response:
+            log_message = '---> error_response'
+            self.logger.process_log_message(log_message)
+            # Если положительный ответ от сервера не получен, формируем сообщение об ошибке
+            # и пишем его в лог, после чего возвращаем None
+            self.log_final_error_message(request=request, response=response)
+            return None
+
+        try:
+            if not response.get('aliexpress_solution_product_info_get_response') is None:
+                res = response['aliexpress_solution_product_info_get_response']['result']["subject"]
+            elif not response.get('aliexpress_solution_product_list_get_response') is None:
+                res = response['aliexpress_solution_product_list_get_response']['result']["success"]
+            else:
+                res = "Структура ответа от сервера - не валидная."
+            log_message = f"Структура ответа от сервера - валидная."
+        except KeyError as er:
+            log_message = er
         self.logger.process_log_message(log_message)
-        # Если после 3 попыток не получен положительный ответ от сервера,
-        # формируем сообщение об ошибке и пишем его в лог, после чего возвращаем None
-        self.log_final_error_message(request=request, response=response)
-        return None
+        return response
 
     def log_final_error_message(self, request, response):
         """
@@ -254,37 +918,49 @@ class AEGeneralProductUpdater:
                           f"{'---' * 20}"
         self.logger.process_log_message(log_message)
 
-    def process_get_list_ids(self, page_num=None):
-        result = None
-        # Создание подключения к зарубежному серверу AE по HTTPS
-        cur_product_list_request = top.api.AliexpressSolutionProductListGetRequest(
-            self.config.get("AE_DOMAIN"),
-            self.config.get("AE_PORT")
-        )
-        cur_product_list_request.set_app_info(top.appinfo(
-            self.config.get("AE_APPKEY"),
-            self.config.get("AE_APPSECRET"))
-        )
-        cur_product_list_request.aeop_a_e_product_list_query = {
+    def create_product_list_query(self, page_num, page_size, status=None, modified_start=None):
+        """
+        Функция формирует параметры запроса списка товаров: страница, размер страницы, статус товаров
+        (по умолчанию onSelling) и, если задано, время изменения товаров, начиная с которого они выбираются.
+        """
+        query = {
             "current_page": page_num,
-            "page_size": self.id_page_size,
-            "product_status_type": self.product_statuses["onSelling"]
+            "page_size": page_size,
+            "product_status_type": status or self.product_statuses["onSelling"]
         }
+        if modified_start is not None:
+            query["gmt_modified_start"] = modified_start
+        return query
+
+    def process_get_list_ids(self, page_num=None, status=None, modified_start=None):
+        """
+        Функция получает одну страницу списка товаров. Возвращает список словарей с ключами product_id, status
+        и gmt_modified или None, если страница не получена.
+        """
+        result = None
+        # Запрос одной страницы списка товаров. Подключение к серверу AE и подпись выполняет self.client
+        cur_product_list_request = top.api.AliexpressSolutionProductListGetRequest()
+        cur_product_list_request.aeop_a_e_product_list_query = self.create_product_list_query(
+            page_num, self.id_page_size, status, modified_start)
 
         # Получаем одну страницу на 50 товаров. Осуществляем 3 попытки получить данные т.к. AE иногда глючит
         items_list = list()
         try:
             cur_product_list_response = self.make_request_with_retry(cur_product_list_request)
-            if cur_product_list_response is None:
-                log_message = f"Ошибка запроса списка товаров в продаже - запрос не вернул результат.\n" \
+            if cur_product_list_response is None or cur_product_list_response is self.request_skipped:
+                log_message = f"Ошибка запроса списка товаров в статусе {status or 'onSelling'} - " \
+                              f"запрос не вернул результат.\n" \
                               f"Не обработана страница № {str(page_num)}"
                 self.logger.process_log_message(log_message)
             else:
                 # Получаем массив словарей. В словарях хранятся идентификаторы на AliExpress
                 response = cur_product_list_response[self.resp_get_p_list]['result']
-                list_products_info = response['aeop_a_e_product_display_d_t_o_list']['item_display_dto']
-                for i in list_products_info:
-                    items_list.append(i['product_id'])
+                if response['product_count']:
+                    list_products_info = response['aeop_a_e_product_display_d_t_o_list']['item_display_dto']
+                    for i in list_products_info:
+                        items_list.append({'product_id': i['product_id'],
+                                           'status': status or self.product_statuses["onSelling"],
+                                           'gmt_modified': i.get('gmt_modified')})
                 result = items_list
         except Exception as e:
             log_message = f"Ошибка запроса к API для полученя страницы списка товаров.\n" \
@@ -296,96 +972,155 @@ class AEGeneralProductUpdater:
 
         return result
 
-    def get_num_page_count(self):
+    def get_num_page_count(self, status=None, modified_start=None):
+        """
+        Функция рассчитывает количество страниц списка товаров в статусе status (по умолчанию onSelling),
+        измененных начиная с modified_start (если задано), записывает его в свойство total_page_count
+        и возвращает его.
+        """
         log_message = f"Начало операции по получению количества страниц с товарами.\n" \
                       f"{'-' * 20}"
         self.logger.process_log_message(log_message)
 
-        # Если id прочитаны при инициализации объекта класса, то нет смысла выполнять данную функцию
-        if len(self.result_list_ali_ids) > 0:
-            return
-
-        req = top.api.AliexpressSolutionProductListGetRequest(
-            self.config.get("AE_DOMAIN"),
-            self.config.get("AE_PORT")
-        )
-        req.set_app_info(top.appinfo(
-            self.config.get("AE_APPKEY"),
-            self.config.get("AE_APPSECRET"))
-        )
+        req = top.api.AliexpressSolutionProductListGetRequest()
         # Данные запроса (получения общего количества товаров)
-        req.aeop_a_e_product_list_query = {
-            "current_page": 1,
-            "page_size": 1,
-            "product_status_type": self.product_statuses["onSelling"]
-        }
+        req.aeop_a_e_product_list_query = self.create_product_list_query(1, 1, status, modified_start)
 
         # Запрос на один товар. Необходим для получения общего числа опубликованных товаров
-        resp = req.getResponse(self.config.get("AE_OAUTH_TOKEN"))
+        resp = self.client.execute(req, self.config.get("AE_OAUTH_TOKEN"))
         product_count = resp[self.resp_get_p_list]['result']['product_count']
         self.total_page_count = int(product_count // self.id_page_size)
         if product_count % self.id_page_size > 0:
             self.total_page_count += 1
+        return self.total_page_count
 
-    def get_list_ids_ali(self):
+    def get_list_ids_ali(self, status=None, modified_start=None):
+        """
+        Функция получает список товаров в статусе status (по умолчанию onSelling), измененных начиная
+        с modified_start (если задано; иначе - все товары).
+        Возвращает пару: список словарей товаров (product_id, status, gmt_modified) в порядке страниц
+        и признак того, что получены все страницы.
+        """
         # Инициализация переменных
         response_data = []
+        complete = True
 
         log_message = f"Начало операции по получению списка Идентификаторов AliExpress.\n" \
                       f"{'-' * 20}"
         self.logger.process_log_message(log_message)
 
-        # Если id прочитаны при инициализации объекта класса, то нет смысла выполнятьт данную функцию
-        if len(self.result_list_ali_ids) > 0:
-            return
-        # Для каждой страницы создаем свой процесс получения данных от AE
-        # Полученные результаты преобразуем в датафреймы и объединяем
+        # Страницы запрашиваются параллельно в общем пуле потоков, каждая страница обрабатывается сразу,
+        # как только получен ответ, не дожидаясь остальных.
         # Так как каждая страница содержит уникальные данные, настраивать слияние не надо
         # В случае, если при получении списка данных возникла ошибка с той или иной страницей, такая страница
-        # В списке будет представлена пустым словарем, а в логах будет сказано, какая страница не была выгружена.
+        # пропускается, а в логах будет сказано, какая страница не была выгружена.
         try:
-            # Сформируем список страниц, для параллельного обхода в pool
-            page_list = list(range(1, self.total_page_count + 1))
-            pool = Pool(processes=10)
-            pool_map = pool.map_async(self.process_get_list_ids, page_list)
-            response_data = pool_map.get()
-        except TimeoutError:
-            log_message = "Ошибка исполнения кода процесса получения страницы списка товаров Ali:\n" \
-                          "Превышено время ожидания ответа от сервера AliExpress."
-            self.logger.process_log_message(log_message)
+            page_count = self.get_num_page_count(status, modified_start)
+            executor = Utils.get_io_executor(self.config)
+            futures = {executor.submit(self.process_get_list_ids, page_num, status, modified_start): page_num
+                       for page_num in range(1, page_count + 1)}
+            for future in concurrent.futures.as_completed(futures):
+                i_list = future.result()
+                if i_list is None:
+                    # Страница списка не получена
+                    self.failed_items.inc(resource='product_list_page')
+                    complete = False
+                    continue
+                response_data.append((futures[future], i_list))
         except Exception:
+            complete = False
             log_message = f"Неизвестная ошибка исполнения кода процесса получения страницы списка товаров Ali.\n" \
                           f"Описание ошибки с цепочкой вызовов:\n" \
                           f"{traceback.format_exc()}"
             self.logger.process_log_message(log_message)
 
-        list_to_save = []
-        for i_list in response_data:
-            self.result_list_ali_ids.extend(i_list)
-            list_to_save.extend(i_list)
+        # Товары возвращаются в порядке страниц
+        products = []
+        for _, i_list in sorted(response_data, key=lambda page: page[0]):
+            products.extend(i_list)
+        return products, complete
 
-        if len(list_to_save) > 0:
-            df = pd.DataFrame({'product_id': list_to_save})
-            df.to_csv(self.path_id_info_file, sep=";", encoding='utf_8_sig', index=False)
+    def sync_product_list(self, rebuild=False):
+        """
+        Процедура синхронизирует каталог со списком товаров на AliExpress.
+        Полная синхронизация (первый запуск или rebuild=True) получает все товары в продаже и удаляет из каталога
+        товары, которых в списке нет. Иначе выполняется инкрементальная синхронизация: запрашиваются только товары,
+        измененные после предыдущей синхронизации (фильтр gmt_modified_start с запасом AE_SYNC_OVERLAP секунд,
+        по умолчанию 600): товары в продаже добавляются или обновляются, товары, перешедшие в другие статусы
+        (сняты с продажи, на рассмотрении, требуют изменения), удаляются из каталога.
+        У новых и измененных товаров SKU сбрасываются и затем запрашиваются заново (collecting_product_data).
+        Время синхронизации (по часам шлюза) сохраняется в каталоге, только если все страницы получены;
+        иначе следующая синхронизация начнется с прежнего времени. Товары, удаленные на AliExpress полностью,
+        в изменения не попадают - их удаляет полная синхронизация.
+        """
+        # Метка времени берется по часам шлюза: перед ней часы клиента синхронизируются
+        if self.client.clock is not None and self.client.clock.needs_sync():
+            self.client.clock.sync(self.client)
+        started = top.api.get_default_clock().now() if self.client.clock is None else self.client.clock.now()
+        watermark = self.catalog.get_state(self.product_list_watermark)
+        on_selling = self.product_statuses["onSelling"]
+
+        if rebuild or watermark is None:
+            log_message = f"Полная синхронизация списка товаров AliExpress.\n" \
+                          f"{'-' * 20}"
+            self.logger.process_log_message(log_message)
+            products, complete = self.get_list_ids_ali(on_selling)
+            changed = self.catalog.merge_products(products)
+            removed = []
+            if complete:
+                listed = set(int(product['product_id']) for product in products)
+                removed = [product_id for product_id in self.catalog.get_product_ids() if product_id not in listed]
+                self.catalog.remove_products(removed)
+        else:
+            modified_start = top.api.clock.format_server_time(
+                watermark - float(self.config.get("AE_SYNC_OVERLAP") or 600))
+            log_message = f"Синхронизация товаров AliExpress, измененных с {modified_start}.\n" \
+                          f"{'-' * 20}"
+            self.logger.process_log_message(log_message)
+            products, complete = self.get_list_ids_ali(on_selling, modified_start)
+            # Товар мог смениться статусом несколько раз: учитывается последнее изменение
+            latest = {int(product['product_id']): product for product in products}
+            for status in self.product_statuses.values():
+                if status == on_selling:
+                    continue
+                status_products, status_complete = self.get_list_ids_ali(status, modified_start)
+                complete = complete and status_complete
+                for product in status_products:
+                    current = latest.get(int(product['product_id']))
+                    if current is None or (product['gmt_modified'] or '') > (current['gmt_modified'] or ''):
+                        latest[int(product['product_id'])] = product
+            changed = self.catalog.merge_products(
+                product for product in latest.values() if product['status'] == on_selling)
+            removed = [product_id for product_id, product in latest.items() if product['status'] != on_selling]
+            self.catalog.remove_products(removed)
+
+        # Задания измененных и удаленных товаров, оставшиеся от прерванного запуска, больше не актуальны:
+        # измененные товары будут добавлены в очередь заново, так как их SKU сброшены
+        self.work_queue.remove(self.product_info_queue, changed + removed)
+        if complete:
+            self.catalog.set_state(self.product_list_watermark, started)
+        else:
+            log_message = f"Список товаров получен не полностью: время синхронизации не сохранено, " \
+                          f"удаление отсутствующих товаров пропущено"
+            self.logger.process_log_message(log_message)
+        self.result_list_ali_ids[:] = self.catalog.get_product_ids()
+        log_message = f"Синхронизация списка товаров завершена: получено {len(products)}, " \
+                      f"новых или измененных {len(changed)}, удалено {len(removed)}, " \
+                      f"всего в каталоге {len(self.result_list_ali_ids)}"
+        self.logger.process_log_message(log_message)
 
     def process_get_products_info(self, product_id):
         """
         Функция вызывает другую функцию получения данных по одному идентификатору AliExpress.
         Если ответ по API вернулся без ошибок, функция записывает в словарь result_dict список полученных SKU,
-        и возвращает словарь; иначе возвращает пустой result_dict.
+        и возвращает словарь; иначе возвращает пустой result_dict. Если запрос не отправлен (метод API отключен
+        выключателем), в result_dict['skipped'] записывается True.
         """
         # Отдельный запрос для получения информации об одном товаре
-        cur_product_info_request = top.api.AliexpressSolutionProductInfoGetRequest(
-            self.config.get("AE_DOMAIN"),
-            self.config.get("AE_PORT")
-        )
-        cur_product_info_request.set_app_info(top.appinfo(
-            self.config.get("AE_APPKEY"),
-            self.config.get("AE_APPSECRET"))
-        )
+        cur_product_info_request = top.api.AliexpressSolutionProductInfoGetRequest()
 
         items_list = self.result_list_ali_ids
-        result_dict = {'SKU': None, 'product_id': product_id}
+        result_dict = {'SKU': None, 'product_id': product_id, 'skipped': False}
         list_SKU = []
 
         # # Задержка в 1 сек чтобы не перегружать API слишком частыми запросами
@@ -397,6 +1132,9 @@ class AEGeneralProductUpdater:
         # Если в конце получаем назад None - проскакиваем данный товар
         # Если все успешно - получаем результат запроса
         product_info_response = self.make_request_with_retry(cur_product_info_request, product_id)
+        if product_info_response is self.request_skipped:
+            result_dict['skipped'] = True
+            return result_dict
         if product_info_response is None:
             return result_dict
 
@@ -416,86 +1154,85 @@ class AEGeneralProductUpdater:
 
     def control_full_product_info(self):
         """
-        Функция проверяет прочитанный словарь со списком идентификаторов AliExpress и SKU,
-        проверяет список на наличие идентификаторов, для которых еще не был получен набор SKU.
+        Функция проверяет по каталогу, есть ли идентификаторы AliExpress, для которых еще не был получен набор SKU.
 
-        Если в списке есть ключи (идентификаторы AliExpress), для которых еще не получен список SKU (значение по ключу
-        равно None), то функция возвращает True.
+        Если в каталоге есть товары, для которых еще не получен список SKU, то функция возвращает True.
         Если SKU получены для всех идентификаторов AliExpress, то функция возвращает False
         """
-        result = False
-        list_with_data = []
-        for key, values in self.result_products_info.items():
-            if not values is None:
-                list_with_data.append(key)
-        if len(list_with_data) != len(self.result_list_ali_ids):
-            result = True
-        else:
-            if None in self.result_products_info.values():
-                result = True
-
-        return result
+        return len(self.catalog.get_products_without_skus()) > 0
 
     def get_products_info_ali(self):
         """
-        Функция вызывает функцию получения списка SKU для каждого идентификатора AliExpress, для которго список SKU
-        еще не получен.
-        Полученные по API данные сохраняются в свойстве result_products_info, полсле чего вызывается другая функция,
-        которая записывает полученные данные в csv-файл.
+        Функция получает списки SKU для товаров очереди заданий, время повторной попытки которых наступило.
+        Товары без SKU из result_list_ali_ids добавляются в очередь. Результат каждого товара сразу записывается
+        в очередь (и в свойство result_products_info), неудачный запрос откладывается очередью на время паузы.
+        Товары, запрос по которым не отправлен (метод API отключен выключателем), откладываются до конца паузы
+        восстановления без учета попытки. Возвращает количество обработанных товаров.
         """
 
         log_message = f"Начало операции по формированию списка SKU товаров, размещенных на ALiExpress.\n" \
                       f"{'-' * 20}"
         self.logger.process_log_message(log_message)
 
-        # получаем данные только по тем id, по которым данных нет
-        not_info_list = []
-        full_id_list = self.result_list_ali_ids
-        for i in full_id_list:
-            values = self.result_products_info.get(str(i))
-            if values is None:
-                not_info_list.append(i)
-            else:
-                if isinstance(values, list):
-                    if len(values) == 0:
-                        not_info_list.append(i)
+        # В очередь добавляются только те id, по которым данных нет (выбираются из каталога по индексу);
+        # id, уже бывшие в очереди, не меняются
+        self.work_queue.add(self.product_info_queue, self.catalog.get_products_without_skus())
+        due_list = self.work_queue.take_due(self.product_info_queue)
 
+        # Товары запрашиваются параллельно в общем пуле потоков: не более AE_SKU_WORKERS запросов одновременно
+        # (по умолчанию 4), частоту запросов ограничивает регулятор клиента (AE_RATE_LIMIT), поэтому скорость
+        # растет до квоты шлюза. Результат каждого товара записывается сразу после получения ответа.
+        progress = AEProgress(self.logger, "Получение SKU товаров", len(due_list),
+                              int(self.config.get("AE_PROGRESS_INTERVAL") or 60))
         try:
-            # Сформируем список страниц, для параллельного обхода в pool
-            ids_list = not_info_list
-            pool = Pool(processes=1)
-            pool_map = pool.map_async(self.process_get_products_info, ids_list)
-            response_data = pool_map.get()
-        except TimeoutError:
-            log_message = "Ошибка исполнения кода процесса получения списка SKU для товара, размещенного на AE:\n" \
-                          + "Превышено ожидание ответа сервера."
-            self.logger.process_log_message(log_message)
+            for product_id, i in Utils.iter_completed(Utils.get_io_executor(self.config),
+                                                      self.process_get_products_info, due_list,
+                                                      int(self.config.get("AE_SKU_WORKERS") or 4)):
+                if i['skipped']:
+                    # Запрос не отправлялся: попытка не засчитывается, товар ждет восстановления метода API
+                    self.work_queue.defer(self.product_info_queue, product_id,
+                                          time.time() + self.client.breaker.get_retry_after())
+                elif i['SKU'] is None:
+                    self.failed_items.inc(resource='product_info')
+                    if self.work_queue.fail(self.product_info_queue, product_id, "SKU не получены"):
+                        log_message = f"Товар {product_id} исключен из обработки после " \
+                                      f"{self.work_queue.max_attempts} неудачных попыток"
+                        self.logger.process_log_message(log_message)
+                else:
+                    self.work_queue.complete(self.product_info_queue, product_id, i['SKU'])
+                    self.catalog.set_skus({product_id: i['SKU']})
+                    self.result_products_info[str(product_id)] = i['SKU']
+                progress.update()
         except Exception:
             log_message = f"Неизвестная ошибка исполнения кода процесса получения списка SKU для товара, " \
                           f"размещенного на AE.\n" \
                           f"Описание ошибки с цепочкой вызовов:\n" \
                           f"{traceback.format_exc()}"
             self.logger.process_log_message(log_message)
-
-        for i in response_data:
-            self.result_products_info[str(i['product_id'])] = i['SKU']
-        # return None
-        self.save_file_product_info()
+        return len(due_list)
 
     def collecting_product_data(self):
         """
-        Функция проверяет, нужно ли продолжать получение списка SKU для имеющихся идентификаторов AliExpress,
-        и если надо, то запускает функцию получения списка SKU.
-        Вызов производится в цикле, который закончится только:
-        1) Если по всем идентификаторам AliExpress получены SKU.
-        2) Если число итераций цикла не достигло 5000.
+        Функция получает списки SKU для всех идентификаторов AliExpress через постоянную очередь заданий.
+        Задания, выполненные прерванным запуском, остаются в очереди, а их SKU уже записаны в каталог,
+        поэтому работа продолжается с места остановки. Очередь обрабатывается, пока в ней есть задания: неудачные товары запрашиваются повторно
+        после паузы, товары, не полученные за AE_QUEUE_MAX_ATTEMPTS попыток, пишутся в лог.
+        SKU каждого товара сразу записываются в каталог; когда очередь пуста, она очищается.
         """
-        index = 0
-        while self.control_full_product_info():
-            if index == 5000:
-                break
+        while True:
             self.get_products_info_ali()
-            index += 1
+            next_attempt_at = self.work_queue.next_attempt_at(self.product_info_queue)
+            if next_attempt_at is None:
+                break
+            # Ждем ближайшей повторной попытки; если метод API отключен выключателем - паузы восстановления
+            time.sleep(max(next_attempt_at - time.time(), self.client.breaker.get_retry_after(), 0))
+
+        dead_items = self.work_queue.get_dead(self.product_info_queue)
+        if dead_items:
+            log_message = f"Не получены SKU для {len(dead_items)} товаров:\n" + \
+                          '\n'.join(f"{item} - попыток {attempts}: {error}" for item, attempts, error in dead_items)
+            self.logger.process_log_message(log_message)
+        self.work_queue.clear(self.product_info_queue)
 
     def get_data_from_1c(self):
         """
@@ -563,14 +1300,31 @@ class AEProductBatchUpdater:
     str_inventory_update_response = 'aliexpress_solution_batch_product_inventory_update_response'
     str_price_update_response = 'aliexpress_solution_batch_product_price_update_response'
     str_product_dto = 'synchronize_product_response_dto'
-    # Время ожидания между выполнением запросов на обновление, сек.
-    request_sleep_time = 4
 
     # Конструктор класса
     def __init__(self, config):
         # Логгер для записи ошибок
         self.logger = AELogger(config)
         self.config = config
+        # Пакеты, не отправленные из-за отключенного метода API: (запрос, список товаров, номер пакета)
+        self.parked_batches = []
+        # Адаптивный регулятор частоты запросов и размера порций
+        self.throttle = Utils.create_throttle(config)
+        # Статистика попыток запросов: количество и время ответа по методу API и результату
+        self.attempt_stats = top.api.AttemptStats()
+        # Метрики обновления: отправленные SKU и не обновленные товары по ресурсу (price, inventory)
+        registry = top.api.get_default_registry()
+        self.skus_pushed = registry.counter('ae_skus_pushed_total', 'SKUs updated on AliExpress.', ('resource',))
+        self.skus_per_second = registry.gauge('ae_skus_per_second', 'SKUs updated per second in the last update.',
+                                              ('resource',))
+        self.failed_items = registry.counter('ae_failed_items_total', 'Items not processed on AliExpress.',
+                                             ('resource',))
+        # Клиент TOP API, общий для всех запросов
+        breaker = Utils.create_circuit_breaker(config, self.logger)
+        self.client = Utils.create_ae_client(
+            config, self.throttle,
+            [self.attempt_stats, Utils.create_metrics_hook(self.throttle, breaker, 'updater')],
+            breaker)
 
     @staticmethod
     def create_data_batch(full_df, max_size_ID=15, size_SKU=200, name_col_ID='product_id'):
@@ -635,6 +1389,22 @@ class AEProductBatchUpdater:
 
         return batch_list
 
+    def iter_data_batches(self, full_df, api_name):
+        """
+        Генератор порций товаров для обновления методом API api_name.
+        Размер порции берется у адаптивного регулятора. Если во время обновления регулятор уменьшил размер порции
+        (шлюз сообщил о перегрузке), оставшиеся товары перераспределяются по порциям нового размера.
+        Увеличение размера порции вступает в силу при следующем обновлении.
+        """
+        batch_size = self.throttle.get_batch_size(api_name, 15)
+        batch_list = collections.deque(self.create_data_batch(full_df, batch_size))
+        while batch_list:
+            yield batch_list.popleft()
+            new_batch_size = self.throttle.get_batch_size(api_name, batch_size)
+            if new_batch_size < batch_size and batch_list:
+                batch_size = new_batch_size
+                batch_list = collections.deque(self.create_data_batch(pd.concat(batch_list), batch_size))
+
     @staticmethod
     def form_update_list(dataFrame, updated_resource_string):
         """
@@ -672,54 +1442,94 @@ class AEProductBatchUpdater:
     def make_request_with_retry(self, request, current_product_list, access_token, batch_index):
         """
         Функция выполняет запрос по API обновления цен или остатков товаров AliExpress.
-        Если запрос возвращает ошибку, функция повторяет запрос до трех раз.
+        Повторные попытки при ошибках соединения, HTTP 5xx и перегрузке шлюза выполняет клиент
+        по политике Utils.create_retry_policy.
         Если данные товара были обновлены успешно, функция возвращает True.
-        Если все три попытки обновить данные завершились ошибками, или произошла непредвиденная ошибка,
+        Если все попытки обновить данные завершились ошибками, или произошла непредвиденная ошибка,
         функция возвращает False.
         """
         request.mutiple_product_update_list = current_product_list
-        response = None
-        for j in range(3):
-            response = request.getResponse(access_token)
-            if "error_response" in response and j < 3:
-                time.sleep(self.request_sleep_time)
-            else:
-                try:
-                    # Обработка ответа сервера, если общих ошибок не возникло
-                    if type(request) is top.api.AliexpressSolutionBatchProductInventoryUpdateRequest:
-                        if not response[self.str_inventory_update_response]['update_success']:
-                            self.log_failed_update_response(request, response)
-                            # 20210420: в случае если при обновлении произошли ошибки, возвращаем False
-                            return False
-                        else:
-                            return True
-                    elif type(request) is top.api.AliexpressSolutionBatchProductPriceUpdateRequest:
-                        if not response[self.str_price_update_response]['update_success']:
-                            self.log_failed_update_response(request, response)
-                            # 20210420: в случае если при обновлении произошли ошибки, возвращаем False
-                            return False
-                        else:
-                            return True
-                    else:
-                        return False
-                except Exception as e:
-                    log_message = f"Неизвестная ошибка типа {str(type(e))} при валидации ответа от AliExpress.\n" \
-                                  f"Описание ошибки с цепочкой вызовов:\n" \
-                                  f"{traceback.format_exc()}"
-                    self.logger.process_log_message(log_message)
+        try:
+            response = self.client.execute(request, access_token)
+        except top.api.CircuitOpenError as er:
+            # Метод API недоступен: пакет откладывается и отправляется повторно после паузы восстановления
+            self.parked_batches.append((request, current_product_list, batch_index))
+            log_message = f"Пакет {batch_index} отложен, метод временно отключен: {er}"
+            self.logger.process_log_message(log_message)
+            return False
+        except Utils.REQUEST_ERRORS as er:
+            log_message = f"Ошибка соединения с сервером AliExpress после всех попыток: {type(er).__name__}: {er}\n" \
+                          f"Пакет {batch_index} не обновлен.\n" \
+                          f"{'---' * 20}"
+            self.logger.process_log_message(log_message)
+            self.record_batch_metrics(request, current_product_list)
+            return False
+        if "error_response" in response:
+            # Если проблема не решена повторными попытками клиента, пишем в лог и возвращаем False
+            self.log_final_error_message(response)
+            self.record_batch_metrics(request, current_product_list)
+            return False
+        try:
+            # Обработка ответа сервера, если общих ошибок не возникло
+            if type(request) is top.api.AliexpressSolutionBatchProductInventoryUpdateRequest:
+                if not response[self.str_inventory_update_response]['update_success']:
+                    failed_ids = self.log_failed_update_response(request, response)
+                    self.record_batch_metrics(request, current_product_list, failed_ids)
+                    # 20210420: в случае если при обновлении произошли ошибки, возвращаем False
+                    return False
+                else:
+                    self.record_batch_metrics(request, current_product_list, ())
+                    return True
+            elif type(request) is top.api.AliexpressSolutionBatchProductPriceUpdateRequest:
+                if not response[self.str_price_update_response]['update_success']:
+                    failed_ids = self.log_failed_update_response(request, response)
+                    self.record_batch_metrics(request, current_product_list, failed_ids)
                     # 20210420: в случае если при обновлении произошли ошибки, возвращаем False
                     return False
-        # Если после 3 попыток проблема не решена, пишем в лог и возвращаем None
-        self.log_final_error_message(response)
-        # 20210420: если после трех попыток ничего не обновилось, вне зависимости от наличия описания ошибки в ответе
-        # возвращаем False
-        return False
+                else:
+                    self.record_batch_metrics(request, current_product_list, ())
+                    return True
+            else:
+                return False
+        except Exception as e:
+            log_message = f"Неизвестная ошибка типа {str(type(e))} при валидации ответа от AliExpress.\n" \
+                          f"Описание ошибки с цепочкой вызовов:\n" \
+                          f"{traceback.format_exc()}"
+            self.logger.process_log_message(log_message)
+            # 20210420: в случае если при обновлении произошли ошибки, возвращаем False
+            return False
+
+    @staticmethod
+    def get_resource_name(request):
+        """
+        Функция возвращает обновляемый запросом ресурс: 'inventory' или 'price'.
+        """
+        if type(request) is top.api.AliexpressSolutionBatchProductInventoryUpdateRequest:
+            return 'inventory'
+        return 'price'
+
+    def record_batch_metrics(self, request, current_product_list, failed_ids=None):
+        """
+        Процедура учитывает в метриках отправленные SKU и не обновленные товары пакета.
+            failed_ids - идентификаторы не обновленных товаров (строки); None - не обновлен весь пакет.
+        """
+        resource = self.get_resource_name(request)
+        failed_count = 0
+        pushed_count = 0
+        for product in current_product_list:
+            if failed_ids is None or str(product['product_id']) in failed_ids:
+                failed_count += 1
+            else:
+                pushed_count += len(product['multiple_sku_update_list'])
+        self.failed_items.inc(failed_count, resource=resource)
+        self.skus_pushed.inc(pushed_count, resource=resource)
 
     def log_failed_update_response(self, request, response):
         """
         Процедура формирует сообщение о неудачном обновлении одного или более товаров из пакета.
             request - объект http-запроса к API AliExpress.
             response - объект http-ответа от API AliExpress.
+        Возвращает множество идентификаторов не обновленных товаров (строки).
         """
         error_code = "Нет кода"
         error_message = "Неизвестная ошибка"
@@ -742,12 +1552,18 @@ class AEProductBatchUpdater:
                       f"Описание ошибки: {error_message}\n" \
                       f"Список не обновленных товаров:\n"
 
+        failed_ids = set()
         for item in items_dict:
             product_id = str(item['product_id'])
+            failed_ids.add(product_id)
             error_code = str(item['error_code'])
             error_message = str(item['error_message'])
             log_message += f"{product_id} - {error_message} ( {error_code} )\n"
+            # Ошибки перегрузки по отдельным товарам ("HSF Provider thread pool is full") уменьшают
+            # частоту запросов и размер порции
+            self.throttle.record(request.getapiname(), top.api.errors.classify_error(error_code, None, error_message))
         self.logger.process_log_message(log_message)
+        return failed_ids
 
     def log_final_error_message(self, response):
         """
@@ -790,19 +1606,13 @@ class AEProductBatchUpdater:
         """
         Функция формирует список батчей для обновления цен и итерирует по нему. Для каждого батча вызывает функцию
         формирования словаря с телом запроса по API и вызывает функцию отправки запроса.
-        После каждой итерации в цикле система ожидает ~4 секунды.
+        Частоту запросов ограничивает клиент (не чаще AE_BATCH_RATE_LIMIT запросов в секунду).
         """
         # Обновление цен
-        request_price = top.api.AliexpressSolutionBatchProductPriceUpdateRequest(
-            self.config.get("AE_DOMAIN"),
-            self.config.get("AE_PORT")
-        )
-        request_price.set_app_info(top.appinfo(
-            self.config.get("AE_APPKEY"),
-            self.config.get("AE_APPSECRET"))
-        )
+        request_price = top.api.AliexpressSolutionBatchProductPriceUpdateRequest()
         # Разбиваем датафрейм на пачки данных, поделенные в соответствии с требованиями AE
-        df_batch_list = self.create_data_batch(df)
+        # и текущим размером порции регулятора
+        df_batch_list = self.iter_data_batches(df, request_price.getapiname())
 
         # Простой счтечик для номера батча
         batch_num = 0
@@ -821,27 +1631,20 @@ class AEProductBatchUpdater:
                 current_product_list,
                 self.config.get("AE_OAUTH_TOKEN"),
                 batch_num)
-            time.sleep(self.request_sleep_time)
 
     def update_inventory(self, df):
         """
         Функция формирует список батчей для обновления остатков и итерирует по нему.
         Для каждого батча вызывает функцию формирования словаря с телом запроса по API и вызывает функцию отправки
         запроса.
-        После каждой итерации в цикле система ожидает ~4 секунды.
+        Частоту запросов ограничивает клиент (не чаще AE_BATCH_RATE_LIMIT запросов в секунду).
         """
         # Обновление остатков
-        request_inventory = top.api.AliexpressSolutionBatchProductInventoryUpdateRequest(
-            self.config.get("AE_DOMAIN"),
-            self.config.get("AE_PORT")
-        )
-        request_inventory.set_app_info(top.appinfo(
-            self.config.get("AE_APPKEY"),
-            self.config.get("AE_APPSECRET"))
-        )
+        request_inventory = top.api.AliexpressSolutionBatchProductInventoryUpdateRequest()
 
         # Разбиваем датафрейм на пачки данных, поделенные в соответствии с требованиями AE
-        df_batch_list = self.create_data_batch(df)
+        # и текущим размером порции регулятора
+        df_batch_list = self.iter_data_batches(df, request_inventory.getapiname())
 
         # Простой счтечик для номера батча
         batch_num = 0
@@ -860,7 +1663,36 @@ class AEProductBatchUpdater:
                 current_product_list,
                 self.config.get("AE_OAUTH_TOKEN"),
                 batch_num)
-            time.sleep(self.request_sleep_time)
+
+    def resume_parked_batches(self, max_rounds=3):
+        """
+        Процедура повторно отправляет отложенные пакеты после паузы восстановления выключателя.
+        Делает не более max_rounds проходов; пакеты, не отправленные и после них, пишутся в лог.
+        """
+        for _ in range(max_rounds):
+            if not self.parked_batches:
+                return
+            parked_batches, self.parked_batches = self.parked_batches, []
+            time.sleep(self.client.breaker.get_retry_after())
+            for request, current_product_list, batch_index in parked_batches:
+                self.make_request_with_retry(request, current_product_list, self.config.get("AE_OAUTH_TOKEN"),
+                                             batch_index)
+        if self.parked_batches:
+            log_message = f"Не отправлены пакеты: {[batch_index for _, _, batch_index in self.parked_batches]}\n" \
+                          f"{'---' * 20}"
+            self.logger.process_log_message(log_message)
+            for request, current_product_list, _ in self.parked_batches:
+                self.record_batch_metrics(request, current_product_list)
+
+    def record_push_rate(self, resource, pushed_before, started):
+        """
+        Процедура записывает в метрику ae_skus_per_second скорость обновления ресурса:
+        количество SKU, отправленных после pushed_before, за время с момента started (time.monotonic()).
+        """
+        elapsed = time.monotonic() - started
+        if elapsed > 0:
+            self.skus_per_second.set((self.skus_pushed.get(resource=resource) - pushed_before) / elapsed,
+                                     resource=resource)
 
     def update_resources(self, df):
         """
@@ -870,14 +1702,24 @@ class AEProductBatchUpdater:
             # log_message = f"Начало обновления прайс листа.\n" \
             #               f"{'---' * 20}"
             # self.logger.process_log_message(log_message)
+            pushed_before, started = self.skus_pushed.get(resource='price'), time.monotonic()
             self.update_price(df)
+            self.record_push_rate('price', pushed_before, started)
 
             # log_message = f"Начало обновления остатков.\n" \
             #               f"{'---' * 20}"
             # self.logger.process_log_message(log_message)
+            pushed_before, started = self.skus_pushed.get(resource='inventory'), time.monotonic()
             self.update_inventory(df)
-
-            log_message = f"---Операции обновления цен и остатков на AliExpress завершены---"
+            self.record_push_rate('inventory', pushed_before, started)
+            # Пакеты, отложенные из-за отключенного метода API
+            self.resume_parked_batches()
+
+            log_message = f"---Операции обновления цен и остатков на AliExpress завершены---\n" \
+                          f"Текущие ограничения запросов: {self.throttle.get_metrics()}\n" \
+                          f"Повторные попытки: {dict(self.client.retry.stats)}\n" \
+                          f"Выключатель: {dict(self.client.breaker.stats)}\n" \
+                          f"Попытки запросов:\n" + '\n'.join(self.attempt_stats.summary())
             self.logger.process_log_message(log_message)
         else:
             log_message = f"Нет необходимых данных для обновления цен и остатков на AliExpress"
@@ -885,23 +1727,34 @@ class AEProductBatchUpdater:
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Синхронизация товаров AliExpress')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='полная синхронизация списка товаров вместо получения изменений')
+    args = parser.parse_args()
+
     # Инициализация классов
     config = Utils.load_env()
+    run_started = time.time()
+    Utils.start_metrics_server(config)
     collector = AEGeneralProductUpdater(config)
     updater = AEProductBatchUpdater(config)
 
-    # Рассчитываем количество страниц, записываем в свойство класса
-    collector.get_num_page_count()
+    # Синхронизируем каталог со списком товаров AliExpress: только изменения с прошлого запуска
+    # или, с ключом --rebuild, полный список
+    collector.sync_product_list(rebuild=args.rebuild)
 
-    # Получаем список идентификаторов AliExpress, записываем в свойство класса и сохраняем в csv-файл
-    collector.get_list_ids_ali()
-
-    # Читаем ранее созданный файл со списком Идентификаторв ALi со SKU
+    # Читаем из каталога список Идентификаторв ALi со SKU
     collector.read_file_product_info()
 
-    # Получаем по API списки SKU для сохраненных в файле идентификаторов AliExpress,
-    # и записываем результирующий словарь со списком идентификаторов AliExpress и связанными SKU в файл
+    # Получаем по API списки SKU для сохраненных в каталоге идентификаторов AliExpress,
+    # и записываем SKU каждого товара в каталог
     collector.collecting_product_data()
 
     # collector.get_data_from_1c()
     # updater.update_resources(collector.data_from_1c)
+
+    # Закрываем пул потоков запросов к API
+    Utils.shutdown_io_executor()
+
+    # Метрики запуска в формате Prometheus
+    Utils.write_metrics(config, run_started)